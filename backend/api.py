@@ -1,12 +1,15 @@
 """FastAPI backend for skincare RAG application."""
 
+import json
 import logging
+from pathlib import Path
 from typing import Dict, Any
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from config.settings import get_settings
 
@@ -18,6 +21,7 @@ from backend.models import (
     UserQuestionnaire
 )
 from backend.rag_pipeline import SkincareRAGPipeline
+from backend.rebuild_jobs import RebuildJobRunner
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -25,18 +29,23 @@ logger = logging.getLogger(__name__)
 
 # Global RAG pipeline instance
 rag_pipeline = None
+rebuild_jobs = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    global rag_pipeline
+    global rag_pipeline, rebuild_jobs
     
     # Startup
     logger.info("Initializing RAG pipeline...")
     try:
         rag_pipeline = SkincareRAGPipeline()
         rag_pipeline.initialize_vector_store()
+        rebuild_jobs = RebuildJobRunner(
+            rag_pipeline.rebuild_index,
+            state_dir=str(Path(settings.VECTOR_STORE_PATH) / "rebuild_jobs")
+        )
         logger.info("RAG pipeline initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize RAG pipeline: {e}")
@@ -46,6 +55,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down application...")
+    if rebuild_jobs is not None:
+        rebuild_jobs.shutdown()
+    if rag_pipeline is not None:
+        rag_pipeline.close()
 
 
 # Create FastAPI app
@@ -85,6 +98,40 @@ async def health_check():
     return {"status": "healthy", "message": "API is operational"}
 
 
+def build_recommendation_response(questionnaire: UserQuestionnaire, recommendations_dict: Dict[str, Any]) -> RecommendationResponse:
+    """Wrap the pipeline's recommendations in the API response."""
+    # Create recommendation object
+    recommendations = SkincareRecommendation(
+        morning_routine=recommendations_dict.get("morning_routine", []),
+        evening_routine=recommendations_dict.get("evening_routine", []),
+        lifestyle_tips=recommendations_dict.get("lifestyle_tips", []),
+        remedies=recommendations_dict.get("remedies", []),
+        sources=recommendations_dict.get("sources", []),
+        warnings=recommendations_dict.get("warnings", [])
+    )
+    
+    # Create user profile summary
+    concerns_str = ", ".join([c.value for c in questionnaire.concerns])
+    user_profile_summary = (
+        f"User with {questionnaire.skin_type.value} skin type, "
+        f"primary concerns: {concerns_str}"
+    )
+    
+    # Medical disclaimer
+    disclaimer = (
+        "These recommendations are for informational purposes only and are based on "
+        "general dermatological literature. They do not constitute medical advice. "
+        "For persistent skin issues or severe conditions, please consult a qualified dermatologist."
+    )
+    
+    return RecommendationResponse(
+        recommendations=recommendations,
+        user_profile_summary=user_profile_summary,
+        disclaimer=disclaimer,
+        success=True
+    )
+
+
 @app.post("/recommendations", response_model=RecommendationResponse)
 async def get_recommendations(
     request: RecommendationRequest,
@@ -95,39 +142,10 @@ async def get_recommendations(
     try:
         logger.info("Processing recommendation request")
         
-        # Generate recommendations using RAG pipeline
-        recommendations_dict = pipeline.generate_recommendations(request.questionnaire)
-        
-        # Create recommendation object
-        recommendations = SkincareRecommendation(
-            morning_routine=recommendations_dict.get("morning_routine", []),
-            evening_routine=recommendations_dict.get("evening_routine", []),
-            lifestyle_tips=recommendations_dict.get("lifestyle_tips", []),
-            remedies=recommendations_dict.get("remedies", []),
-            sources=recommendations_dict.get("sources", []),
-            warnings=recommendations_dict.get("warnings", [])
-        )
-        
-        # Create user profile summary
-        concerns_str = ", ".join([c.value for c in request.questionnaire.concerns])
-        user_profile_summary = (
-            f"User with {request.questionnaire.skin_type.value} skin type, "
-            f"primary concerns: {concerns_str}"
-        )
-        
-        # Medical disclaimer
-        disclaimer = (
-            "These recommendations are for informational purposes only and are based on "
-            "general dermatological literature. They do not constitute medical advice. "
-            "For persistent skin issues or severe conditions, please consult a qualified dermatologist."
-        )
-        
-        return RecommendationResponse(
-            recommendations=recommendations,
-            user_profile_summary=user_profile_summary,
-            disclaimer=disclaimer,
-            success=True
-        )
+        # Generate recommendations using RAG pipeline; retrieval runs on the pipeline's
+        # executor and the LLM call is awaited, so the event loop is never blocked
+        recommendations_dict = await pipeline.agenerate_recommendations(request.questionnaire)
+        return build_recommendation_response(request.questionnaire, recommendations_dict)
     
     except Exception as e:
         logger.error(f"Error processing recommendation request: {str(e)}")
@@ -137,21 +155,116 @@ async def get_recommendations(
         )
 
 
-@app.post("/rebuild-index")
+def server_sent_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/recommendations/stream")
+async def stream_recommendations(
+    request: RecommendationRequest,
+    pipeline: SkincareRAGPipeline = Depends(get_rag_pipeline)
+) -> StreamingResponse:
+    """Stream recommendations as server-sent events while the LLM generates them.
+    
+    Events: ``sources`` (list of source files), ``token`` (raw LLM
+    output), ``item`` (``{"field", "index", "value"}`` for each completed
+    routine step, tip, remedy or warning) and finally ``done``, whose
+    data is the same body ``/recommendations`` returns.
+    """
+    logger.info("Processing streaming recommendation request")
+    
+    async def events():
+        async for event, data in pipeline.astream_recommendations(request.questionnaire):
+            if event == "done":
+                data = build_recommendation_response(request.questionnaire, data).model_dump()
+            yield server_sent_event(event, data)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Not async: counting disk cache entries walks the filesystem, so it runs in the threadpool
+@app.get("/cache/stats")
+def cache_stats(pipeline: SkincareRAGPipeline = Depends(get_rag_pipeline)) -> Dict[str, Any]:
+    """Hit rates of this worker's recommendation and query embedding caches, and its request coalescing."""
+    query_cache = pipeline.vector_store_manager.query_cache
+    flights = pipeline.async_request_flights
+    return {
+        "recommendations": pipeline.recommendation_cache.stats() if pipeline.recommendation_cache is not None else None,
+        "query_embeddings": query_cache.stats() if query_cache is not None else None,
+        "coalescing": flights.stats() if flights is not None else None,
+        "index_version": pipeline.serving_version
+    }
+
+
+def get_rebuild_jobs() -> RebuildJobRunner:
+    """Dependency to get the background rebuild job runner."""
+    if rebuild_jobs is None:
+        raise HTTPException(status_code=500, detail="RAG pipeline not initialized")
+    return rebuild_jobs
+
+
+@app.post("/rebuild-index", status_code=202)
 async def rebuild_vector_index(
+    full_rebuild: bool = False,
+    jobs: RebuildJobRunner = Depends(get_rebuild_jobs)
+):
+    """Start rebuilding the vector store index in the background (admin endpoint).
+    
+    Returns the job at once; poll ``/rebuild-index/{job_id}`` for its
+    status. The current index keeps serving until the new version is
+    swapped in. A rebuild already in progress is returned instead of
+    starting another.
+    """
+    job = jobs.submit(full_rebuild=full_rebuild)
+    logger.info(f"Index rebuild job {job.job_id} is {job.status}")
+    return job.to_dict()
+
+
+@app.get("/rebuild-index/{job_id}")
+async def get_rebuild_status(
+    job_id: str,
+    jobs: RebuildJobRunner = Depends(get_rebuild_jobs)
+):
+    """Status of a background index rebuild (admin endpoint)."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown rebuild job '{job_id}'")
+    return job.to_dict()
+
+
+@app.get("/index/versions")
+async def list_index_versions(
+    pipeline: SkincareRAGPipeline = Depends(get_rag_pipeline)
+):
+    """Index versions on disk and which one is being served (admin endpoint)."""
+    return {
+        "current": pipeline.index_versions.current,
+        "previous": pipeline.index_versions.previous,
+        "versions": pipeline.index_versions.list()
+    }
+
+
+@app.post("/index/rollback")
+async def rollback_index(
     pipeline: SkincareRAGPipeline = Depends(get_rag_pipeline)
 ):
-    """Rebuild the vector store index (admin endpoint)."""
+    """Swap the previous index version back in (admin endpoint)."""
     try:
-        logger.info("Rebuilding vector store index...")
-        pipeline.initialize_vector_store(force_rebuild=True)
-        return {"message": "Vector store index rebuilt successfully"}
+        version = await run_in_threadpool(pipeline.rollback_index)
+        return {"message": f"Serving index version {version}", "current": version}
     
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        logger.error(f"Error rebuilding index: {str(e)}")
+        logger.error(f"Error rolling back index: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to rebuild index: {str(e)}"
+            detail=f"Failed to roll back index: {str(e)}"
         )
 
 
@@ -0,0 +1,121 @@
+"""Index components built from settings, and the index builds shared by the API and ``main.py``."""
+
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from pathlib import Path
+import logging
+
+from utils.document_processor import DocumentProcessor
+from utils.vector_store import VectorStoreManager
+from utils.ann_index import IndexConfig
+from utils.index_builder import IndexBuilder, IndexBuildResult
+from utils.index_versions import IndexVersions
+from utils.dedup import NearDuplicateFilter
+from utils.local_pinecone import LocalPineconeIndex
+from utils.compact_store import CompactVectorStore
+from backend.retrieval_table import RetrievalTable
+
+logger = logging.getLogger(__name__)
+
+
+def create_document_processor(settings: Any) -> DocumentProcessor:
+    return DocumentProcessor(
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        num_workers=getattr(settings, "INGEST_WORKERS", 1),
+        text_cache_path=getattr(settings, "TEXT_CACHE_PATH", "cache/extracted_text")
+    )
+
+
+def create_vector_store_manager(settings: Any) -> VectorStoreManager:
+    return VectorStoreManager(
+        embedding_model=settings.EMBEDDING_MODEL,
+        vector_db_type=settings.VECTOR_DB_TYPE,
+        pinecone_api_key=settings.PINECONE_API_KEY,
+        pinecone_environment=settings.PINECONE_ENVIRONMENT,
+        pinecone_index_name=settings.PINECONE_INDEX_NAME,
+        embedding_batch_size=getattr(settings, "EMBEDDING_BATCH_SIZE", 256),
+        embedding_cache_path=getattr(settings, "EMBEDDING_CACHE_PATH", "cache/embeddings"),
+        encode_batch_size=getattr(settings, "ENCODE_BATCH_SIZE", 32),
+        embedding_workers=getattr(settings, "EMBEDDING_WORKERS", 1),
+        embedding_backend=getattr(settings, "EMBEDDING_BACKEND", "sentence-transformers"),
+        query_cache_size=getattr(settings, "QUERY_CACHE_SIZE", 1024),
+        index_config=IndexConfig.from_settings(settings),
+        retrieval_mode=getattr(settings, "RETRIEVAL_MODE", "dense"),
+        hybrid_fetch_k=getattr(settings, "HYBRID_FETCH_K", None),
+        rrf_k=getattr(settings, "RRF_K", 60),
+        pinecone_index=LocalPineconeIndex() if getattr(settings, "PINECONE_LOCAL", False) else None,
+        upsert_batch_size=getattr(settings, "PINECONE_UPSERT_BATCH_SIZE", 100),
+        upsert_concurrency=getattr(settings, "PINECONE_UPSERT_CONCURRENCY", 4),
+        upsert_progress_path=getattr(settings, "PINECONE_PROGRESS_PATH", "cache/pinecone_upsert_progress.jsonl"),
+        query_concurrency=getattr(settings, "PINECONE_QUERY_CONCURRENCY", 8)
+    )
+
+
+@dataclass
+class IndexVersionBuild:
+    """A built and activated index version, opened as it will be served."""
+    name: str
+    store: CompactVectorStore
+    table: Optional[RetrievalTable]
+    result: IndexBuildResult
+
+
+def build_index_version(index_versions: IndexVersions, document_processor: DocumentProcessor,
+                        vector_store_manager: VectorStoreManager, settings: Any,
+                        full_rebuild: bool = False) -> IndexVersionBuild:
+    """Build a new index version, precompute its retrieval table and activate it.
+
+    Call with ``index_versions.build_lock()`` held: the version is seeded
+    from the current one, and the pointer switch and pruning must not
+    interleave with another process's build. The build runs on a fork of
+    ``vector_store_manager``, which keeps its own store. A failed build is
+    discarded and leaves the current version active.
+    """
+    name, version_path = index_versions.create()
+    try:
+        logger.info(f"Building FAISS vector store version {name} from documents...")
+        builder_manager = vector_store_manager.fork()
+        index_builder = IndexBuilder(
+            document_processor,
+            builder_manager,
+            dedup_threshold=getattr(settings, "DEDUP_THRESHOLD", None)
+        )
+        result = index_builder.build(settings.DATA_PATH, str(version_path), full_rebuild=full_rebuild)
+        logger.info(result.describe())
+        # Serve from the memory-mapped copy rather than the in-memory build
+        store = builder_manager.load_vector_store(str(version_path))
+        table = None
+        max_concerns = getattr(settings, "RETRIEVAL_TABLE_MAX_CONCERNS", 2)
+        if max_concerns > 0:
+            # Precompute retrieval for the profiles without free text, on the store as it will be served
+            table = RetrievalTable.build(
+                builder_manager,
+                k=getattr(settings, "RETRIEVAL_K", 5),
+                max_concerns=max_concerns,
+                use_tag_filter=getattr(settings, "RETRIEVAL_TAG_FILTER", False)
+            )
+            table.save(str(version_path))
+    except Exception:
+        index_versions.discard(name)
+        raise
+    
+    index_versions.activate(name)
+    return IndexVersionBuild(name=name, store=store, table=table, result=result)
+
+
+def load_pinecone_index(document_processor: DocumentProcessor, vector_store_manager: VectorStoreManager,
+                        settings: Any, pdf_files: Optional[List[Path]] = None) -> Any:
+    """Stream the chunks of every PDF (or ``pdf_files``) into the Pinecone index, in embedding batches."""
+    if pdf_files is None:
+        pdf_files = document_processor.list_pdf_files(settings.DATA_PATH)
+    documents = document_processor.iter_documents(pdf_files)
+    dedup_filter = None
+    if getattr(settings, "DEDUP_THRESHOLD", None):
+        dedup_filter = NearDuplicateFilter(threshold=settings.DEDUP_THRESHOLD)
+        documents = dedup_filter.filter(documents)
+    
+    store = vector_store_manager.create_vector_store(documents)
+    if dedup_filter is not None:
+        logger.info(dedup_filter.report.describe())
+    return store
@@ -1,7 +1,13 @@
 """RAG pipeline for skincare recommendations."""
 
+import asyncio
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from pathlib import Path
 
 from langchain.schema import Document
@@ -13,9 +19,21 @@ from langchain.schema.output_parser import StrOutputParser
 from config.settings import get_settings
 
 settings = get_settings()
-from utils.document_processor import DocumentProcessor
-from utils.vector_store import VectorStoreManager
+from utils.compact_store import CompactVectorStore
+from utils.index_versions import IndexVersions
+from utils.micro_batcher import MicroBatcher
+from utils.chunk_tags import TagFilter
+from utils.streaming_json import IncrementalJSONParser
+from utils.recommendation_cache import create_recommendation_cache, questionnaire_key
+from utils.single_flight import AsyncSingleFlight, SingleFlight
 from backend.models import UserQuestionnaire, SkincareRecommendation
+from backend.index_build import (
+    build_index_version, create_document_processor, create_vector_store_manager, load_pinecone_index
+)
+from backend.retrieval_table import (
+    RetrievalTable, avoided_ingredients, canonical_concerns, down_rank, format_user_query, table_fingerprint,
+    tag_filters, top_up
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,18 +41,16 @@ logger = logging.getLogger(__name__)
 class SkincareRAGPipeline:
     """RAG pipeline for generating skincare recommendations."""
     
+    # Questionnaire fields that reach the search query, the tag filters or the prompt;
+    # answers that differ only in other fields share cached recommendations
+    CACHE_KEY_FIELDS = (
+        "skin_type", "concerns", "allergies", "sensitive_ingredients", "prefers_natural", "budget_range",
+        "sun_exposure", "stress_level", "sleep_quality", "current_routine", "additional_notes"
+    )
+    
     def __init__(self):
-        self.document_processor = DocumentProcessor(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP
-        )
-        self.vector_store_manager = VectorStoreManager(
-            embedding_model=settings.EMBEDDING_MODEL,
-            vector_db_type=settings.VECTOR_DB_TYPE,
-            pinecone_api_key=settings.PINECONE_API_KEY,
-            pinecone_environment=settings.PINECONE_ENVIRONMENT,
-            pinecone_index_name=settings.PINECONE_INDEX_NAME
-        )
+        self.document_processor = create_document_processor(settings)
+        self.vector_store_manager = create_vector_store_manager(settings)
         # Configure LLM for OpenRouter
         llm_kwargs = {
             "model": settings.LLM_MODEL,
@@ -49,7 +65,64 @@ class SkincareRAGPipeline:
         
         self.llm = ChatOpenAI(**llm_kwargs)
         self.vector_store = None
+        # FAISS builds go to versioned directories under VECTOR_STORE_PATH and are swapped in atomically
+        self.index_versions = IndexVersions(settings.VECTOR_STORE_PATH, keep=getattr(settings, "INDEX_VERSIONS_KEEP", 3))
+        self._rebuild_lock = threading.Lock()
+        # Other worker processes may activate a version; check the pointer at most this often
+        self.index_refresh_seconds = getattr(settings, "INDEX_REFRESH_SECONDS", 2.0)
+        self._serving_stamp = None
+        self._next_refresh = 0.0
+        
+        # Opt-in: restrict retrieval to chunks tagged with the user's concerns, and rank chunks
+        # recommending their avoided ingredients last
+        self.use_tag_filter = getattr(settings, "RETRIEVAL_TAG_FILTER", False)
+        
+        # Builds precompute retrieval for every profile without free text and up to this many concerns
+        self.retrieval_table_max_concerns = getattr(settings, "RETRIEVAL_TABLE_MAX_CONCERNS", 2)
+        self._precomputed: Optional[Tuple[Any, RetrievalTable]] = None
+        
+        # Concurrent requests arriving within the window share one embedding + search batch. Off
+        # unless RETRIEVAL_MAX_BATCH_SIZE > 1: at low traffic the window only adds latency
+        self.retrieval_batcher = None
+        max_batch_size = getattr(settings, "RETRIEVAL_MAX_BATCH_SIZE", 1)
+        if max_batch_size > 1:
+            self.retrieval_batcher = MicroBatcher(
+                self._search_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=getattr(settings, "RETRIEVAL_BATCH_WINDOW_MS", 2.0),
+                name="retrieval-batcher"
+            )
+        
+        # Async requests retrieve on this pool (its size bounds concurrent retrievals, and so
+        # the micro-batch size) and await the LLM, with at most LLM_MAX_CONCURRENCY calls in flight
+        self.retrieval_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "RETRIEVAL_WORKERS", 32), thread_name_prefix="retrieval"
+        )
+        self.llm_max_concurrency = getattr(settings, "LLM_MAX_CONCURRENCY", 16)
+        self._llm_semaphore = None
+        
+        # Equivalent questionnaires are answered from this cache until the index version changes
+        self.recommendation_cache = create_recommendation_cache(
+            getattr(settings, "RECOMMENDATION_CACHE", "memory"),
+            ttl_seconds=getattr(settings, "RECOMMENDATION_CACHE_TTL", 86400),
+            max_size=getattr(settings, "RECOMMENDATION_CACHE_SIZE", 1024),
+            cache_dir=getattr(settings, "RECOMMENDATION_CACHE_PATH", "cache/recommendations")
+        )
+        self.serving_version: Optional[str] = None
+        
+        # Identical questionnaires arriving together share one retrieval and LLM call
+        self.request_flights = None
+        self.async_request_flights = None
+        if getattr(settings, "REQUEST_COALESCING", False):
+            self.request_flights = SingleFlight()
+            self.async_request_flights = AsyncSingleFlight()
         self._setup_prompt_template()
+        # Changing the model, its settings or the prompt must not return older generations
+        self._cache_namespace = json.dumps([
+            settings.LLM_MODEL, settings.TEMPERATURE, settings.MAX_TOKENS, getattr(settings, "RETRIEVAL_K", 5),
+            self.vector_store_manager.retrieval_mode, self.use_tag_filter,
+            hashlib.sha256(str(self.prompt_template).encode("utf-8")).hexdigest()
+        ])
     
     def _setup_prompt_template(self):
         """Setup the prompt template for recommendations."""
@@ -91,165 +164,481 @@ If you cannot find reliable information in the context for any category, include
 Return ONLY the JSON object, nothing else.
 """)
     
-    def initialize_vector_store(self, force_rebuild: bool = False) -> None:
-        """Initialize or load the vector store."""
+    def initialize_vector_store(self, force_rebuild: bool = False, full_rebuild: bool = False) -> None:
+        """Initialize or load the vector store.
+        
+        For FAISS, ``force_rebuild`` brings the index up to date with the data
+        directory, re-embedding only new or changed PDFs; ``full_rebuild``
+        re-processes every PDF from scratch.
+        """
         if settings.VECTOR_DB_TYPE == "pinecone":
             # For Pinecone, try to connect to existing index first
-            if not force_rebuild:
+            if not (force_rebuild or full_rebuild):
                 try:
                     logger.info("Connecting to existing Pinecone index...")
                     self.vector_store = self.vector_store_manager.load_vector_store("")
-                    return
+                    vector_count = self.vector_store_manager.pinecone_vector_count()
+                    if vector_count > 0:
+                        self._set_serving_version(self._pinecone_version(vector_count))
+                        return
+                    logger.info("Pinecone index is empty")
                 except Exception as e:
                     logger.warning(f"Failed to connect to Pinecone index: {e}. Creating new index...")
             
             # Build new vector store in Pinecone
             logger.info("Building new Pinecone vector store from documents...")
-            documents = self.document_processor.process_documents(settings.DATA_PATH)
-            
-            if not documents:
-                raise ValueError("No documents found to build vector store")
-            
-            self.vector_store = self.vector_store_manager.create_vector_store(documents)
+            self.vector_store = load_pinecone_index(self.document_processor, self.vector_store_manager, settings)
+            self._set_serving_version(self._pinecone_version(self.vector_store_manager.pinecone_vector_count()))
             logger.info("Pinecone vector store initialized successfully")
         
         else:
             # FAISS logic (existing)
-            vector_store_path = Path(settings.VECTOR_STORE_PATH)
+            if not (force_rebuild or full_rebuild) and self._load_current_version():
+                return
             
-            # Check if vector store exists and load it
-            if vector_store_path.exists() and not force_rebuild:
-                try:
-                    logger.info("Loading existing FAISS vector store...")
-                    self.vector_store = self.vector_store_manager.load_vector_store(
-                        str(vector_store_path)
-                    )
+            # With several uvicorn workers starting together, only the first one builds;
+            # the rest wait for the lock and open what it built
+            with self._rebuild_lock, self.index_versions.build_lock():
+                if not (force_rebuild or full_rebuild) and self._load_current_version():
                     return
-                except Exception as e:
-                    logger.warning(f"Failed to load vector store: {e}. Rebuilding...")
-            
-            # Build new vector store
-            logger.info("Building new FAISS vector store from documents...")
-            documents = self.document_processor.process_documents(settings.DATA_PATH)
-            
-            if not documents:
-                raise ValueError("No documents found to build vector store")
-            
-            self.vector_store = self.vector_store_manager.create_vector_store(documents)
-            self.vector_store_manager.save_vector_store(str(vector_store_path))
-            
+                self._build_index_version(full_rebuild)
             logger.info("FAISS vector store initialized successfully")
     
-    def _format_user_query(self, questionnaire: UserQuestionnaire) -> str:
-        """Format user questionnaire into a search query."""
-        query_parts = [
-            f"skin type {questionnaire.skin_type.value}",
-            f"concerns {' '.join([c.value for c in questionnaire.concerns])}"
-        ]
+    def _pinecone_version(self, vector_count: int) -> str:
+        """Serving version of the Pinecone index: the digest of the chunks last loaded into it."""
+        digest = self.vector_store_manager.pinecone_index_version()
+        if digest is None:
+            # Loaded before the digest was recorded; the vector count is all there is to go on
+            return f"pinecone-{vector_count}"
+        return f"pinecone-{digest[:16]}"
+    
+    def _load_current_version(self) -> bool:
+        """Serve the live index version; False if there is none or it fails to load."""
+        stamp = self.index_versions.pointer_stamp()
+        vector_store_path = self.index_versions.current_path()
+        if vector_store_path is None:
+            return False
+        try:
+            logger.info(f"Loading existing FAISS vector store from {vector_store_path}...")
+            store = self.vector_store_manager.fork().load_vector_store(str(vector_store_path))
+            self._swap_vector_store(store, self._load_retrieval_table(vector_store_path))
+        except Exception as e:
+            logger.warning(f"Failed to load vector store from {vector_store_path}: {e}")
+            return False
+        self._serving_stamp = stamp
+        self._set_serving_version(vector_store_path.name)
+        return True
+    
+    def rebuild_index(self, full_rebuild: bool = False) -> Optional[str]:
+        """Build a new index version and swap it in, returning the version name.
         
-        if questionnaire.allergies:
-            query_parts.append(f"allergies {questionnaire.allergies}")
+        The build runs on a forked vector store manager in a fresh version
+        directory (seeded from the live one, so only new or changed PDFs
+        are embedded), while the current store keeps serving. Only once
+        the new store has loaded is the version pointer switched and the
+        store replaced; a failed build leaves the live index untouched.
+        Other worker processes pick the new version up on their next
+        request. Pinecone indexes are updated in place and return None.
+        """
+        if settings.VECTOR_DB_TYPE == "pinecone":
+            self.initialize_vector_store(force_rebuild=True, full_rebuild=full_rebuild)
+            return None
         
-        if questionnaire.prefers_natural:
-            query_parts.append("natural skincare")
+        with self._rebuild_lock, self.index_versions.build_lock():
+            return self._build_index_version(full_rebuild)
+    
+    def _build_index_version(self, full_rebuild: bool) -> str:
+        build = build_index_version(
+            self.index_versions, self.document_processor, self.vector_store_manager, settings, full_rebuild=full_rebuild
+        )
+        self._swap_vector_store(build.store, build.table)
+        self._serving_stamp = self.index_versions.pointer_stamp()
+        self._set_serving_version(build.name)
+        return build.name
+    
+    def rollback_index(self) -> str:
+        """Serve the previous index version again, returning its name."""
+        if settings.VECTOR_DB_TYPE == "pinecone":
+            raise ValueError("Index versions are only kept for FAISS")
+        with self._rebuild_lock, self.index_versions.build_lock():
+            previous = self.index_versions.previous
+            if previous is None:
+                raise ValueError("No previous index version to roll back to")
+            previous_path = self.index_versions.path(previous)
+            store = self.vector_store_manager.fork().load_vector_store(str(previous_path))
+            self.index_versions.rollback()
+            self._swap_vector_store(store, self._load_retrieval_table(previous_path))
+            self._serving_stamp = self.index_versions.pointer_stamp()
+            self._set_serving_version(previous)
+            return previous
+    
+    def refresh_vector_store(self) -> None:
+        """Switch to the live index version if another process activated a new one."""
+        if settings.VECTOR_DB_TYPE == "pinecone" or time.monotonic() < self._next_refresh:
+            return
+        self._next_refresh = time.monotonic() + self.index_refresh_seconds
+        if self.index_versions.pointer_stamp() == self._serving_stamp:
+            return
+        # Skip while this process is building or rolling back; it swaps the store itself
+        if self._rebuild_lock.acquire(blocking=False):
+            try:
+                self._load_current_version()
+            finally:
+                self._rebuild_lock.release()
+    
+    def _swap_vector_store(self, store, table: Optional[RetrievalTable] = None) -> None:
+        # A single attribute assignment: each search call runs wholly against the old or the new store,
+        # and a precomputed table is only ever read together with the store its positions index
+        previous = self.vector_store
+        self.vector_store_manager.vector_store = store
+        self.vector_store = store
+        self._precomputed = (store, table) if table is not None else None
+        if isinstance(previous, CompactVectorStore) and previous is not store:
+            # Closed once the searches still holding it finish
+            previous.close()
+    
+    def _load_retrieval_table(self, path: Path) -> Optional[RetrievalTable]:
+        if self.retrieval_table_max_concerns <= 0:
+            return None
+        fingerprint = table_fingerprint(self.vector_store_manager, getattr(settings, "RETRIEVAL_K", 5), self.use_tag_filter)
+        table = RetrievalTable.load(str(path), fingerprint)
+        if table is not None:
+            logger.info(f"Serving {len(table)} profiles from the precomputed retrieval table")
+        return table
+    
+    def _set_serving_version(self, version: str) -> None:
+        self.serving_version = version
+        if self.recommendation_cache is not None:
+            self.recommendation_cache.retain(version)
+    
+    def _cached_recommendations(self, questionnaire: UserQuestionnaire) -> Tuple[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """The request key ``(index version, canonical questionnaire key)``, and what the cache holds for it.
         
-        return " ".join(query_parts)
+        Equivalent questionnaires have the same key; it is both the cache
+        slot and the key concurrent requests are coalesced on.
+        """
+        self.refresh_vector_store()
+        slot = (
+            self.serving_version or "",
+            questionnaire_key(questionnaire, self.CACHE_KEY_FIELDS, self._cache_namespace)
+        )
+        if self.recommendation_cache is None:
+            return slot, None
+        recommendations = self.recommendation_cache.get(*slot)
+        # describe() counts entries, which walks the cache directory of a disk cache
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self.recommendation_cache.describe())
+        return slot, recommendations
+    
+    def _cache_recommendations(self, slot: Tuple[str, str], recommendations: Dict[str, Any]) -> None:
+        if self.recommendation_cache is not None:
+            self.recommendation_cache.put(*slot, recommendations)
+    
+    def _format_user_query(self, questionnaire: UserQuestionnaire) -> str:
+        """Format user questionnaire into a search query."""
+        return format_user_query(questionnaire)
+    
+    def _tag_filters(self, questionnaire: UserQuestionnaire) -> Tuple[Optional[TagFilter], Optional[TagFilter]]:
+        """Strict (the questionnaire's concerns) and relaxed (unfiltered) filters."""
+        if not self.use_tag_filter:
+            return None, None
+        return tag_filters(questionnaire)
+    
+    def _avoided_ingredients(self, questionnaire: UserQuestionnaire) -> List[str]:
+        if not self.use_tag_filter:
+            return []
+        return avoided_ingredients(questionnaire)
+    
+    def _search(self, query: str, k: int, tag_filter: Optional[TagFilter]) -> List[Document]:
+        if self.retrieval_batcher is not None:
+            return self.retrieval_batcher((query, k, tag_filter))
+        return self.vector_store_manager.similarity_search(query, k=k, filter=tag_filter)
     
     def _retrieve_relevant_context(self, questionnaire: UserQuestionnaire, k: int = 5) -> List[Document]:
         """Retrieve relevant documents from vector store."""
         if self.vector_store is None:
             raise ValueError("Vector store not initialized")
+        self.refresh_vector_store()
+        
+        precomputed = self._precomputed
+        if precomputed is not None:
+            store, table = precomputed
+            positions = table.lookup(questionnaire, k)
+            # A profile without free text: no embedding, no search. A store closed since
+            # it was read has been replaced; fall through to search the new one
+            if positions is not None and store.acquire():
+                try:
+                    return [store.chunks.get(position) for position in positions]
+                finally:
+                    store.release()
         
         query = self._format_user_query(questionnaire)
-        logger.info(f"Searching for: {query}")
+        strict, relaxed = self._tag_filters(questionnaire)
+        avoid = self._avoided_ingredients(questionnaire)
+        logger.info(f"Searching for: {query}" + (f" (filter {strict})" if strict else ""))
         
-        # Get relevant documents
-        relevant_docs = self.vector_store_manager.similarity_search(query, k=k)
+        # Get relevant documents; with ingredients to avoid, fetch extra candidates to rank
+        # the chunks recommending them below
+        fetch_k = 2 * k if avoid else k
+        relevant_docs = self._search(query, fetch_k, strict)
+        if len(relevant_docs) < k and strict != relaxed:
+            # Too few chunks tagged with the concerns; top up without the concern filter
+            top_up(relevant_docs, self._search(query, fetch_k, relaxed), fetch_k)
+        if avoid:
+            relevant_docs = down_rank(relevant_docs, avoid)[:k]
+        if self.vector_store_manager.query_cache is not None and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self.vector_store_manager.query_cache.describe())
         
         return relevant_docs
     
+    def _search_batch(self, requests: List[Tuple[str, int, Optional[TagFilter]]]) -> List[List[Document]]:
+        """Run a micro-batch of ``(query, k, filter)`` retrievals, one batched search per distinct k."""
+        results: List[Optional[List[Document]]] = [None] * len(requests)
+        for k in {k for _, k, _ in requests}:
+            positions = [i for i, (_, request_k, _) in enumerate(requests) if request_k == k]
+            batch = self.vector_store_manager.similarity_search_batch(
+                [requests[i][0] for i in positions], k=k, filters=[requests[i][2] for i in positions]
+            )
+            for i, hits in zip(positions, batch):
+                results[i] = [doc for doc, _ in hits]
+        return results
+    
+    def _no_information_response(self) -> Dict[str, Any]:
+        return {
+            "morning_routine": ["No reliable information found in documents"],
+            "evening_routine": ["No reliable information found in documents"],
+            "lifestyle_tips": ["No reliable information found in documents"],
+            "remedies": ["No reliable information found in documents"],
+            "sources": [],
+            "warnings": ["Insufficient information available - consult a dermatologist"]
+        }
+    
+    def _error_response(self) -> Dict[str, Any]:
+        return {
+            "morning_routine": ["Error generating recommendations"],
+            "evening_routine": ["Error generating recommendations"],
+            "lifestyle_tips": ["Error generating recommendations"],
+            "remedies": ["Error generating recommendations"],
+            "sources": [],
+            "warnings": ["System error - consult a dermatologist"]
+        }
+    
+    def _format_prompt(self, questionnaire: UserQuestionnaire, relevant_docs: List[Document]) -> Tuple[Any, List[str]]:
+        """The LLM prompt for a questionnaire and its retrieved chunks, with their sources."""
+        # Prepare context
+        context = "\n\n".join([doc.page_content for doc in relevant_docs])
+        sources = list(set([doc.metadata.get("source", "Unknown") for doc in relevant_docs]))
+        
+        # Format prompt
+        formatted_prompt = self.prompt_template.format(
+            context=context,
+            skin_type=questionnaire.skin_type.value,
+            concerns=", ".join(canonical_concerns(questionnaire)),
+            allergies=questionnaire.allergies or "None specified",
+            prefers_natural=questionnaire.prefers_natural,
+            budget_range=questionnaire.budget_range or "Not specified",
+            sun_exposure=questionnaire.sun_exposure or "Not specified",
+            stress_level=questionnaire.stress_level or "Not specified",
+            sleep_quality=questionnaire.sleep_quality or "Not specified",
+            current_routine=questionnaire.current_routine or "None specified",
+            additional_notes=questionnaire.additional_notes or "None"
+        )
+        return formatted_prompt, sources
+    
+    def _parse_response(self, response_text: str, sources: List[str]) -> Optional[Dict[str, Any]]:
+        """Parse the JSON recommendations out of an LLM response; None if it holds none."""
+        import re
+        try:
+            response_text = response_text.strip()
+            logger.info(f"Raw LLM response length: {len(response_text)} chars")
+            
+            # Try to extract JSON from the response
+            # Look for JSON object pattern
+            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+            if json_match:
+                json_text = json_match.group(0)
+                logger.info(f"Extracted JSON: {json_text[:200]}...")
+            else:
+                # Fallback: try to clean the response
+                json_text = response_text
+                if "```json" in json_text:
+                    json_text = json_text.split("```json")[1].split("```")[0].strip()
+                elif "```" in json_text:
+                    json_text = json_text.split("```")[1].split("```")[0].strip()
+            
+            recommendations = json.loads(json_text)
+            recommendations["sources"] = sources
+            return recommendations
+            
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.error(f"Failed to parse LLM response as JSON: {e}")
+            logger.error(f"Raw response (first 1000 chars): {response_text[:1000]}")
+            return None
+    
+    def _parse_error_response(self, sources: List[str]) -> Dict[str, Any]:
+        return {
+            "morning_routine": ["Error processing recommendations"],
+            "evening_routine": ["Error processing recommendations"],
+            "lifestyle_tips": ["Error processing recommendations"],
+            "remedies": ["Error processing recommendations"],
+            "sources": sources,
+            "warnings": ["Error in recommendation generation - consult a dermatologist"]
+        }
+    
     def generate_recommendations(self, questionnaire: UserQuestionnaire) -> Dict[str, Any]:
         """Generate skincare recommendations using RAG pipeline."""
         try:
-            # Retrieve relevant context
-            relevant_docs = self._retrieve_relevant_context(questionnaire)
+            request_key, cached = self._cached_recommendations(questionnaire)
+            if cached is not None:
+                return cached
+            if self.request_flights is None:
+                return self._generate_uncached(questionnaire, request_key)
+            return self.request_flights.run(request_key, lambda: self._generate_uncached(questionnaire, request_key))
+        
+        except Exception as e:
+            logger.error(f"Error generating recommendations: {str(e)}")
+            return self._error_response()
+    
+    def _generate_uncached(self, questionnaire: UserQuestionnaire, request_key: Tuple[str, str]) -> Dict[str, Any]:
+        # Retrieve relevant context
+        relevant_docs = self._retrieve_relevant_context(questionnaire, k=getattr(settings, "RETRIEVAL_K", 5))
+        
+        if not relevant_docs:
+            return self._no_information_response()
+        
+        formatted_prompt, sources = self._format_prompt(questionnaire, relevant_docs)
+        
+        # Generate response
+        response = self.llm.invoke(formatted_prompt)
+        recommendations = self._parse_response(response.content, sources)
+        if recommendations is None:
+            return self._parse_error_response(sources)
+        self._cache_recommendations(request_key, recommendations)
+        return recommendations
+    
+    async def agenerate_recommendations(self, questionnaire: UserQuestionnaire) -> Dict[str, Any]:
+        """Async ``generate_recommendations`` that never blocks the event loop.
+        
+        Retrieval (embedding and search) runs on ``retrieval_executor``;
+        the LLM call is awaited through ``ainvoke``, so a request waiting
+        on the model holds no thread. Requests beyond
+        ``llm_max_concurrency`` queue for an LLM slot, and requests for an
+        equivalent questionnaire already in flight wait for its result.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            request_key, cached = await loop.run_in_executor(
+                self.retrieval_executor, self._cached_recommendations, questionnaire
+            )
+            if cached is not None:
+                return cached
+            if self.async_request_flights is None:
+                return await self._agenerate_uncached(questionnaire, request_key)
+            return await self.async_request_flights.run(
+                request_key, lambda: self._agenerate_uncached(questionnaire, request_key)
+            )
+        
+        except Exception as e:
+            logger.error(f"Error generating recommendations: {str(e)}")
+            return self._error_response()
+    
+    async def _agenerate_uncached(self, questionnaire: UserQuestionnaire, request_key: Tuple[str, str]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        relevant_docs = await loop.run_in_executor(
+            self.retrieval_executor,
+            self._retrieve_relevant_context,
+            questionnaire,
+            getattr(settings, "RETRIEVAL_K", 5)
+        )
+        
+        if not relevant_docs:
+            return self._no_information_response()
+        
+        formatted_prompt, sources = self._format_prompt(questionnaire, relevant_docs)
+        
+        async with self._llm_limit():
+            response = await self.llm.ainvoke(formatted_prompt)
+        recommendations = self._parse_response(response.content, sources)
+        if recommendations is None:
+            return self._parse_error_response(sources)
+        if self.recommendation_cache is not None:
+            await loop.run_in_executor(
+                self.retrieval_executor, self._cache_recommendations, request_key, recommendations
+            )
+        return recommendations
+    
+    async def astream_recommendations(self, questionnaire: UserQuestionnaire) -> AsyncIterator[Tuple[str, Any]]:
+        """Generate recommendations as a stream of ``(event, data)`` pairs.
+        
+        ``sources`` comes once retrieval is done, then a ``token`` for each
+        chunk of LLM output and an ``item`` (``{"field", "index", "value"}``)
+        as soon as each routine step, tip or warning in the JSON is
+        complete. ``done`` carries the recommendations parsed from the
+        full response, exactly as ``generate_recommendations`` returns
+        them; on failure it carries the usual error response. Cached
+        recommendations are replayed as ``sources`` and ``item`` events.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            request_key, cached = await loop.run_in_executor(
+                self.retrieval_executor, self._cached_recommendations, questionnaire
+            )
+            if cached is not None:
+                yield "sources", cached.get("sources", [])
+                for field, value in cached.items():
+                    if field != "sources" and isinstance(value, list):
+                        for index, item in enumerate(value):
+                            yield "item", {"field": field, "index": index, "value": item}
+                yield "done", cached
+                return
             
-            if not relevant_docs:
-                return {
-                    "morning_routine": ["No reliable information found in documents"],
-                    "evening_routine": ["No reliable information found in documents"],
-                    "lifestyle_tips": ["No reliable information found in documents"],
-                    "remedies": ["No reliable information found in documents"],
-                    "sources": [],
-                    "warnings": ["Insufficient information available - consult a dermatologist"]
-                }
+            relevant_docs = await loop.run_in_executor(
+                self.retrieval_executor,
+                self._retrieve_relevant_context,
+                questionnaire,
+                getattr(settings, "RETRIEVAL_K", 5)
+            )
             
-            # Prepare context
-            context = "\n\n".join([doc.page_content for doc in relevant_docs])
-            sources = list(set([doc.metadata.get("source", "Unknown") for doc in relevant_docs]))
+            if not relevant_docs:
+                yield "done", self._no_information_response()
+                return
             
-            # Format prompt
-            formatted_prompt = self.prompt_template.format(
-                context=context,
-                skin_type=questionnaire.skin_type.value,
-                concerns=", ".join([c.value for c in questionnaire.concerns]),
-                allergies=questionnaire.allergies or "None specified",
-                prefers_natural=questionnaire.prefers_natural,
-                budget_range=questionnaire.budget_range or "Not specified",
-                sun_exposure=questionnaire.sun_exposure or "Not specified",
-                stress_level=questionnaire.stress_level or "Not specified",
-                sleep_quality=questionnaire.sleep_quality or "Not specified",
-                current_routine=questionnaire.current_routine or "None specified",
-                additional_notes=questionnaire.additional_notes or "None"
-            )
+            formatted_prompt, sources = self._format_prompt(questionnaire, relevant_docs)
+            yield "sources", sources
             
-            # Generate response
-            response = self.llm.invoke(formatted_prompt)
+            parser = IncrementalJSONParser()
+            response_parts = []
+            async with self._llm_limit():
+                async for chunk in self.llm.astream(formatted_prompt):
+                    text = chunk.content
+                    if not text:
+                        continue
+                    response_parts.append(text)
+                    yield "token", text
+                    for item in parser.feed(text):
+                        yield "item", {"field": item.field, "index": item.index, "value": item.value}
             
-            # Parse JSON response
-            import json
-            import re
-            try:
-                response_text = response.content.strip()
-                logger.info(f"Raw LLM response length: {len(response_text)} chars")
-                
-                # Try to extract JSON from the response
-                # Look for JSON object pattern
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    json_text = json_match.group(0)
-                    logger.info(f"Extracted JSON: {json_text[:200]}...")
-                else:
-                    # Fallback: try to clean the response
-                    json_text = response_text
-                    if "```json" in json_text:
-                        json_text = json_text.split("```json")[1].split("```")[0].strip()
-                    elif "```" in json_text:
-                        json_text = json_text.split("```")[1].split("```")[0].strip()
-                
-                recommendations = json.loads(json_text)
-                recommendations["sources"] = sources
-                return recommendations
-                
-            except (json.JSONDecodeError, AttributeError) as e:
-                logger.error(f"Failed to parse LLM response as JSON: {e}")
-                logger.error(f"Raw response (first 1000 chars): {response.content[:1000]}")
-                return {
-                    "morning_routine": ["Error processing recommendations"],
-                    "evening_routine": ["Error processing recommendations"],
-                    "lifestyle_tips": ["Error processing recommendations"],
-                    "remedies": ["Error processing recommendations"],
-                    "sources": sources,
-                    "warnings": ["Error in recommendation generation - consult a dermatologist"]
-                }
+            recommendations = self._parse_response("".join(response_parts), sources)
+            if recommendations is None:
+                recommendations = self._parse_error_response(sources)
+            elif self.recommendation_cache is not None:
+                await loop.run_in_executor(
+                    self.retrieval_executor, self._cache_recommendations, request_key, recommendations
+                )
         
         except Exception as e:
-            logger.error(f"Error generating recommendations: {str(e)}")
-            return {
-                "morning_routine": ["Error generating recommendations"],
-                "evening_routine": ["Error generating recommendations"],
-                "lifestyle_tips": ["Error generating recommendations"],
-                "remedies": ["Error generating recommendations"],
-                "sources": [],
-                "warnings": ["System error - consult a dermatologist"]
-            }
\ No newline at end of file
+            logger.error(f"Error streaming recommendations: {str(e)}")
+            recommendations = self._error_response()
+        yield "done", recommendations
+    
+    def _llm_limit(self) -> asyncio.Semaphore:
+        # Created on first use; an asyncio.Semaphore binds to the loop it is first used on
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(max(1, self.llm_max_concurrency))
+        return self._llm_semaphore
+    
+    def close(self) -> None:
+        """Stop the retrieval threads."""
+        self.retrieval_executor.shutdown(wait=False, cancel_futures=True)
+        if self.retrieval_batcher is not None:
+            self.retrieval_batcher.close()
@@ -0,0 +1,119 @@
+"""Background index rebuild jobs for the admin endpoints."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RebuildJob:
+    """State of one index rebuild."""
+    job_id: str
+    full_rebuild: bool
+    status: str = "queued"  # queued, running, succeeded or failed
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    version: Optional[str] = None
+    error: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class RebuildJobRunner:
+    """Runs rebuilds one at a time on a background thread.
+
+    ``rebuild(full_rebuild)`` does the work and returns the name of the
+    version it activated (or None). Submitting while a rebuild is queued or
+    running returns that job instead of starting another. The last
+    ``history`` jobs are kept for status queries.
+    
+    With ``state_dir`` set, every job's state is also written there as
+    JSON, so any uvicorn worker can answer a status query for a job
+    started by another.
+    """
+    
+    def __init__(self, rebuild: Callable[[bool], Optional[str]], history: int = 20,
+                 state_dir: Optional[str] = None):
+        self.rebuild = rebuild
+        self.history = history
+        self.state_dir = Path(state_dir) if state_dir else None
+        if self.state_dir is not None:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._jobs: "OrderedDict[str, RebuildJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-rebuild")
+    
+    def submit(self, full_rebuild: bool = False) -> RebuildJob:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active:
+                    return job
+            job = RebuildJob(job_id=uuid.uuid4().hex[:12], full_rebuild=full_rebuild, created_at=time.time())
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.history:
+                _, evicted = self._jobs.popitem(last=False)
+                if self.state_dir is not None:
+                    (self.state_dir / f"{evicted.job_id}.json").unlink(missing_ok=True)
+        self._save(job)
+        self._executor.submit(self._run, job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[RebuildJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.state_dir is not None and job_id.isalnum():
+            # Started by another worker process
+            try:
+                with open(self.state_dir / f"{job_id}.json") as f:
+                    job = RebuildJob(**json.load(f))
+            except FileNotFoundError:
+                return None
+        return job
+    
+    def _save(self, job: RebuildJob) -> None:
+        if self.state_dir is None:
+            return
+        tmp_path = self.state_dir / f"{job.job_id}.json.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, self.state_dir / f"{job.job_id}.json")
+    
+    def latest(self) -> Optional[RebuildJob]:
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+    
+    def _run(self, job: RebuildJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+        logger.info(f"Index rebuild {job.job_id} started (full_rebuild={job.full_rebuild})")
+        try:
+            job.version = self.rebuild(job.full_rebuild)
+            job.status = "succeeded"
+            logger.info(f"Index rebuild {job.job_id} finished; serving version {job.version}")
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            logger.error(f"Index rebuild {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,233 @@
+"""Precomputed retrieval results for questionnaire profiles without free text."""
+
+import hashlib
+import json
+import os
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from langchain.schema import Document
+
+from utils.chunk_tags import TagFilter, ingredient_tags
+from utils.compact_store import OFFSETS_FILENAME, POSITION_KEY, CompactVectorStore
+from utils.recommendation_cache import normalize_text
+from backend.models import SkinConcern, SkinType, UserQuestionnaire
+
+logger = logging.getLogger(__name__)
+
+TABLE_FILENAME = "retrieval_table.json"
+# Bump when the query format, filters or top-up change, so older tables are ignored
+TABLE_VERSION = 2
+
+
+def canonical_concerns(questionnaire: UserQuestionnaire) -> List[str]:
+    """The questionnaire's concerns deduplicated and sorted, as the recommendation cache key has them."""
+    return sorted({c.value for c in questionnaire.concerns})
+
+
+def format_user_query(questionnaire: UserQuestionnaire) -> str:
+    """Format user questionnaire into a search query.
+    
+    Equivalent questionnaires (concerns in another order, allergies in
+    another case or spacing) give the same query, so live search agrees
+    with the retrieval table and the recommendation cache.
+    """
+    query_parts = [
+        f"skin type {questionnaire.skin_type.value}",
+        f"concerns {' '.join(canonical_concerns(questionnaire))}"
+    ]
+    
+    allergies = normalize_text(questionnaire.allergies or "")
+    if allergies:
+        query_parts.append(f"allergies {allergies}")
+    
+    if questionnaire.prefers_natural:
+        query_parts.append("natural skincare")
+    
+    return " ".join(query_parts)
+
+
+def tag_filters(questionnaire: UserQuestionnaire) -> Tuple[Optional[TagFilter], Optional[TagFilter]]:
+    """Strict (the questionnaire's concerns) and relaxed (unfiltered) filters."""
+    return TagFilter.create(concerns=[c.value for c in questionnaire.concerns]), None
+
+
+def avoided_ingredients(questionnaire: UserQuestionnaire) -> List[str]:
+    """Ingredient tags of the questionnaire's sensitive ingredients and allergies."""
+    avoid = set(ingredient_tags(questionnaire.sensitive_ingredients or []))
+    if questionnaire.allergies:
+        avoid.update(ingredient_tags([questionnaire.allergies]))
+    return sorted(avoid)
+
+
+def down_rank(documents: List[Document], avoid: List[str]) -> List[Document]:
+    """Move chunks recommending an avoided ingredient behind the rest, keeping relative order.
+    
+    Chunks that only mention it in a warning (its ``cautions`` tags) keep
+    their rank: they are often exactly what a sensitive user needs.
+    """
+    def recommends_avoided(doc: Document) -> bool:
+        cautions = doc.metadata.get("cautions", [])
+        return any(tag in doc.metadata.get("ingredients", []) and tag not in cautions for tag in avoid)
+    
+    return sorted(documents, key=recommends_avoided)
+
+
+def top_up(documents: List[Document], extra: List[Document], k: int) -> List[Document]:
+    """Append unseen ``extra`` chunks to ``documents`` until there are ``k``."""
+    seen = {(doc.metadata.get("source"), doc.metadata.get("chunk_id")) for doc in documents}
+    for doc in extra:
+        key = (doc.metadata.get("source"), doc.metadata.get("chunk_id"))
+        if key not in seen and len(documents) < k:
+            seen.add(key)
+            documents.append(doc)
+    return documents
+
+
+def profile_key(questionnaire: UserQuestionnaire, max_concerns: int) -> Optional[str]:
+    """Table key of a questionnaire; None if it has free text or more concerns than the table covers."""
+    if questionnaire.allergies or questionnaire.sensitive_ingredients:
+        return None
+    concerns = canonical_concerns(questionnaire)
+    if not concerns or len(concerns) > max_concerns:
+        return None
+    return f"{questionnaire.skin_type.value}|{'+'.join(concerns)}|{'natural' if questionnaire.prefers_natural else 'any'}"
+
+
+def enumerate_profiles(max_concerns: int) -> Iterator[UserQuestionnaire]:
+    """Every skin type with every combination of up to ``max_concerns`` concerns, with and without natural products."""
+    for skin_type in SkinType:
+        for size in range(1, max_concerns + 1):
+            for concerns in combinations(SkinConcern, size):
+                for prefers_natural in (False, True):
+                    yield UserQuestionnaire(skin_type=skin_type, concerns=list(concerns), prefers_natural=prefers_natural)
+
+
+def store_digest(path: str) -> str:
+    """Digest of a compact store's chunk layout; a table saved for other chunks is stale."""
+    with open(Path(path) / OFFSETS_FILENAME, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def table_fingerprint(vector_store_manager: Any, k: int, use_tag_filter: bool) -> Dict[str, Any]:
+    """Settings the precomputed results depend on; a table built under others is not used."""
+    return {
+        "table": TABLE_VERSION,
+        "k": k,
+        "tag_filter": use_tag_filter,
+        "embedding_model": vector_store_manager.embedding_model_id,
+        "retrieval_mode": vector_store_manager.retrieval_mode,
+        "hybrid_fetch_k": vector_store_manager.hybrid_fetch_k,
+        "rrf_k": vector_store_manager.rrf_k,
+        # Applied when the index loads, without a rebuild
+        "search": vector_store_manager.index_config.search_params()
+    }
+
+
+class RetrievalTable:
+    """Top-k chunk positions per enumerable profile, saved next to a compact store.
+
+    Profiles without free text reduce to a skin type, a set of concerns
+    and the natural-products flag, so with up to ``max_concerns`` concerns
+    there are only a few hundred of them. ``build`` runs each profile's
+    retrieval once, exactly as serving would, and ``lookup`` answers it
+    from the table without embedding or searching. Positions index the
+    store in the same version directory; the table records a digest of
+    that store's chunk layout and is ignored when it no longer matches,
+    e.g. when a build seeded a version directory with the previous table.
+    """
+    
+    def __init__(self, entries: Dict[str, List[int]], max_concerns: int, fingerprint: Dict[str, Any]):
+        self.entries = entries
+        self.max_concerns = max_concerns
+        self.fingerprint = fingerprint
+        self.hits = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def lookup(self, questionnaire: UserQuestionnaire, k: int) -> Optional[List[int]]:
+        """Precomputed chunk positions for a questionnaire, or None if it needs a live search."""
+        if k != self.fingerprint["k"]:
+            return None
+        key = profile_key(questionnaire, self.max_concerns)
+        positions = self.entries.get(key) if key is not None else None
+        if positions is not None:
+            self.hits += 1
+        return positions
+    
+    def save(self, path: str) -> None:
+        table_path = Path(path) / TABLE_FILENAME
+        tmp_path = table_path.with_name(f"{TABLE_FILENAME}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "fingerprint": self.fingerprint,
+                "store": store_digest(path),
+                "max_concerns": self.max_concerns,
+                "entries": self.entries
+            }, f)
+        os.replace(tmp_path, table_path)
+    
+    @classmethod
+    def load(cls, path: str, fingerprint: Dict[str, Any]) -> Optional["RetrievalTable"]:
+        """The table saved in ``path``, or None if there is none or it was built under other settings."""
+        table_path = Path(path) / TABLE_FILENAME
+        try:
+            with open(table_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable retrieval table {table_path}: {e}")
+            return None
+        if data.get("fingerprint") != fingerprint:
+            logger.info(f"Ignoring retrieval table {table_path} built with different retrieval settings")
+            return None
+        if data.get("store") != store_digest(path):
+            logger.info(f"Ignoring retrieval table {table_path} built for other chunks")
+            return None
+        return cls(data["entries"], data["max_concerns"], data["fingerprint"])
+    
+    @classmethod
+    def build(cls, vector_store_manager: Any, k: int, max_concerns: int, use_tag_filter: bool = True,
+              batch_size: int = 64) -> "RetrievalTable":
+        """Retrieve every profile through ``vector_store_manager``, which must serve a compact store."""
+        if not isinstance(vector_store_manager.vector_store, CompactVectorStore):
+            raise ValueError("A retrieval table can only be built for a compact FAISS store")
+        
+        start = time.perf_counter()
+        profiles = list(enumerate_profiles(max_concerns))
+        queries = [format_user_query(profile) for profile in profiles]
+        filters = [tag_filters(profile) if use_tag_filter else (None, None) for profile in profiles]
+        
+        results: List[List[Document]] = []
+        for offset in range(0, len(profiles), batch_size):
+            batch_queries = queries[offset:offset + batch_size]
+            batch_filters = filters[offset:offset + batch_size]
+            hits = vector_store_manager.similarity_search_batch(
+                batch_queries, k=k, filters=[strict for strict, _ in batch_filters]
+            )
+            batch = [[doc for doc, _ in row] for row in hits]
+            # Too few chunks tagged with the concerns; top up without the concern filter, as serving does
+            short = [i for i, docs in enumerate(batch) if len(docs) < k and batch_filters[i][0] != batch_filters[i][1]]
+            if short:
+                extra = vector_store_manager.similarity_search_batch(
+                    [batch_queries[i] for i in short], k=k, filters=[batch_filters[i][1] for i in short]
+                )
+                for i, row in zip(short, extra):
+                    top_up(batch[i], [doc for doc, _ in row], k)
+            results.extend(batch)
+        
+        entries = {
+            profile_key(profile, max_concerns): [doc.metadata[POSITION_KEY] for doc in docs]
+            for profile, docs in zip(profiles, results)
+        }
+        fingerprint = table_fingerprint(vector_store_manager, k, use_tag_filter)
+        logger.info(
+            f"Precomputed retrieval for {len(entries)} profiles (up to {max_concerns} concerns) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return cls(entries, max_concerns, fingerprint)
@@ -0,0 +1,53 @@
+"""Synthetic chunks, vectors and questionnaire queries shared by the benchmarks."""
+
+import random
+from itertools import combinations
+from typing import List
+
+import numpy as np
+
+SKIN_TYPES = ["oily", "dry", "sensitive", "combination", "normal"]
+CONCERNS = ["acne", "pigmentation", "wrinkles", "dullness", "dark_spots", "redness", "large_pores", "uneven_texture"]
+WORDS = [
+    "skin", "acne", "retinoid", "niacinamide", "sebum", "barrier", "erythema", "wrinkles",
+    "the", "of", "and", "to", "is", "in", "dermatology", "hyperpigmentation", "redness",
+    "moisturizer", "sunscreen", "comedones", "inflammatory", "keratinocytes", "pores"
+]
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def synthetic_chunks(count: int, min_words: int = 20, max_words: int = 140, seed: int = 0) -> List[str]:
+    """Chunks of varying length, like the tail ends of split documents."""
+    rng = random.Random(seed)
+    return [synthetic_text(rng, rng.randint(min_words, max_words)) for _ in range(count)]
+
+
+def synthetic_documents(count: int, sources: int = 20, seed: int = 0) -> list:
+    """``synthetic_chunks`` as Documents, spread over ``sources`` PDFs."""
+    from langchain.schema import Document
+    
+    return [
+        Document(page_content=text, metadata={"source": f"doc{i % sources}.pdf", "chunk_id": i})
+        for i, text in enumerate(synthetic_chunks(count, seed=seed))
+    ]
+
+
+def profile_queries() -> List[str]:
+    """Queries in the shape the pipeline builds from questionnaires."""
+    return [
+        f"skin type {skin_type} concerns {' '.join(concerns)}"
+        for skin_type in SKIN_TYPES
+        for size in (1, 2)
+        for concerns in combinations(CONCERNS, size)
+    ]
+
+
+def synthetic_vectors(count: int, dimension: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Unit vectors scattered around random centres, roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Compare FAISS index types on recall@k against exact search and query latency.
+
+Uses the vectors of a built index (``--index-path``) or synthetic clustered
+vectors. Queries are perturbed copies of held-out vectors, searched one at
+a time as on the serving path.
+
+    python benchmarks/bench_ann_index.py [--index-path vector_store] [--count 100000]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import faiss
+import numpy as np
+
+from utils.ann_index import IndexConfig, build_index, apply_search_params
+from benchmarks._common import synthetic_vectors
+
+NPROBE_VALUES = [1, 4, 16, 64]
+EF_SEARCH_VALUES = [16, 32, 64, 128]
+
+
+def load_index_vectors(index_path: str) -> np.ndarray:
+    index = faiss.read_index(str(Path(index_path) / "index.faiss"))
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int):
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return recall, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-path", help="Saved FAISS vector store to take vectors from")
+    parser.add_argument("--count", type=int, default=100000, help="Number of synthetic vectors")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    args = parser.parse_args()
+    
+    faiss.omp_set_num_threads(1)
+    
+    if args.index_path:
+        vectors = load_index_vectors(args.index_path)
+    else:
+        vectors = synthetic_vectors(args.count + args.queries, args.dimension)
+    
+    rng = np.random.default_rng(1)
+    order = rng.permutation(len(vectors))
+    queries = vectors[order[:args.queries]]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    corpus = np.ascontiguousarray(vectors[order[args.queries:]])
+    
+    exact = build_index(corpus, IndexConfig("flat"))
+    _, truth = exact.search(queries, args.k)
+    
+    print(f"{len(corpus)} vectors, {len(queries)} queries, d={corpus.shape[1]}, k={args.k}")
+    print(f"{'index':<12} {'param':<14} {'build s':>8} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p99 ms':>8}")
+    
+    recall, p50, p99 = measure(exact, queries, truth, args.k)
+    print(f"{'flat':<12} {'-':<14} {0.0:>8.1f} {recall:>10.3f} {p50:>8.3f} {p99:>8.3f}")
+    
+    for index_type in ("ivf-flat", "ivf-pq", "hnsw"):
+        config = IndexConfig(index_type, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m)
+        start = time.perf_counter()
+        index = build_index(corpus, config)
+        build_seconds = time.perf_counter() - start
+        
+        if index_type == "hnsw":
+            sweep = [("ef_search", value) for value in EF_SEARCH_VALUES]
+        else:
+            sweep = [("nprobe", value) for value in NPROBE_VALUES]
+        
+        for name, value in sweep:
+            setattr(config, name, value)
+            apply_search_params(index, config)
+            recall, p50, p99 = measure(index, queries, truth, args.k)
+            print(f"{index_type:<12} {f'{name}={value}':<14} {build_seconds:>8.1f} {recall:>10.3f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Load test of /recommendations at increasing numbers of concurrent clients.
+
+Each client posts random questionnaires back to back for a fixed time
+against a running server (``python run_backend.py``), while a probe
+thread times ``GET /health`` throughout. Reports throughput and p50/p99
+latency of recommendations per client count, and the p50/p99 health
+latency: it stays flat only while the event loop is never blocked.
+
+Every request makes a real LLM call; point ``OPENAI_BASE_URL`` at a
+cheap model or an OpenAI-compatible mock server for large runs.
+
+    python benchmarks/bench_api_load.py [--url http://127.0.0.1:8000] [--clients 1,4,16,64] [--seconds 30]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from backend.models import SkinConcern, SkinType
+
+
+def random_questionnaire(rng: random.Random) -> dict:
+    return {
+        "skin_type": rng.choice(list(SkinType)).value,
+        "concerns": [c.value for c in rng.sample(list(SkinConcern), rng.randint(1, 3))],
+        "prefers_natural": rng.random() < 0.5,
+        "stress_level": rng.choice(["low", "medium", "high"])
+    }
+
+
+def post_recommendation(url: str, questionnaire: dict, timeout: float) -> bool:
+    request = urllib.request.Request(
+        f"{url}/recommendations",
+        data=json.dumps({"questionnaire": questionnaire}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def run_load(url: str, clients: int, seconds: float, timeout: float):
+    latencies = []
+    health = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+    
+    def client(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        local = []
+        failed = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            if post_recommendation(url, random_questionnaire(rng), timeout):
+                local.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors += failed
+    
+    def probe():
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            with urllib.request.urlopen(f"{url}/health", timeout=timeout) as response:
+                response.read()
+            health.append(time.perf_counter() - start)
+            time.sleep(0.05)
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    threads.append(threading.Thread(target=probe))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (float("nan"),) * 2
+    health_p50, health_p99 = np.percentile(health, [50, 99]) * 1000
+    return len(latencies) / elapsed, p50, p99, health_p50, health_p99, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", default="1,4,16,64")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+    
+    print(f"{'clients':>7} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'health p50':>11} {'health p99':>11} {'errors':>7}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        throughput, p50, p99, health_p50, health_p99, errors = run_load(url, clients, args.seconds, args.timeout)
+        print(f"{clients:>7} {throughput:>7.2f} {p50:>8.0f} {p99:>8.0f} {health_p50:>11.1f} {health_p99:>11.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Compare one-at-a-time retrieval with ``similarity_search_batch``.
+
+Builds an in-memory FAISS store over synthetic chunks and searches the
+questionnaire-style queries both ways, with the query cache disabled so
+every query is embedded.
+
+    python benchmarks/bench_batch_search.py [--backend sentence-transformers] [--batch-size 32]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.vector_store import VectorStoreManager
+from benchmarks._common import synthetic_documents, profile_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="sentence-transformers")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--count", type=int, default=5000, help="Number of synthetic chunks")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    documents = synthetic_documents(args.count)
+    queries = profile_queries()
+    
+    manager = VectorStoreManager(embedding_model=args.model, embedding_backend=args.backend, query_cache_size=0)
+    manager.create_vector_store(documents)
+    manager.similarity_search_batch(queries[:args.batch_size], k=args.k)
+    
+    start = time.perf_counter()
+    single = [manager.similarity_search_with_score(query, k=args.k) for query in queries]
+    single_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(queries), args.batch_size):
+        batched.extend(manager.similarity_search_batch(queries[i:i + args.batch_size], k=args.k))
+    batch_seconds = time.perf_counter() - start
+    
+    same = sum(
+        [doc.metadata["chunk_id"] for doc, _ in a] == [doc.metadata["chunk_id"] for doc, _ in b]
+        for a, b in zip(single, batched)
+    )
+    print(f"{len(queries)} queries over {args.count} chunks, k={args.k}, backend {args.backend}")
+    print(f"{'one at a time':<24} {len(queries) / single_seconds:>10.1f} queries/s")
+    print(f"{f'batches of {args.batch_size}':<24} {len(queries) / batch_seconds:>10.1f} queries/s")
+    print(f"identical top-{args.k}: {same}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
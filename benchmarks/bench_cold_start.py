@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Compare vector store open time and memory: pickled LangChain FAISS vs the compact mmap store.
+
+Builds stores of increasing size from random vectors and synthetic chunks
+(no embedding model needed), then times opening each in a fresh process and
+answering one query, and reports the resident memory that added.
+
+    python benchmarks/bench_cold_start.py [--sizes 10000,50000,200000]
+"""
+
+import sys
+import json
+import random
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from benchmarks._common import synthetic_text
+
+# Run in a child process so each measurement starts cold
+OPEN_SCRIPT = """
+import sys, time, json, resource
+sys.path.insert(0, {root!r})
+import numpy as np
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {kind!r} == "compact":
+    from utils.compact_store import CompactVectorStore
+    store = CompactVectorStore.load({path!r})
+else:
+    from langchain_community.vectorstores import FAISS
+    from utils.embedding_backends import HashingEmbeddings
+    store = FAISS.load_local({path!r}, HashingEmbeddings({dimension}), allow_dangerous_deserialization=True)
+opened = time.perf_counter()
+store.similarity_search_with_score_by_vector(np.ones({dimension}, dtype=np.float32).tolist(), k=5)
+searched = time.perf_counter()
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"open": opened - start, "first_search": searched - opened, "rss_mb": (rss_after - rss_before) / 1024}}))
+"""
+
+
+def build_stores(directory: Path, count: int, dimension: int):
+    import faiss
+    from langchain.schema import Document
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    
+    from utils.ann_index import to_mmappable
+    from utils.compact_store import CompactVectorStore
+    from utils.embedding_backends import HashingEmbeddings
+    
+    rng = random.Random(0)
+    vectors = np.random.default_rng(0).standard_normal((count, dimension)).astype(np.float32)
+    index = faiss.IndexFlatL2(dimension)
+    index.add(vectors)
+    
+    ids = [f"doc{i % 50}.pdf#{i}" for i in range(count)]
+    documents = {
+        doc_id: Document(
+            page_content=synthetic_text(rng, 120),
+            metadata={"source": doc_id.split("#")[0], "chunk_id": i}
+        )
+        for i, doc_id in enumerate(ids)
+    }
+    
+    legacy = FAISS(HashingEmbeddings(dimension), index, InMemoryDocstore(documents), dict(enumerate(ids)))
+    legacy.save_local(str(directory / "legacy"))
+    CompactVectorStore.save(str(directory / "compact"), to_mmappable(index), ((i, documents[i]) for i in ids))
+
+
+def open_store(kind: str, path: Path, dimension: int) -> dict:
+    script = OPEN_SCRIPT.format(root=str(Path(__file__).parent.parent), kind=kind, path=str(path), dimension=dimension)
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,50000,200000")
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+    
+    print(f"{'chunks':>8} {'store':<8} {'open s':>8} {'1st search s':>13} {'RSS +MB':>9}")
+    for count in (int(size) for size in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            build_stores(Path(tmp), count, args.dimension)
+            for kind in ("legacy", "compact"):
+                stats = open_store(kind, Path(tmp) / kind, args.dimension)
+                print(f"{count:>8} {kind:<8} {stats['open']:>8.3f} {stats['first_search']:>13.4f} {stats['rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare compressed vector storage on memory per vector, recall@k and latency.
+
+For each compression the index is searched as-is and with exact re-ranking
+of ``k * rerank_factor`` candidates from the full vectors, as the served
+store does. Recall is against exact float32 search.
+
+    python benchmarks/bench_compression.py [--index-path vector_store] [--index-type flat]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import faiss
+import numpy as np
+
+from utils.ann_index import IndexConfig, build_index, code_bytes_per_vector, rerank_exact
+from utils.compact_store import INDEX_FILENAME, VECTORS_FILENAME
+from benchmarks._common import synthetic_vectors
+
+RERANK_FACTORS = [1, 2, 4, 8]
+
+
+def load_store_vectors(index_path: str) -> np.ndarray:
+    """Full vectors of a saved store: ``vectors.npy`` if compressed, else the index itself."""
+    vectors_path = Path(index_path) / VECTORS_FILENAME
+    if vectors_path.exists():
+        return np.load(vectors_path)
+    index = faiss.read_index(str(Path(index_path) / INDEX_FILENAME))
+    if not isinstance(faiss.downcast_index(index), faiss.IndexHNSW):
+        # Saved flat and IVF indexes are IVF, which need a direct map to reconstruct
+        faiss.extract_index_ivf(index).make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def measure(index, corpus, queries, truth, k, rerank_factor):
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        if rerank_factor:
+            _, candidates = index.search(query[None, :], k * rerank_factor)
+            _, ids = rerank_exact(query, candidates[0], corpus, k)
+        else:
+            _, ids = index.search(query[None, :], k)
+            ids = ids[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids)
+    
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return recall, np.percentile(latencies, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-path", help="Saved vector store to take vectors from")
+    parser.add_argument("--index-type", default="flat", choices=["flat", "ivf-flat", "hnsw"])
+    parser.add_argument("--count", type=int, default=100000, help="Number of synthetic vectors")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pq-m", type=int, default=48)
+    args = parser.parse_args()
+    
+    faiss.omp_set_num_threads(1)
+    
+    if args.index_path:
+        vectors = load_store_vectors(args.index_path)
+    else:
+        vectors = synthetic_vectors(args.count + args.queries, args.dimension)
+    
+    rng = np.random.default_rng(1)
+    order = rng.permutation(len(vectors))
+    queries = vectors[order[:args.queries]]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    corpus = np.ascontiguousarray(vectors[order[args.queries:]])
+    
+    _, truth = build_index(corpus, IndexConfig("flat")).search(queries, args.k)
+    
+    print(f"{len(corpus)} vectors, {len(queries)} queries, d={corpus.shape[1]}, k={args.k}, {args.index_type} index")
+    print(f"{'compression':<12} {'bytes/vec':>10} {'RAM MB':>8} {'rerank':>7} {'recall@' + str(args.k):>10} {'p50 ms':>8}")
+    
+    for compression in ("none", "fp16", "sq8", "pq"):
+        config = IndexConfig(args.index_type, compression=compression, pq_m=args.pq_m)
+        index = build_index(corpus, config)
+        bytes_per_vector = code_bytes_per_vector(index)
+        ram_mb = faiss.serialize_index(index).nbytes / 2 ** 20
+        
+        factors = [0] if compression == "none" else [0] + RERANK_FACTORS
+        for factor in factors:
+            recall, p50 = measure(index, corpus, queries, truth, args.k, factor)
+            rerank = f"x{factor}" if factor else "-"
+            print(f"{compression:<12} {bytes_per_vector:>10} {ram_mb:>8.1f} {rerank:>7} {recall:>10.3f} {p50:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare embedding backends on query latency and retrieval recall.
+
+The first backend is the reference: recall@k is the overlap between each
+backend's exact top-k chunks and the reference's for the same queries.
+
+    python benchmarks/bench_embedding_backends.py \
+        --backends sentence-transformers,sentence-transformers-int8 [--data-path Data]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from utils.document_processor import DocumentProcessor
+from utils.embedding_backends import create_embedding_backend
+from benchmarks._common import synthetic_chunks, profile_queries
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-k by L2 distance, like the default FAISS index."""
+    distances = (
+        (query_vectors ** 2).sum(axis=1, keepdims=True)
+        - 2 * query_vectors @ doc_vectors.T
+        + (doc_vectors ** 2).sum(axis=1)
+    )
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default="sentence-transformers,sentence-transformers-int8")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--data-path", help="Directory of PDFs to chunk instead of synthetic chunks")
+    parser.add_argument("--count", type=int, default=3000, help="Number of synthetic chunks")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    if args.data_path:
+        texts = [doc.page_content for doc in DocumentProcessor().process_documents(args.data_path)]
+    else:
+        texts = synthetic_chunks(args.count)
+    queries = profile_queries()
+    
+    print(f"{len(texts)} chunks, {len(queries)} queries, model {args.model}")
+    print(f"{'backend':<30} {'docs/s':>9} {'query p50 ms':>13} {'query p99 ms':>13} {'recall@' + str(args.k):>10}")
+    
+    reference_top_k = None
+    for backend_name in args.backends.split(","):
+        backend = create_embedding_backend(backend_name, args.model)
+        
+        start = time.perf_counter()
+        doc_vectors = np.asarray(backend.embed_documents(texts), dtype=np.float32)
+        docs_per_second = len(texts) / (time.perf_counter() - start)
+        
+        # Single-query latency, as on the serving path
+        backend.embed_query(queries[0])
+        latencies = []
+        query_vectors = []
+        for query in queries:
+            start = time.perf_counter()
+            query_vectors.append(backend.embed_query(query))
+            latencies.append((time.perf_counter() - start) * 1000)
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        
+        results = top_k(doc_vectors, query_vectors, args.k)
+        if reference_top_k is None:
+            reference_top_k = results
+        recall = np.mean([
+            len(set(found) & set(expected)) / args.k
+            for found, expected in zip(results, reference_top_k)
+        ])
+        
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{backend_name:<30} {docs_per_second:>9.1f} {p50:>13.2f} {p99:>13.2f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
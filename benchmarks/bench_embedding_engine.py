@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compare embedding throughput of HuggingFaceEmbeddings and the bucketed EmbeddingEngine.
+
+Reports chunks per second for each configuration and the largest absolute
+difference from the HuggingFaceEmbeddings vectors.
+
+    python benchmarks/bench_embedding_engine.py [--data-path Data] [--workers 4]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from utils.document_processor import DocumentProcessor
+from utils.embedding_engine import EmbeddingEngine
+from benchmarks._common import synthetic_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-path", help="Directory of PDFs to chunk instead of synthetic chunks")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--count", type=int, default=4000, help="Number of synthetic chunks")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    
+    if args.data_path:
+        processor = DocumentProcessor()
+        texts = [doc.page_content for doc in processor.process_documents(args.data_path)]
+    else:
+        texts = synthetic_chunks(args.count, min_words=5)
+    
+    baseline = HuggingFaceEmbeddings(model_name=args.model, model_kwargs={'device': 'cpu'})
+    start = time.perf_counter()
+    reference = np.asarray(baseline.embed_documents(texts), dtype=np.float32)
+    baseline_time = time.perf_counter() - start
+    
+    print(f"{len(texts)} chunks, model {args.model}")
+    print(f"{'configuration':<32} {'chunks/s':>10} {'max |diff|':>12}")
+    print(f"{'HuggingFaceEmbeddings':<32} {len(texts) / baseline_time:>10.1f} {0.0:>12.2e}")
+    
+    model = baseline.client
+    for workers in sorted({1, args.workers}):
+        engine = EmbeddingEngine(args.model, batch_size=args.batch_size, num_workers=workers, model=model)
+        try:
+            # Warm up the worker pool so start-up isn't counted
+            engine.encode(texts[:args.batch_size * workers * 4])
+            start = time.perf_counter()
+            vectors = engine.encode(texts)
+            elapsed = time.perf_counter() - start
+        finally:
+            engine.close()
+        
+        max_diff = float(np.abs(vectors - reference).max())
+        label = f"EmbeddingEngine ({workers} worker{'s' if workers > 1 else ''})"
+        print(f"{label:<32} {len(texts) / elapsed:>10.1f} {max_diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
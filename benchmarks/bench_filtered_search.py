@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Latency and recall@k of tag-filtered search against unfiltered search.
+
+Filters of decreasing selectivity are simulated with random masks over the
+index positions. Recall is against exact search over the matching vectors
+only, so it shows whether selective filters still return the true
+neighbours.
+
+    python benchmarks/bench_filtered_search.py [--index-type ivf-flat] [--count 100000]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from utils.ann_index import IndexConfig, build_index, apply_search_params, search_filtered
+from benchmarks._common import synthetic_vectors
+
+FRACTIONS = [1.0, 0.5, 0.3, 0.1, 0.02, 0.005, 0.001]
+
+
+def exact_filtered(corpus: np.ndarray, query: np.ndarray, mask: np.ndarray, k: int) -> set:
+    selected = np.flatnonzero(mask)
+    distances = ((corpus[selected] - query) ** 2).sum(axis=1)
+    return set(selected[np.argsort(distances)[:k]].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-type", default="ivf-flat")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    corpus = synthetic_vectors(args.count, args.dimension)
+    queries = synthetic_vectors(args.queries, args.dimension, seed=1)
+    config = IndexConfig(index_type=args.index_type)
+    index = build_index(corpus, config)
+    apply_search_params(index, config)
+    rng = np.random.default_rng(2)
+    
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query[None, :], args.k)
+    baseline = (time.perf_counter() - start) * 1000 / len(queries)
+    
+    print(f"{args.index_type} over {args.count} vectors, k={args.k}; unfiltered {baseline:.3f} ms/query")
+    print(f"{'matching':>9} {'ms/query':>9} {'vs unfiltered':>14} {'recall@k':>9}")
+    for fraction in FRACTIONS:
+        mask = rng.random(args.count) < fraction
+        latencies = []
+        recall = []
+        for query in queries:
+            start = time.perf_counter()
+            _, positions = search_filtered(index, query[None, :], args.k, mask)
+            latencies.append((time.perf_counter() - start) * 1000)
+            truth = exact_filtered(corpus, query, mask, args.k)
+            if truth:
+                recall.append(len(truth & set(positions[0].tolist())) / len(truth))
+        mean = float(np.mean(latencies))
+        print(f"{fraction:>9.1%} {mean:>9.3f} {mean / baseline:>13.2f}x {np.mean(recall):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Recall@k and precision@k of dense, BM25 and hybrid (RRF) retrieval on a saved store.
+
+Runs the questionnaire-style queries of ``_format_user_query`` (every skin
+type with one or two concerns) against a built index. A chunk counts as
+relevant when it is tagged with all of the query's concerns; the tags are
+keyword based, so this proxy favours lexical matching somewhat. Compare at
+small k to see how few chunks can be passed to the LLM.
+
+    python benchmarks/bench_hybrid_search.py [--index-path vector_store] [--ks 1,2,3,5,10]
+"""
+
+import sys
+import time
+import argparse
+from itertools import combinations
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from utils.vector_store import VectorStoreManager
+from utils.chunk_tags import TagFilter, CONCERN_TERMS
+from utils.bm25_index import reciprocal_rank_fusion
+from benchmarks._common import SKIN_TYPES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-path", default="vector_store")
+    parser.add_argument("--backend", default="sentence-transformers")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--ks", default="1,2,3,5,10")
+    parser.add_argument("--rrf-k", type=int, default=60)
+    args = parser.parse_args()
+    
+    manager = VectorStoreManager(embedding_model=args.model, embedding_backend=args.backend, query_cache_size=0,
+                                 retrieval_mode="hybrid", rrf_k=args.rrf_k)
+    store = manager.load_vector_store(args.index_path)
+    if store.lexical is None or store.tags is None:
+        sys.exit(f"{args.index_path} has no BM25 or tag index; rebuild it with python main.py")
+    
+    cases = []
+    for skin_type in SKIN_TYPES:
+        for size in (1, 2):
+            for concerns in combinations(CONCERN_TERMS, size):
+                relevant = np.flatnonzero(store.tags.mask(TagFilter.create(concerns=concerns[:1])))
+                for concern in concerns[1:]:
+                    relevant = np.intersect1d(relevant, np.flatnonzero(store.tags.mask(TagFilter.create(concerns=[concern]))))
+                if len(relevant):
+                    cases.append((f"skin type {skin_type} concerns {' '.join(concerns)}", set(relevant.tolist())))
+    if not cases:
+        sys.exit("No chunk is tagged with any concern")
+    
+    queries = [query for query, _ in cases]
+    embeddings = manager.embed_queries(queries)
+    ks = [int(k) for k in args.ks.split(",")]
+    max_k = max(ks)
+    
+    def dense(i):
+        _, positions = store._dense_search(embeddings[i:i + 1], max_k, None)[0]
+        return [int(p) for p in positions if p != -1]
+    
+    def lexical(i):
+        return store.lexical.search(queries[i], max_k)[1].tolist()
+    
+    def hybrid(i):
+        fetch_k = manager.hybrid_fetch_k or 4 * max_k
+        _, dense_positions = store._dense_search(embeddings[i:i + 1], fetch_k, None)[0]
+        lexical_positions = store.lexical.search(queries[i], fetch_k)[1]
+        return [p for p, _ in reciprocal_rank_fusion([dense_positions, lexical_positions], max_k, rrf_k=args.rrf_k)]
+    
+    print(f"{len(cases)} queries over {len(store.chunks)} chunks")
+    print(f"{'method':<8} {'ms/query':>9} " + " ".join(f"{f'R@{k}':>6} {f'P@{k}':>6}" for k in ks))
+    for name, search in (("dense", dense), ("bm25", lexical), ("hybrid", hybrid)):
+        start = time.perf_counter()
+        rankings = [search(i) for i in range(len(cases))]
+        per_query = (time.perf_counter() - start) * 1000 / len(cases)
+        columns = []
+        for k in ks:
+            hits = [len(set(ranking[:k]) & relevant) for ranking, (_, relevant) in zip(rankings, cases)]
+            recall = np.mean([hit / min(k, len(relevant)) for hit, (_, relevant) in zip(hits, cases)])
+            precision = np.mean([hit / k for hit in hits])
+            columns.append(f"{recall:>6.3f} {precision:>6.3f}")
+        print(f"{name:<8} {per_query:>9.2f} " + " ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Latency/throughput curve of retrieval with and without micro-batching.
+
+Concurrent client threads each issue retrievals back to back (distinct
+queries, query cache disabled) for a fixed time. Each window setting
+reports throughput, p50/p99 latency and the mean batch size.
+
+    python benchmarks/bench_micro_batching.py [--clients 1,4,16,32] [--windows 0,1,2,5,10]
+"""
+
+import sys
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from utils.micro_batcher import MicroBatcher
+from utils.vector_store import VectorStoreManager
+from benchmarks._common import synthetic_documents, synthetic_text
+
+
+def run_load(search, clients: int, seconds: float, k: int):
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+    
+    def client(seed: int):
+        rng = random.Random(seed)
+        local = []
+        while time.perf_counter() < stop_at:
+            query = synthetic_text(rng, 8)
+            start = time.perf_counter()
+            search(query, k)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return len(latencies) / elapsed, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="sentence-transformers")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--count", type=int, default=5000, help="Number of synthetic chunks")
+    parser.add_argument("--clients", default="1,4,16,32")
+    parser.add_argument("--windows", default="0,1,2,5,10", help="Batch windows in ms; 'off' is always included")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    documents = synthetic_documents(args.count)
+    manager = VectorStoreManager(embedding_model=args.model, embedding_backend=args.backend, query_cache_size=0)
+    manager.create_vector_store(documents)
+    
+    def process(requests):
+        queries = [query for query, _ in requests]
+        return manager.similarity_search_batch(queries, k=requests[0][1])
+    
+    print(f"{'clients':>7} {'window':>8} {'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        throughput, p50, p99 = run_load(manager.similarity_search_with_score, clients, args.seconds, args.k)
+        print(f"{clients:>7} {'off':>8} {throughput:>10.1f} {p50:>8.2f} {p99:>8.2f} {1.0:>11.1f}")
+        
+        for window in (float(w) for w in args.windows.split(",")):
+            batcher = MicroBatcher(process, max_batch_size=args.max_batch_size, max_wait_ms=window)
+            try:
+                throughput, p50, p99 = run_load(lambda query, k: batcher((query, k)), clients, args.seconds, args.k)
+            finally:
+                batcher.close()
+            mean_batch = batcher.stats()["mean_batch_size"]
+            print(f"{clients:>7} {f'{window:g} ms':>8} {throughput:>10.1f} {p50:>8.2f} {p99:>8.2f} {mean_batch:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Per-worker memory when several processes serve the same memory-mapped store.
+
+Builds a compact store from random vectors and synthetic chunks, then
+starts N processes that each open it, as uvicorn workers do, and search it
+until every page has been touched. Each reports its RSS and its PSS
+(proportional set size: shared pages are split between the processes
+mapping them), read from ``/proc/self/smaps_rollup``, so Linux only.
+
+    python benchmarks/bench_multi_worker.py [--count 200000] [--workers 1,2,4,8]
+"""
+
+import sys
+import json
+import random
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from benchmarks._common import synthetic_text
+
+# Each worker opens the store and touches it all, then measures once every worker has done so
+WORKER_SCRIPT = """
+import sys, json
+sys.path.insert(0, {root!r})
+import numpy as np
+from utils.compact_store import CompactVectorStore
+
+def memory_mb():
+    stats = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                stats[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    return stats
+
+before = memory_mb()
+store = CompactVectorStore.load({path!r})
+rng = np.random.default_rng()
+for _ in range(20):
+    store.similarity_search_with_score_by_vector(rng.standard_normal({dimension}).astype(np.float32), k=5)
+for position in range(len(store.chunks)):
+    store.chunks.get(position)
+print("ready", flush=True)
+sys.stdin.readline()
+after = memory_mb()
+print(json.dumps({{"rss_mb": after["rss"] - before["rss"], "pss_mb": after["pss"] - before["pss"]}}), flush=True)
+sys.stdin.read()
+"""
+
+
+def build_store(path: Path, count: int, dimension: int):
+    import faiss
+    from langchain.schema import Document
+    
+    from utils.ann_index import to_mmappable
+    from utils.compact_store import CompactVectorStore
+    
+    rng = random.Random(0)
+    index = faiss.IndexFlatL2(dimension)
+    index.add(np.random.default_rng(0).standard_normal((count, dimension)).astype(np.float32))
+    records = (
+        (f"doc{i % 50}.pdf#{i}", Document(
+            page_content=synthetic_text(rng, 120),
+            metadata={"source": f"doc{i % 50}.pdf", "chunk_id": i}
+        ))
+        for i in range(count)
+    )
+    CompactVectorStore.save(str(path), to_mmappable(index), records)
+
+
+def run_workers(path: Path, workers: int, dimension: int):
+    script = WORKER_SCRIPT.format(root=str(Path(__file__).parent.parent), path=str(path), dimension=dimension)
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.stdout.readline()
+        # Measure only when all workers map the store, so PSS reflects the sharing
+        for process in processes:
+            process.stdin.write("\n")
+            process.stdin.flush()
+        stats = [json.loads(process.stdout.readline()) for process in processes]
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        build_store(Path(tmp), args.count, args.dimension)
+        size_mb = sum(f.stat().st_size for f in Path(tmp).iterdir()) / 2 ** 20
+        print(f"{args.count} chunks, store files {size_mb:.0f} MB")
+        print(f"{'workers':>7} {'RSS +MB/worker':>15} {'PSS +MB/worker':>15} {'total PSS +MB':>14}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            stats = run_workers(Path(tmp), workers, args.dimension)
+            rss = np.mean([s["rss_mb"] for s in stats])
+            pss = [s["pss_mb"] for s in stats]
+            print(f"{workers:>7} {rss:>15.1f} {np.mean(pss):>15.1f} {sum(pss):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Pinecone load and query throughput against the local stand-in, offline.
+
+Upserts synthetic chunks into a ``LocalPineconeIndex`` that simulates a
+network round trip and occasional failures, at several concurrency
+levels, then interrupts a load half way and resumes it. Finally compares
+sequential queries with the async concurrent batch path.
+
+    python benchmarks/bench_pinecone_upsert.py [--count 20000] [--latency-ms 40] [--failure-rate 0.02]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.local_pinecone import LocalPineconeIndex
+from utils.vector_store import VectorStoreManager
+from benchmarks._common import synthetic_documents, synthetic_text
+
+
+def make_manager(index, concurrency: int, progress_path=None, batch_size: int = 100):
+    return VectorStoreManager(
+        embedding_backend="hash", vector_db_type="pinecone", query_cache_size=0,
+        pinecone_index=index, upsert_concurrency=concurrency, upsert_batch_size=batch_size,
+        upsert_progress_path=progress_path, query_concurrency=concurrency
+    )
+
+
+def chunk_count(index) -> int:
+    """Vectors in the searched namespace, leaving out the index version record."""
+    return index.describe_index_stats()["namespaces"].get("", {}).get("vector_count", 0)
+
+
+def interrupted(documents, stop_after: int):
+    """Yield documents, then fail like a crashed process."""
+    for i, doc in enumerate(documents):
+        if i == stop_after:
+            raise KeyboardInterrupt("simulated interruption")
+        yield doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--concurrency", default="1,4,8,16")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    documents = synthetic_documents(args.count)
+    
+    print(f"Upserting {args.count} chunks, {args.latency_ms:g} ms round trip, {args.failure_rate:.0%} failed requests")
+    print(f"{'concurrency':>11} {'seconds':>8} {'vectors/s':>10} {'retries':>8}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        index = LocalPineconeIndex(latency_ms=args.latency_ms, failure_rate=args.failure_rate)
+        manager = make_manager(index, concurrency)
+        start = time.perf_counter()
+        manager.create_vector_store(documents)
+        seconds = time.perf_counter() - start
+        retries = index.failed_calls
+        print(f"{concurrency:>11} {seconds:>8.2f} {args.count / seconds:>10.0f} {retries:>8}")
+    
+    # Resume: the second run only embeds and upserts what the first didn't finish
+    with tempfile.TemporaryDirectory() as tmp:
+        progress_path = str(Path(tmp) / "progress.jsonl")
+        index = LocalPineconeIndex(latency_ms=args.latency_ms)
+        try:
+            make_manager(index, 8, progress_path).create_vector_store(interrupted(documents, args.count // 2))
+        except KeyboardInterrupt:
+            pass
+        first = chunk_count(index)
+        calls = index.upsert_calls
+        make_manager(index, 8, progress_path).create_vector_store(documents)
+        total = chunk_count(index)
+        print(f"Interrupted load stored {first} vectors; resume made {index.upsert_calls - calls} requests, "
+              f"index now holds {total}")
+    
+    # Queries: one at a time vs concurrently from the async batch path
+    manager = make_manager(index, 8)
+    manager.load_vector_store("")
+    rng = random.Random(1)
+    queries = [synthetic_text(rng, 8) for _ in range(args.queries)]
+    
+    start = time.perf_counter()
+    for query in queries:
+        manager.similarity_search_with_score(query, k=5)
+    sequential = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    asyncio.run(manager.asimilarity_search_batch(queries, k=5))
+    concurrent = time.perf_counter() - start
+    print(f"{args.queries} queries: sequential {args.queries / sequential:.0f}/s, "
+          f"async batch ({manager.query_concurrency} in flight) {args.queries / concurrent:.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
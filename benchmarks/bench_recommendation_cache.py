@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Hit rate and lookup latency of the recommendation cache on synthetic traffic.
+
+Draws questionnaires the way users fill them in: a skin type, one to
+three concerns (popular ones more often, in any order) and occasionally
+free-text answers with varying case and spacing. Compares the hit rate
+of a key over the raw request with the canonical key, then times hits
+on the memory and disk backends.
+
+    python benchmarks/bench_recommendation_cache.py [--requests 20000] [--cache-size 1024]
+"""
+
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from backend.models import SkinConcern, SkinType, UserQuestionnaire
+from utils.recommendation_cache import create_recommendation_cache, questionnaire_key
+
+SENSITIVITIES = ["fragrance", "Fragrance ", "fragrance", "nuts", "  Nuts", "lanolin"]
+STRESS = ["low", "medium", "High", "high "]
+
+SAMPLE_RECOMMENDATIONS = {
+    "morning_routine": ["Gentle cleanser", "Niacinamide serum", "SPF 30+"],
+    "evening_routine": ["Double cleanse", "Retinoid", "Ceramide moisturizer"],
+    "lifestyle_tips": ["Change pillowcases weekly", "Sleep 7-9 hours"],
+    "remedies": ["Azelaic acid for pigmentation"],
+    "sources": ["Andrews-Diseases-of-the-Skin.pdf"],
+    "warnings": ["Patch test new products"]
+}
+
+
+def random_questionnaire(rng: random.Random) -> UserQuestionnaire:
+    concerns = list(SkinConcern)
+    weights = [1 / (rank + 1) for rank in range(len(concerns))]
+    chosen = []
+    while len(chosen) < rng.choice([1, 1, 2, 2, 3]):
+        concern = rng.choices(concerns, weights)[0]
+        if concern not in chosen:
+            chosen.append(concern)
+    return UserQuestionnaire(
+        skin_type=rng.choice(list(SkinType)),
+        concerns=chosen,
+        allergies=rng.choice(SENSITIVITIES) if rng.random() < 0.2 else None,
+        prefers_natural=rng.random() < 0.3,
+        stress_level=rng.choice(STRESS) if rng.random() < 0.3 else None
+    )
+
+
+def raw_key(questionnaire: UserQuestionnaire) -> str:
+    return hashlib.sha256(questionnaire.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def hit_rate(keys, cache_size: int) -> float:
+    cache = create_recommendation_cache("memory", max_size=cache_size)
+    for key in keys:
+        if cache.get("v1", key) is None:
+            cache.put("v1", key, SAMPLE_RECOMMENDATIONS)
+    return cache.stats()["hit_rate"]
+
+
+def time_hits(cache, keys, rounds: int = 3):
+    for key in keys:
+        cache.put("v1", key, SAMPLE_RECOMMENDATIONS)
+    latencies = []
+    for _ in range(rounds):
+        for key in keys:
+            start = time.perf_counter()
+            cache.get("v1", key)
+            latencies.append(time.perf_counter() - start)
+    return np.percentile(latencies, [50, 99]) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args()
+    
+    rng = random.Random(0)
+    questionnaires = [random_questionnaire(rng) for _ in range(args.requests)]
+    
+    start = time.perf_counter()
+    canonical_keys = [questionnaire_key(q, namespace="bench") for q in questionnaires]
+    key_us = (time.perf_counter() - start) / len(questionnaires) * 1e6
+    raw_keys = [raw_key(q) for q in questionnaires]
+    
+    print(f"{args.requests} requests, {len(set(raw_keys))} distinct raw profiles, "
+          f"{len(set(canonical_keys))} distinct canonical profiles")
+    print(f"hit rate (LRU of {args.cache_size}): raw key {hit_rate(raw_keys, args.cache_size):.1%}, "
+          f"canonical key {hit_rate(canonical_keys, args.cache_size):.1%}")
+    print(f"canonical key: {key_us:.1f} us per questionnaire")
+    
+    distinct = list(dict.fromkeys(canonical_keys))[:2000]
+    p50, p99 = time_hits(create_recommendation_cache("memory", max_size=len(distinct)), distinct)
+    print(f"memory hit: p50 {p50:.1f} us, p99 {p99:.1f} us")
+    with tempfile.TemporaryDirectory() as tmp:
+        p50, p99 = time_hits(create_recommendation_cache("disk", cache_dir=tmp), distinct)
+        print(f"disk hit:   p50 {p50:.1f} us, p99 {p99:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""LLM calls and latency during a burst of identical requests, with and without coalescing.
+
+Simulates a campaign burst: requests for a handful of distinct profiles
+(most of them for the first few) arrive over a short window, and each
+uncoalesced request holds one of ``--llm-concurrency`` LLM slots for the
+generation time, as ``agenerate_recommendations`` does. Reports LLM
+calls made and the p50/p99 latency seen by clients, then the latency
+coalescing adds to a lone request, with an instant generation.
+
+    python benchmarks/bench_request_coalescing.py [--requests 500] [--profiles 20] [--generation-ms 3000]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from utils.single_flight import AsyncSingleFlight
+
+
+async def run_burst(args, coalesce: bool):
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(args.profiles)]
+    arrivals = sorted(rng.uniform(0, args.window_ms / 1000) for _ in range(args.requests))
+    profiles = rng.choices(range(args.profiles), weights, k=args.requests)
+    
+    llm_slots = asyncio.Semaphore(args.llm_concurrency)
+    flights = AsyncSingleFlight() if coalesce else None
+    llm_calls = 0
+    
+    async def generate(profile: int):
+        nonlocal llm_calls
+        async with llm_slots:
+            llm_calls += 1
+            await asyncio.sleep(args.generation_ms / 1000 * rng.uniform(0.8, 1.2))
+        return {"profile": profile}
+    
+    async def request(arrival: float, profile: int, start: float):
+        await asyncio.sleep(max(0.0, start + arrival - time.perf_counter()))
+        begin = time.perf_counter()
+        if flights is None:
+            await generate(profile)
+        else:
+            await flights.run(profile, lambda: generate(profile))
+        return time.perf_counter() - begin
+    
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(request(a, p, start) for a, p in zip(arrivals, profiles)))
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return llm_calls, p50, p99, flights.stats() if flights is not None else None
+
+
+async def single_request_overhead(rounds: int):
+    """p50 microseconds per uncontended request, direct and through ``AsyncSingleFlight``."""
+    flights = AsyncSingleFlight()
+    
+    async def generate():
+        await asyncio.sleep(0)
+        return {"morning_routine": ["step"]}
+    
+    direct, coalesced = [], []
+    for i in range(rounds):
+        start = time.perf_counter()
+        await generate()
+        direct.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await flights.run(i, generate)
+        coalesced.append(time.perf_counter() - start)
+    return np.percentile(direct, 50) * 1e6, np.percentile(coalesced, 50) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--window-ms", type=float, default=2000)
+    parser.add_argument("--generation-ms", type=float, default=3000)
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20000, help="Lone requests timed for the overhead")
+    args = parser.parse_args()
+    
+    print(f"{args.requests} requests for {args.profiles} profiles over {args.window_ms:g} ms, "
+          f"{args.generation_ms:g} ms generations, {args.llm_concurrency} LLM slots")
+    print(f"{'coalescing':<11} {'LLM calls':>9} {'p50 s':>7} {'p99 s':>7} {'coalesced':>10}")
+    for coalesce in (False, True):
+        llm_calls, p50, p99, stats = asyncio.run(run_burst(args, coalesce))
+        coalesced = f"{stats['coalesced_rate']:.1%}" if stats else "-"
+        print(f"{'on' if coalesce else 'off':<11} {llm_calls:>9} {p50:>7.2f} {p99:>7.2f} {coalesced:>10}")
+    
+    direct_us, coalesced_us = asyncio.run(single_request_overhead(args.rounds))
+    print(f"Lone request p50: {direct_us:.1f} us direct, {coalesced_us:.1f} us coalesced "
+          f"(+{coalesced_us - direct_us:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Latency of precomputed retrieval against live embedding and search, on a saved store.
+
+Builds the retrieval table for a built index (every skin type with up to
+``--max-concerns`` concerns, with and without natural products), then
+retrieves every profile live (query embedding, filtered hybrid search,
+top-up) and from the table, and checks that both return the same chunks.
+
+    python benchmarks/bench_retrieval_table.py [--index-path vector_store/versions/<name>] [--max-concerns 2]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from utils.vector_store import VectorStoreManager
+from utils.index_manifest import chunk_document_id
+from backend.retrieval_table import RetrievalTable, enumerate_profiles, format_user_query, tag_filters, top_up
+
+
+def live_retrieve(manager: VectorStoreManager, profile, k: int):
+    """``SkincareRAGPipeline._retrieve_relevant_context`` without the micro-batcher."""
+    query = format_user_query(profile)
+    strict, relaxed = tag_filters(profile)
+    docs = manager.similarity_search(query, k=k, filter=strict)
+    if len(docs) < k and strict != relaxed:
+        top_up(docs, manager.similarity_search(query, k=k, filter=relaxed), k)
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-path", default="vector_store")
+    parser.add_argument("--backend", default="sentence-transformers")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--retrieval-mode", default="dense")
+    parser.add_argument("--max-concerns", type=int, default=2)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    # No query cache, so every live retrieval pays for its embedding as a first request would
+    manager = VectorStoreManager(embedding_model=args.model, embedding_backend=args.backend, query_cache_size=0,
+                                 retrieval_mode=args.retrieval_mode)
+    store = manager.load_vector_store(args.index_path)
+    
+    start = time.perf_counter()
+    table = RetrievalTable.build(manager, k=args.k, max_concerns=args.max_concerns)
+    build_seconds = time.perf_counter() - start
+    print(f"Table of {len(table)} profiles over {len(store.chunks)} chunks built in {build_seconds:.1f}s")
+    
+    profiles = list(enumerate_profiles(args.max_concerns))
+    live_ms, table_ms, agree = [], [], 0
+    for profile in profiles:
+        start = time.perf_counter()
+        live = live_retrieve(manager, profile, args.k)
+        live_ms.append((time.perf_counter() - start) * 1000)
+        
+        start = time.perf_counter()
+        precomputed = [store.chunks.get(position) for position in table.lookup(profile, args.k)]
+        table_ms.append((time.perf_counter() - start) * 1000)
+        
+        agree += [chunk_document_id(doc) for doc in live] == [chunk_document_id(doc) for doc in precomputed]
+    
+    print(f"{'path':<6} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, latencies in (("live", live_ms), ("table", table_ms)):
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{name:<6} {p50:>8.3f} {p99:>8.3f}")
+    print(f"Identical results for {agree}/{len(profiles)} profiles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Time to the first recommendation step when streaming, against the full response time.
+
+By default replays a typical JSON response through ``IncrementalJSONParser``
+a few characters at a time at a simulated generation rate, and reports
+when the first and the last step were emitted and the parser's cost per
+chunk. With ``--url``, posts a questionnaire to a running server's
+``/recommendations/stream`` and times its events instead.
+
+    python benchmarks/bench_streaming.py [--tokens-per-second 50] [--url http://127.0.0.1:8000]
+"""
+
+import sys
+import json
+import time
+import argparse
+import urllib.request
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.streaming_json import IncrementalJSONParser
+
+SAMPLE_RESPONSE = json.dumps({
+    "morning_routine": [
+        "Cleanse with a gentle, non-foaming cleanser",
+        "Apply a niacinamide serum to reduce sebum and redness",
+        "Finish with a broad-spectrum SPF 30 or higher sunscreen"
+    ],
+    "evening_routine": [
+        "Double cleanse to remove sunscreen",
+        "Apply a low-strength retinoid two to three nights a week",
+        "Use a fragrance-free moisturizer with ceramides"
+    ],
+    "lifestyle_tips": ["Change pillowcases weekly", "Avoid picking at lesions", "Keep a consistent sleep schedule"],
+    "remedies": ["Azelaic acid for post-inflammatory pigmentation", "Benzoyl peroxide spot treatment"],
+    "warnings": ["Patch test new actives", "See a dermatologist for nodular or cystic acne"]
+}, indent=4)
+
+# Characters per streamed token, roughly, for English JSON
+CHARS_PER_TOKEN = 4
+
+
+def replay(tokens_per_second: float):
+    parser = IncrementalJSONParser()
+    chunks = [SAMPLE_RESPONSE[i:i + CHARS_PER_TOKEN] for i in range(0, len(SAMPLE_RESPONSE), CHARS_PER_TOKEN)]
+    item_times = []
+    parse_seconds = 0.0
+    for position, chunk in enumerate(chunks):
+        start = time.perf_counter()
+        items = parser.feed(chunk)
+        parse_seconds += time.perf_counter() - start
+        # Simulated clock: the chunk arrived after position + 1 tokens of generation
+        item_times.extend([(position + 1) / tokens_per_second] * len(items))
+    total = len(chunks) / tokens_per_second
+    return item_times, total, parse_seconds / len(chunks)
+
+
+def stream_live(url: str):
+    questionnaire = {"skin_type": "combination", "concerns": ["acne", "pigmentation"], "prefers_natural": False}
+    request = urllib.request.Request(
+        f"{url}/recommendations/stream",
+        data=json.dumps({"questionnaire": questionnaire}).encode(),
+        headers={"Content-Type": "application/json", "Accept": "text/event-stream"}
+    )
+    first_event = {}
+    items = 0
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        for line in response:
+            line = line.decode().strip()
+            if not line.startswith("event: "):
+                continue
+            event = line[len("event: "):]
+            first_event.setdefault(event, time.perf_counter() - start)
+            items += event == "item"
+            if event == "done":
+                break
+    return first_event, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--url", help="Time a running server's /recommendations/stream instead")
+    args = parser.parse_args()
+    
+    if args.url:
+        first_event, items = stream_live(args.url.rstrip("/"))
+        for event in ("sources", "token", "item", "done"):
+            if event in first_event:
+                print(f"first {event:<8} {first_event[event] * 1000:>8.0f} ms")
+        print(f"{items} items streamed")
+        return
+    
+    item_times, total, parse_per_chunk = replay(args.tokens_per_second)
+    print(f"Replaying a {len(SAMPLE_RESPONSE)} character response at {args.tokens_per_second:g} tokens/s")
+    print(f"full response      {total * 1000:>8.0f} ms (when /recommendations can answer)")
+    print(f"first step         {item_times[0] * 1000:>8.0f} ms")
+    print(f"last step          {item_times[-1] * 1000:>8.0f} ms ({len(item_times)} items)")
+    print(f"parser cost        {parse_per_chunk * 1e6:>8.1f} us per chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Benchmark the fast text splitter and cleaner against the LangChain implementation.
+
+Checks that both produce identical chunks, then reports timings. Uses the
+PDFs in DATA_PATH when given, otherwise a synthetic corpus.
+
+    python benchmarks/bench_text_splitter.py [--data-path Data] [--repeat 5]
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import List, Callable
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from utils.document_processor import DocumentProcessor
+from utils.text_splitter import FastRecursiveTextSplitter
+from benchmarks._common import WORDS
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def synthetic_documents(num_documents: int, pages_per_document: int, words_per_page: int,
+                        seed: int = 0) -> List[List[str]]:
+    """Generate PDF-like page texts with ragged line breaks."""
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(num_documents):
+        pages = []
+        for _ in range(pages_per_document):
+            words = []
+            for _ in range(words_per_page):
+                words.append(rng.choice(WORDS))
+                words.append(rng.choice([" ", " ", " ", "  ", "\n", " \n"]))
+            pages.append("".join(words))
+        documents.append(pages)
+    return documents
+
+
+def legacy_clean(pages: List[str]) -> str:
+    """The original extract + clean: repeated concatenation and several passes."""
+    text = ""
+    for page_text in pages:
+        if page_text:
+            text += page_text + "\n"
+    text = " ".join(text.split())
+    text = text.replace("", "")
+    text = text.replace("\x00", "")
+    return text
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-path", help="Directory of PDFs to use instead of a synthetic corpus")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    processor = DocumentProcessor(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    
+    if args.data_path:
+        documents = [
+            list(processor.iter_pdf_pages(str(pdf_file)))
+            for pdf_file in processor.list_pdf_files(args.data_path)
+        ]
+    else:
+        documents = synthetic_documents(num_documents=20, pages_per_document=100, words_per_page=400)
+    
+    if not documents:
+        print("No documents to benchmark")
+        sys.exit(1)
+    
+    # Cleaning
+    legacy_texts = [legacy_clean(pages) for pages in documents]
+    fast_texts = [processor._clean_pages(pages) for pages in documents]
+    assert legacy_texts == fast_texts, "Cleaned text differs between implementations"
+    
+    legacy_clean_time = best_time(lambda: [legacy_clean(pages) for pages in documents], args.repeat)
+    fast_clean_time = best_time(lambda: [processor._clean_pages(pages) for pages in documents], args.repeat)
+    
+    # Splitting
+    langchain_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        length_function=len,
+        separators=SEPARATORS
+    )
+    fast_splitter = FastRecursiveTextSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        separators=SEPARATORS
+    )
+    
+    langchain_chunks = [langchain_splitter.split_text(text) for text in fast_texts]
+    fast_chunks = [fast_splitter.split_text(text) for text in fast_texts]
+    assert langchain_chunks == fast_chunks, "Chunk boundaries differ between implementations"
+    
+    langchain_time = best_time(lambda: [langchain_splitter.split_text(t) for t in fast_texts], args.repeat)
+    fast_time = best_time(lambda: [fast_splitter.split_text(t) for t in fast_texts], args.repeat)
+    
+    total_chars = sum(len(text) for text in fast_texts)
+    total_chunks = sum(len(chunks) for chunks in fast_chunks)
+    
+    print(f"Corpus: {len(documents)} documents, {total_chars:,} characters, {total_chunks:,} chunks")
+    print("Outputs identical: yes")
+    print(f"{'stage':<10} {'legacy (s)':>12} {'fast (s)':>12} {'speedup':>9}")
+    print(f"{'clean':<10} {legacy_clean_time:>12.4f} {fast_clean_time:>12.4f} {legacy_clean_time / fast_clean_time:>8.2f}x")
+    print(f"{'split':<10} {langchain_time:>12.4f} {fast_time:>12.4f} {langchain_time / fast_time:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
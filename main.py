@@ -3,6 +3,7 @@
 
 import os
 import sys
+import argparse
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -10,8 +11,10 @@ from dotenv import load_dotenv
 # Add project root to path
 sys.path.append(str(Path(__file__).parent))
 
-from utils.document_processor import DocumentProcessor
-from utils.vector_store import VectorStoreManager
+from utils.index_versions import IndexVersions
+from backend.index_build import (
+    build_index_version, create_document_processor, create_vector_store_manager, load_pinecone_index
+)
 from config.settings import get_settings
 
 # Setup logging
@@ -21,8 +24,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Process and index documents for the skincare RAG system")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Re-process every PDF instead of only new or changed ones (FAISS only)"
+    )
+    return parser.parse_args()
+
 def main():
     """Main function to process documents and create vector store."""
+    args = parse_args()
+    
     # Load environment variables
     load_dotenv()
     
@@ -33,40 +48,34 @@ def main():
     logger.info(f"Vector DB Type: {settings.VECTOR_DB_TYPE}")
     logger.info(f"Data Path: {settings.DATA_PATH}")
     
-    # Initialize document processor
-    doc_processor = DocumentProcessor(
-        chunk_size=settings.CHUNK_SIZE,
-        chunk_overlap=settings.CHUNK_OVERLAP
-    )
-    
-    # Process documents
-    logger.info("📄 Processing PDF documents...")
-    documents = doc_processor.process_documents(settings.DATA_PATH)
-    
-    if not documents:
-        logger.error("❌ No documents were processed. Check your Data/ directory.")
-        sys.exit(1)
-    
-    logger.info(f"✅ Processed {len(documents)} document chunks")
-    
-    # Initialize vector store manager
-    vector_manager = VectorStoreManager(
-        embedding_model=settings.EMBEDDING_MODEL,
-        vector_db_type=settings.VECTOR_DB_TYPE,
-        pinecone_api_key=settings.PINECONE_API_KEY,
-        pinecone_environment=settings.PINECONE_ENVIRONMENT,
-        pinecone_index_name=settings.PINECONE_INDEX_NAME
-    )
+    # Same document processor and vector store manager as the API
+    doc_processor = create_document_processor(settings)
+    vector_manager = create_vector_store_manager(settings)
     
     # Create and save vector store
     logger.info("🔍 Creating vector store...")
     try:
-        vector_store = vector_manager.create_vector_store(documents)
-        
         if settings.VECTOR_DB_TYPE == "faiss":
-            vector_manager.save_vector_store(settings.VECTOR_STORE_PATH)
-            logger.info(f"💾 Vector store saved to {settings.VECTOR_STORE_PATH}")
+            # Build a new version from a copy of the current one; only new or changed PDFs are processed and embedded
+            index_versions = IndexVersions(settings.VECTOR_STORE_PATH, keep=getattr(settings, "INDEX_VERSIONS_KEEP", 3))
+            # Serialized with API workers' builds and rebuilds, which take the same lock
+            with index_versions.build_lock():
+                build = build_index_version(
+                    index_versions, doc_processor, vector_manager, settings, full_rebuild=args.full_rebuild
+                )
+            vector_manager.vector_store = build.store
+            logger.info(f"✅ {build.result.describe()}")
+            logger.info(f"💾 Vector store saved to {index_versions.path(build.name)} (version {build.name})")
         else:
+            # Stream documents straight into the index in embedding batches
+            logger.info("📄 Processing PDF documents...")
+            pdf_files = doc_processor.list_pdf_files(settings.DATA_PATH)
+            
+            if not pdf_files:
+                logger.error("❌ No documents were processed. Check your Data/ directory.")
+                sys.exit(1)
+            
+            load_pinecone_index(doc_processor, vector_manager, settings, pdf_files)
             logger.info("☁️ Documents indexed in Pinecone cloud")
         
         logger.info("🎉 Document indexing completed successfully!")
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """Script to run the FastAPI backend server."""
 
+import os
+
 import uvicorn
 from config.settings import get_settings
 
@@ -12,6 +14,12 @@ if __name__ == "__main__":
     print(f"📚 Using documents from: {settings.DATA_PATH}")
     print(f"🤖 LLM Model: {settings.LLM_MODEL}")
     print(f"🔍 Embedding Model: {settings.EMBEDDING_MODEL}")
+    workers = getattr(settings, "API_WORKERS", 1)
+    if workers > 1:
+        # Workers memory-map the same index files, so the index is held once in the page
+        # cache; split the cores between them so their embedding threads don't contend
+        os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // workers)))
+        print(f"👥 Workers: {workers}")
     print("=" * 50)
     
     uvicorn.run(
@@ -19,5 +27,6 @@ if __name__ == "__main__":
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=False,
+        workers=workers,
         log_level="info"
     )
\ No newline at end of file
@@ -0,0 +1,7 @@
+"""Shared pytest setup."""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
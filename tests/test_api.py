@@ -0,0 +1,29 @@
+"""Smoke tests for the FastAPI app."""
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("faiss")
+
+
+def test_api_imports_and_registers_routes():
+    from backend import api
+    
+    paths = {route.path for route in api.app.routes}
+    assert {
+        "/recommendations", "/recommendations/stream", "/cache/stats",
+        "/rebuild-index", "/rebuild-index/{job_id}", "/index/versions", "/index/rollback"
+    } <= paths
+
+
+def test_endpoints_report_uninitialized_pipeline():
+    from fastapi.testclient import TestClient
+    from backend import api
+    
+    # Without entering the client the lifespan never runs, so nothing is initialized
+    client = TestClient(api.app)
+    assert client.get("/health").status_code == 200
+    assert client.get("/rebuild-index/unknown").status_code == 500
+    assert client.get("/cache/stats").status_code == 500
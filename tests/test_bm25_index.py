@@ -0,0 +1,49 @@
+"""BM25Index scores against a direct computation of the formula."""
+
+import math
+import random
+
+import numpy as np
+
+from utils.bm25_index import BM25Builder, BM25Index, tokenize
+
+WORDS = "acne redness retinol niacinamide pores sunscreen ceramides moisturizer rosacea wrinkles".split()
+
+
+def bm25(texts, query, k1=1.2, b=0.75):
+    docs = [tokenize(text) for text in texts]
+    average = sum(len(doc) for doc in docs) / len(docs)
+    scores = [0.0] * len(docs)
+    for term in set(tokenize(query)):
+        df = sum(term in doc for doc in docs)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, doc in enumerate(docs):
+            freq = doc.count(term)
+            if freq:
+                scores[i] += idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * len(doc) / average))
+    return scores
+
+
+def test_search_matches_the_formula(tmp_path):
+    rng = random.Random(0)
+    texts = [" ".join(rng.choices(WORDS, k=rng.randint(3, 30))) for _ in range(200)]
+    builder = BM25Builder()
+    for text in texts:
+        builder.add(text)
+    BM25Index.write(str(tmp_path), builder.postings, builder.lengths)
+    index = BM25Index(str(tmp_path))
+    mask = np.arange(len(texts)) % 3 != 0
+    
+    for query in ("retinol", "acne pores", "the sunscreen for rosacea", "unknown"):
+        expected = bm25(texts, query)
+        for m in (None, mask):
+            scores, positions = index.search(query, 10, m)
+            candidates = [i for i, score in enumerate(expected) if score > 0 and (m is None or m[i])]
+            best = sorted(candidates, key=lambda i: (-expected[i], i))[:10]
+            assert len(positions) == len(best)
+            np.testing.assert_allclose(scores, [expected[i] for i in best], rtol=1e-5)
+            assert all(m is None or m[p] for p in positions)
+            # Scores are non-increasing, ties broken by position
+            assert all((scores[i], -positions[i]) >= (scores[i + 1], -positions[i + 1]) for i in range(len(scores) - 1))
@@ -0,0 +1,53 @@
+"""Closing a served CompactVectorStore while searches still hold it."""
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from langchain.schema import Document
+
+from utils.vector_store import VectorStoreManager
+
+
+def saved_store(path, words):
+    manager = VectorStoreManager(embedding_backend="hash", query_cache_size=0)
+    docs = [
+        Document(page_content=f"{words} chunk {i}", metadata={"source": "a.pdf", "chunk_id": i})
+        for i in range(20)
+    ]
+    manager.create_vector_store(iter(docs))
+    manager.save_vector_store(str(path))
+    return manager.load_vector_store(str(path))
+
+
+def test_close_waits_for_the_last_search(tmp_path):
+    store = saved_store(tmp_path, "acne retinol")
+    assert store.acquire()
+    store.close()
+    # Still open for the search holding it
+    assert store.chunks.get(0).page_content == "acne retinol chunk 0"
+    assert not store.chunks._file.closed
+    
+    store.release()
+    assert store.chunks._file.closed and store.index is None
+    assert not store.acquire()
+
+
+def test_searches_move_to_the_replacement(tmp_path):
+    manager = VectorStoreManager(embedding_backend="hash", query_cache_size=0)
+    old = saved_store(tmp_path / "old", "acne retinol")
+    new = saved_store(tmp_path / "new", "sunscreen ceramides")
+    manager.vector_store = old
+    
+    assert old.acquire()
+    manager.vector_store = new
+    old.close()
+    assert manager.similarity_search("sunscreen", k=1)[0].page_content.startswith("sunscreen")
+    assert not old.chunks._file.closed
+    old.release()
+    assert old.chunks._file.closed
+    
+    # Closing the store being served leaves nothing to search
+    new.close()
+    with pytest.raises(ValueError):
+        manager.similarity_search("sunscreen", k=1)
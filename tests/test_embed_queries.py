@@ -0,0 +1,52 @@
+"""Batched query embedding against one ``embed_query`` per query."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from utils.embedding_backends import HashingEmbeddings
+from utils.vector_store import VectorStoreManager
+
+QUERIES = ["skin type oily concerns acne", "skin type dry concerns wrinkles", "skin type oily concerns acne"]
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    """Records the size of every ``embed_documents`` / ``embed_query`` call."""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+    
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts)
+    
+    def embed_query(self, text):
+        self.calls.append(1)
+        return super().embed_query(text)
+
+
+def manager_for(backend, query_cache_size=0):
+    manager = VectorStoreManager(embedding_backend="hash", query_cache_size=query_cache_size)
+    manager.embedding_backend = backend
+    manager.base_embeddings = RecordingEmbeddings()
+    return manager
+
+
+@pytest.mark.parametrize("query_cache_size", [0, 16])
+def test_queries_are_embedded_in_one_batch(query_cache_size):
+    manager = manager_for("hash", query_cache_size)
+    vectors = manager.embed_queries(QUERIES)
+    
+    assert manager.base_embeddings.calls == [2]
+    expected = [HashingEmbeddings().embed_query(query) for query in QUERIES]
+    np.testing.assert_array_equal(vectors, np.asarray(expected, dtype=np.float32))
+
+
+def test_int8_queries_are_embedded_one_at_a_time():
+    manager = manager_for("sentence-transformers-int8")
+    vectors = manager.embed_queries(QUERIES)
+    
+    assert manager.base_embeddings.calls == [1, 1]
+    np.testing.assert_array_equal(vectors, manager_for("hash").embed_queries(QUERIES))
@@ -0,0 +1,94 @@
+"""Full and incremental index builds against the manifest."""
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from utils.document_processor import DocumentProcessor
+from utils.vector_store import VectorStoreManager
+from utils.index_builder import IndexBuilder
+from utils.index_manifest import IndexManifest
+
+WORDS = "acne redness retinol niacinamide pores sunscreen ceramides moisturizer rosacea wrinkles".split()
+
+
+class TextProcessor(DocumentProcessor):
+    """Reads each ``.pdf`` as plain text, one chunk per blank-line separated paragraph."""
+    
+    def _iter_pdf_chunks(self, pdf_files, num_workers=None):
+        for pdf_file in pdf_files:
+            yield [p.strip() for p in pdf_file.read_text().split("\n\n") if p.strip()]
+
+
+def paragraph(seed: int) -> str:
+    return " ".join(WORDS[(seed * 7 + i * 3) % len(WORDS)] + str(seed) for i in range(40))
+
+
+def write(data_dir, name, seeds):
+    (data_dir / name).write_text("\n\n".join(paragraph(s) for s in seeds))
+
+
+def make_builder(dedup_threshold=None):
+    manager = VectorStoreManager(embedding_backend="hash", query_cache_size=0)
+    return IndexBuilder(TextProcessor(), manager, dedup_threshold=dedup_threshold)
+
+
+def build(data_dir, index_dir, dedup_threshold=None):
+    return make_builder(dedup_threshold).build(str(data_dir), str(index_dir))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    data_dir, index_dir = tmp_path / "data", tmp_path / "index"
+    data_dir.mkdir()
+    return data_dir, index_dir
+
+
+def test_incremental_build_embeds_only_added_and_changed_files(dirs):
+    data_dir, index_dir = dirs
+    write(data_dir, "a.pdf", [1, 2, 3])
+    write(data_dir, "b.pdf", [4, 5])
+    
+    result = build(data_dir, index_dir)
+    assert result.full_rebuild and result.chunks_added == 5
+    
+    result = build(data_dir, index_dir)
+    assert not result.full_rebuild
+    assert (result.files_unchanged, result.chunks_added, result.chunks_deleted) == (2, 0, 0)
+    
+    write(data_dir, "b.pdf", [4, 6, 7])
+    write(data_dir, "c.pdf", [8])
+    result = build(data_dir, index_dir)
+    assert (result.files_added, result.files_changed, result.files_unchanged) == (1, 1, 1)
+    assert (result.chunks_added, result.chunks_deleted) == (4, 2)
+    
+    (data_dir / "a.pdf").unlink()
+    result = build(data_dir, index_dir)
+    assert (result.files_removed, result.chunks_deleted) == (1, 3)
+    
+    manifest = IndexManifest.load(str(index_dir))
+    assert sorted(manifest.files) == ["b.pdf", "c.pdf"]
+    assert sorted(manifest.chunk_ids(["b.pdf", "c.pdf"])) == ["b.pdf#0", "b.pdf#1", "b.pdf#2", "c.pdf#0"]
+
+
+def test_fully_deduplicated_file_is_recorded(dirs):
+    data_dir, index_dir = dirs
+    write(data_dir, "a.pdf", [1, 2])
+    write(data_dir, "copy.pdf", [2, 1])
+    
+    result = build(data_dir, index_dir, dedup_threshold=0.85)
+    assert (result.chunks_added, result.chunks_deduplicated) == (2, 2)
+    
+    manifest = IndexManifest.load(str(index_dir))
+    assert manifest.files["copy.pdf"]["chunk_ids"] == []
+    assert manifest.files_sharing_duplicates(["a.pdf"]) == ["copy.pdf"]
+    
+    # Nothing changed, so nothing is re-processed or re-embedded
+    result = build(data_dir, index_dir, dedup_threshold=0.85)
+    assert (result.files_added, result.files_unchanged, result.chunks_added) == (0, 2, 0)
+    
+    # Removing the representative brings the duplicate's content back into the index
+    (data_dir / "a.pdf").unlink()
+    result = build(data_dir, index_dir, dedup_threshold=0.85)
+    assert (result.files_removed, result.files_changed, result.chunks_added) == (1, 1, 2)
+    assert IndexManifest.load(str(index_dir)).chunk_ids(["copy.pdf"]) == ["copy.pdf#0", "copy.pdf#1"]
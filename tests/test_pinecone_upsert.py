@@ -0,0 +1,107 @@
+"""Resumable Pinecone upserts against LocalPineconeIndex."""
+
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain.schema import Document
+
+from utils.embedding_backends import HashingEmbeddings
+from utils.local_pinecone import LocalPineconeIndex
+from utils.pinecone_upsert import PineconeUpserter, UpsertProgress
+
+TARGET = {"index": "skincare"}
+
+
+class Interrupted(Exception):
+    pass
+
+
+def documents(count, changed=()):
+    return [
+        Document(
+            page_content=f"chunk {i} text" + (" revised" if i in changed else ""),
+            metadata={"source": "a.pdf", "chunk_id": i}
+        )
+        for i in range(count)
+    ]
+
+
+def interrupted_after(index, docs, count):
+    yield docs[:count]
+    # Interrupt once the requests are in the index, before the load has recorded them
+    deadline = time.monotonic() + 5
+    while index.describe_index_stats()["total_vector_count"] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    raise Interrupted
+
+
+@pytest.fixture
+def progress_path(tmp_path):
+    return str(tmp_path / "progress.jsonl")
+
+
+def upserter(index, progress_path):
+    return PineconeUpserter(index, batch_size=5, progress_path=progress_path)
+
+
+def test_resume_skips_chunks_already_upserted(progress_path):
+    index, embeddings = LocalPineconeIndex(), HashingEmbeddings(16)
+    with pytest.raises(Interrupted):
+        upserter(index, progress_path).upsert_documents(interrupted_after(index, documents(20), 10), embeddings, TARGET)
+    
+    # Requests running at the interruption finish and are recorded
+    progress = UpsertProgress(progress_path, TARGET)
+    assert set(progress.open()) == {f"a.pdf#{i}" for i in range(10)}
+    progress.close(completed=False)
+    
+    # The ten chunks left, plus one recorded chunk whose text changed since
+    upserted = upserter(index, progress_path).upsert_documents([documents(20, changed={3})], embeddings, TARGET)
+    assert upserted == 11
+    assert index.fetch(["a.pdf#3"])["vectors"]["a.pdf#3"]["metadata"]["text"] == "chunk 3 text revised"
+    assert index.describe_index_stats()["total_vector_count"] == 20
+
+
+def test_progress_for_another_target_is_ignored(progress_path):
+    index, embeddings = LocalPineconeIndex(), HashingEmbeddings(16)
+    with pytest.raises(Interrupted):
+        upserter(index, progress_path).upsert_documents(interrupted_after(index, documents(10), 5), embeddings, TARGET)
+    
+    upserted = upserter(index, progress_path).upsert_documents([documents(10)], embeddings, {"index": "other"})
+    assert upserted == 10
+
+
+def test_torn_header_starts_over(progress_path):
+    with open(progress_path, "w") as f:
+        f.write('{"format": 2, "tar')
+    upserted = upserter(LocalPineconeIndex(), progress_path).upsert_documents([documents(4)], HashingEmbeddings(16), TARGET)
+    assert upserted == 4
+
+
+def test_content_digest_tracks_chunk_content():
+    def digest(docs):
+        loader = PineconeUpserter(LocalPineconeIndex(), batch_size=5)
+        loader.upsert_documents([docs], HashingEmbeddings(16))
+        return loader.content_digest
+    
+    assert digest(documents(6)) == digest(documents(6))
+    assert digest(documents(6)) != digest(documents(6, changed={2}))
+
+
+def test_version_record_does_not_count_as_chunks():
+    pytest.importorskip("langchain_pinecone")
+    pytest.importorskip("faiss")
+    from utils.vector_store import VectorStoreManager
+    
+    index = LocalPineconeIndex()
+    manager = VectorStoreManager(
+        vector_db_type="pinecone", pinecone_index=index, embedding_backend="hash", query_cache_size=0
+    )
+    manager.create_vector_store(iter(documents(6)))
+    assert manager.pinecone_vector_count() == 6 and manager.pinecone_index_version() is not None
+    
+    index.delete(ids=[f"a.pdf#{i}" for i in range(6)])
+    assert index.describe_index_stats()["total_vector_count"] == 1
+    assert manager.pinecone_vector_count() == 0
@@ -0,0 +1,56 @@
+"""The precomputed retrieval table returns what a live search would."""
+
+import random
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from langchain.schema import Document
+
+from utils.vector_store import VectorStoreManager
+from utils.chunk_tags import tag_chunk
+from utils.index_manifest import chunk_document_id
+from backend.retrieval_table import RetrievalTable, enumerate_profiles, format_user_query, tag_filters, top_up
+
+WORDS = (
+    "acne pimples redness rosacea wrinkles retinol niacinamide pores texture dull radiance oily dry "
+    "sensitive natural spots pigmentation sunscreen ceramides moisturizer"
+).split()
+K = 5
+
+
+def corpus():
+    rng = random.Random(0)
+    docs = []
+    for source in range(5):
+        for i in range(40):
+            text = " ".join(rng.choices(WORDS, k=30))
+            docs.append(Document(
+                page_content=text,
+                metadata={"source": f"f{source}.pdf", "chunk_id": i, "total_chunks": 40, **tag_chunk(text)}
+            ))
+    return docs
+
+
+def live_search(manager, profile, use_tag_filter):
+    query = format_user_query(profile)
+    strict, relaxed = tag_filters(profile) if use_tag_filter else (None, None)
+    docs = manager.similarity_search(query, k=K, filter=strict)
+    if len(docs) < K and strict != relaxed:
+        top_up(docs, manager.similarity_search(query, k=K, filter=relaxed), K)
+    return [chunk_document_id(doc) for doc in docs]
+
+
+@pytest.mark.parametrize("use_tag_filter", [False, True])
+@pytest.mark.parametrize("retrieval_mode", ["dense", "hybrid"])
+def test_table_matches_live_search(tmp_path, retrieval_mode, use_tag_filter):
+    manager = VectorStoreManager(embedding_backend="hash", query_cache_size=0, retrieval_mode=retrieval_mode)
+    manager.create_vector_store(iter(corpus()))
+    manager.save_vector_store(str(tmp_path))
+    store = manager.load_vector_store(str(tmp_path))
+    
+    table = RetrievalTable.build(manager, k=K, max_concerns=2, use_tag_filter=use_tag_filter)
+    for profile in enumerate_profiles(2):
+        precomputed = [chunk_document_id(store.chunks.get(p)) for p in table.lookup(profile, K)]
+        assert precomputed == live_search(manager, profile, use_tag_filter)
@@ -0,0 +1,109 @@
+"""Coalescing of concurrent calls by SingleFlight and AsyncSingleFlight."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def wait_for_calls(flights, calls: int) -> None:
+    deadline = time.monotonic() + 5
+    while flights.calls < calls and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_threads_share_one_execution_and_get_copies():
+    flights = SingleFlight()
+    release = threading.Event()
+    executions = []
+    
+    def work():
+        executions.append(1)
+        release.wait(5)
+        return {"steps": ["cleanse"]}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.run("key", work))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    wait_for_calls(flights, 10)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(executions) == 1
+    assert results == [{"steps": ["cleanse"]}] * 10
+    results[0]["steps"].append("changed")
+    assert results[1] == {"steps": ["cleanse"]}
+    assert flights.stats()["coalesced"] == 9 and flights.stats()["in_flight"] == 0
+    
+    # The key is free again once the call finished: nothing is cached
+    flights.run("key", work)
+    assert len(executions) == 2
+
+
+def test_threads_share_the_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+    
+    def fail():
+        release.wait(5)
+        raise RuntimeError("boom")
+    
+    errors = []
+    
+    def call():
+        try:
+            flights.run("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for_calls(flights, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3 and flights.stats()["executions"] == 1
+
+
+def test_async_callers_coalesce_per_key():
+    async def main():
+        flights = AsyncSingleFlight()
+        executions = []
+        
+        async def work():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return {"tips": ["sleep"]}
+        
+        results = await asyncio.gather(*[flights.run("a", work) for _ in range(20)], flights.run("b", work))
+        assert results == [{"tips": ["sleep"]}] * 21
+        assert len(executions) == 2
+        assert flights.stats()["coalesced"] == 19 and flights.stats()["in_flight"] == 0
+    
+    asyncio.run(main())
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def main():
+        flights = AsyncSingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        leader = asyncio.ensure_future(flights.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+    
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+"""IncrementalJSONParser against the full parse of the same text."""
+
+import json
+import random
+
+from utils.streaming_json import IncrementalJSONParser, JSONItem
+
+OBJECT = (
+    '{\n "morning_routine": ["Wash with a gentle \\"cleanser\\"", "Apply SPF 30, daily"],\n'
+    ' "evening_routine": [],\n "score": 3.5, "ok": true, "nested": {"a": ["x"]},\n'
+    ' "warnings": ["See a \\u00e9 derm"]\n}'
+)
+TEXT = "Sure!\n```json\n" + OBJECT + '\n```\ntrailing {"x": 1}'
+
+
+def test_emits_top_level_fields_and_list_elements():
+    items = IncrementalJSONParser().feed(TEXT)
+    expected = json.loads(OBJECT)
+    
+    assert [item.value for item in items if item.field == "morning_routine"] == expected["morning_routine"]
+    assert JSONItem("morning_routine", 1, "Apply SPF 30, daily") in items
+    assert JSONItem("warnings", 0, expected["warnings"][0]) in items
+    assert JSONItem("score", None, 3.5) in items
+    assert JSONItem("ok", None, True) in items
+    assert not any(item.field in ("evening_routine", "nested", "x") for item in items)
+
+
+def test_chunking_does_not_change_the_items():
+    whole = IncrementalJSONParser().feed(TEXT)
+    for seed in range(50):
+        rng = random.Random(seed)
+        parser, items, i = IncrementalJSONParser(), [], 0
+        while i < len(TEXT):
+            n = rng.randint(1, 6)
+            items += parser.feed(TEXT[i:i + n])
+            i += n
+        assert items == whole
+
+
+def test_stops_after_the_object_closes():
+    parser = IncrementalJSONParser()
+    parser.feed('{"tips": ["a"]}')
+    assert parser.done
+    assert parser.feed('{"tips": ["b"]}') == []
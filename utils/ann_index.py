@@ -0,0 +1,355 @@
+"""FAISS index types for the local vector store: exact flat, IVF and HNSW, optionally compressed."""
+
+from dataclasses import dataclass
+from typing import Any, Dict
+import logging
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf-flat", "ivf-pq", "hnsw")
+COMPRESSIONS = ("none", "fp16", "sq8", "pq")
+
+# Settings each index type is built with
+BUILD_PARAMS = {
+    "flat": (),
+    "ivf-flat": ("nlist",),
+    "ivf-pq": ("nlist", "pq_m", "pq_bits"),
+    "hnsw": ("hnsw_m", "ef_construction"),
+}
+
+SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# FAISS wants at least this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+# Filters matching at least this fraction of the corpus are applied after an
+# oversampled search; more selective ones restrict the search itself
+POST_FILTER_MIN_FRACTION = 0.3
+# Filters matching less than this fraction scan every IVF list, which is
+# cheap because only the selected vectors are compared
+FULL_PROBE_MAX_FRACTION = 0.02
+
+
+@dataclass
+class IndexConfig:
+    """Which FAISS index to build and how to search it.
+
+    - ``flat``: exact search, cost linear in the corpus (default)
+    - ``ivf-flat``: vectors bucketed into ``nlist`` k-means cells; a query
+      scans the ``nprobe`` nearest cells
+    - ``ivf-pq``: IVF with vectors product-quantized into ``pq_m`` codes of
+      ``pq_bits`` bits each, much smaller but approximate distances
+    - ``hnsw``: graph index with ``hnsw_m`` links per node; ``ef_search``
+      sets the size of the candidate list walked per query
+
+    ``compression`` stores the vectors of the index as ``fp16`` (2 bytes
+    per dimension), ``sq8`` (1 byte) or ``pq`` codes instead of float32.
+    Compressed indexes (including ``ivf-pq``) keep the full vectors on disk
+    and re-rank the best ``k * rerank_factor`` candidates by exact distance.
+
+    ``nprobe``, ``ef_search`` and ``rerank_factor`` are query-time settings
+    and can change without rebuilding the index.
+    """
+    index_type: str = "flat"
+    nlist: int = 1024
+    pq_m: int = 48
+    pq_bits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    compression: str = "none"
+    nprobe: int = 16
+    ef_search: int = 64
+    rerank_factor: int = 4
+    
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{self.index_type}'. Available: {', '.join(INDEX_TYPES)}")
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{self.compression}'. Available: {', '.join(COMPRESSIONS)}")
+        if self.index_type == "ivf-pq" and self.compression != "none":
+            raise ValueError("ivf-pq already stores PQ codes; leave compression at 'none'")
+    
+    @classmethod
+    def from_settings(cls, settings: Any) -> "IndexConfig":
+        """Read the ``INDEX_*`` settings, falling back to the defaults."""
+        defaults = cls()
+        return cls(
+            index_type=getattr(settings, "INDEX_TYPE", defaults.index_type),
+            nlist=getattr(settings, "INDEX_NLIST", defaults.nlist),
+            pq_m=getattr(settings, "INDEX_PQ_M", defaults.pq_m),
+            pq_bits=getattr(settings, "INDEX_PQ_BITS", defaults.pq_bits),
+            hnsw_m=getattr(settings, "INDEX_HNSW_M", defaults.hnsw_m),
+            ef_construction=getattr(settings, "INDEX_EF_CONSTRUCTION", defaults.ef_construction),
+            compression=getattr(settings, "INDEX_COMPRESSION", defaults.compression),
+            nprobe=getattr(settings, "INDEX_NPROBE", defaults.nprobe),
+            ef_search=getattr(settings, "INDEX_EF_SEARCH", defaults.ef_search),
+            rerank_factor=getattr(settings, "INDEX_RERANK_FACTOR", defaults.rerank_factor)
+        )
+    
+    @property
+    def codec(self) -> str:
+        """How vectors are stored in the index: ``flat``, ``fp16``, ``sq8`` or ``pq``."""
+        if self.index_type == "ivf-pq":
+            return "pq"
+        return "flat" if self.compression == "none" else self.compression
+    
+    @property
+    def compressed(self) -> bool:
+        return self.codec != "flat"
+    
+    def build_params(self) -> Dict[str, Any]:
+        """Parameters baked into a built index (query-time settings excluded)."""
+        params = {"index_type": self.index_type}
+        for key in BUILD_PARAMS[self.index_type]:
+            params[key] = getattr(self, key)
+        if self.compression != "none":
+            params["compression"] = self.compression
+            if self.compression == "pq":
+                params.update(pq_m=self.pq_m, pq_bits=self.pq_bits)
+        return params
+    
+    def search_params(self) -> Dict[str, Any]:
+        """Query-time settings that affect this index's results."""
+        params = {}
+        if self.index_type.startswith("ivf"):
+            params["nprobe"] = self.nprobe
+        if self.index_type == "hnsw":
+            params["ef_search"] = self.ef_search
+        if self.compressed:
+            params["rerank_factor"] = self.rerank_factor
+        return params
+
+
+def build_index(vectors: np.ndarray, config: IndexConfig) -> faiss.Index:
+    """Build (and train, if needed) an L2 index of ``config.index_type`` over ``vectors``.
+
+    Vectors keep their order, so position ``i`` in the index is row ``i``.
+    IVF indexes use fewer cells than ``nlist`` when there are too few
+    vectors to train them, and PQ falls back to 8-bit scalar quantization
+    below the ``2 ** pq_bits`` points PQ training needs. A compressed flat
+    index is built as an IVF with a single list, which is searched
+    exhaustively and can be memory-mapped.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dimension = vectors.shape
+    codec = config.codec
+    
+    if codec == "pq":
+        if dimension % config.pq_m:
+            raise ValueError(f"pq_m={config.pq_m} must divide the embedding dimension {dimension}")
+        if count < 2 ** config.pq_bits:
+            logger.warning(f"Only {count} vectors, too few to train PQ; using 8-bit scalar quantization instead")
+            codec = "sq8"
+    
+    if config.index_type == "flat" and codec == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif config.index_type == "hnsw":
+        if codec == "flat":
+            index = faiss.IndexHNSWFlat(dimension, config.hnsw_m)
+        elif codec == "pq":
+            index = faiss.IndexHNSWPQ(dimension, config.pq_m, config.hnsw_m)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, SCALAR_QUANTIZERS[codec], config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+        index.train(vectors)
+    else:
+        if config.index_type == "flat":
+            nlist = 1
+        else:
+            nlist = max(1, min(config.nlist, count // MIN_POINTS_PER_CENTROID))
+            if nlist < config.nlist:
+                logger.info(f"Using {nlist} IVF cells instead of {config.nlist} for {count} vectors")
+        quantizer = faiss.IndexFlatL2(dimension)
+        if codec == "flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        elif codec == "pq":
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, config.pq_m, config.pq_bits)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, SCALAR_QUANTIZERS[codec])
+        index.train(vectors)
+    
+    index.add(vectors)
+    apply_search_params(index, config)
+    logger.info(
+        f"Built {describe_index(index)} over {count} vectors, "
+        f"{code_bytes_per_vector(index)} bytes per vector (float32: {dimension * 4})"
+    )
+    return index
+
+
+def rerank_exact(query: np.ndarray, candidates: np.ndarray, vectors: np.ndarray, k: int):
+    """Re-rank candidate positions by exact L2 distance to ``query``.
+
+    ``vectors`` may be memory-mapped; only the candidate rows are read.
+    Returns ``(distances, positions)`` of the best ``k``.
+    """
+    positions = np.sort(candidates[candidates != -1])
+    distances = ((np.asarray(vectors[positions]) - query) ** 2).sum(axis=1)
+    order = np.argsort(distances, kind="stable")[:k]
+    return distances[order], positions[order]
+
+
+def search_filtered(index: faiss.Index, queries: np.ndarray, k: int, mask: np.ndarray):
+    """Search only the positions where ``mask`` is True.
+    
+    Broad filters search ``k`` scaled up by the inverse of the matching
+    fraction and drop the rest; selective ones pass an ``IDSelectorBitmap``
+    so FAISS only compares selected vectors, probing every IVF list when
+    the selection is small enough that the nearest lists might miss it.
+    Returns ``(distances, positions)`` padded with -1 like ``index.search``.
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    matching = int(mask.sum())
+    if matching == 0 or index.ntotal == 0:
+        return (np.full((len(queries), k), np.inf, dtype=np.float32),
+                np.full((len(queries), k), -1, dtype=np.int64))
+    
+    fraction = matching / index.ntotal
+    if fraction >= POST_FILTER_MIN_FRACTION:
+        fetch = min(index.ntotal, int(np.ceil(k / fraction * 2)))
+        distances, positions = index.search(queries, fetch)
+        keep = (positions != -1) & mask[np.maximum(positions, 0)]
+        if (keep.sum(axis=1) >= min(k, matching)).all():
+            return _first_k(distances, positions, keep, k)
+    
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    ivf = _extract_ivf(index)
+    hnsw = _extract_hnsw(index)
+    if ivf is not None:
+        nprobe = ivf.nlist if fraction < FULL_PROBE_MAX_FRACTION else ivf.nprobe
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    elif hnsw is not None:
+        # Unselected nodes are still walked; widen the candidate list so k selected ones are reached
+        ef_search = min(index.ntotal, max(hnsw.hnsw.efSearch, int(np.ceil(k / fraction))))
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(queries, k, params=params)
+
+
+def _first_k(distances: np.ndarray, positions: np.ndarray, keep: np.ndarray, k: int):
+    """The first ``k`` kept results of each row, padded with -1."""
+    out_distances = np.full((len(positions), k), np.inf, dtype=np.float32)
+    out_positions = np.full((len(positions), k), -1, dtype=np.int64)
+    for row in range(len(positions)):
+        kept = np.flatnonzero(keep[row])[:k]
+        out_distances[row, :len(kept)] = distances[row, kept]
+        out_positions[row, :len(kept)] = positions[row, kept]
+    return out_distances, out_positions
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig) -> None:
+    """Set the query-time ``nprobe`` / ``efSearch`` on an IVF or HNSW index."""
+    ivf = _extract_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(config.nprobe, ivf.nlist)
+    hnsw = _extract_hnsw(index)
+    if hnsw is not None:
+        hnsw.hnsw.efSearch = config.ef_search
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """HNSW graphs cannot drop vectors; flat and IVF indexes can."""
+    return _extract_hnsw(index) is None
+
+
+def renumber_after_remove(index: faiss.Index) -> None:
+    """Make IVF ids contiguous again after ``remove_ids``.
+    
+    Flat indexes shift the remaining vectors down on removal, and LangChain's
+    ``FAISS.delete`` assumes that when it renumbers its position-to-docstore
+    mapping. IVF lists keep the original ids instead, so map each remaining
+    id to its rank among the survivors, which is the position LangChain
+    gives it.
+    """
+    ivf = _extract_ivf(index)
+    if ivf is None:
+        return
+    
+    invlists = ivf.invlists
+    list_ids = []
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        list_ids.append(faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy())
+    
+    remaining = np.sort(np.concatenate(list_ids)) if list_ids else np.zeros(0, dtype=np.int64)
+    for list_no, ids in enumerate(list_ids):
+        if not len(ids):
+            continue
+        new_ids = np.searchsorted(remaining, ids).astype(np.int64)
+        codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), len(ids) * invlists.code_size).copy()
+        invlists.update_entries(list_no, 0, len(ids), faiss.swig_ptr(new_ids), faiss.swig_ptr(codes))
+
+
+def to_flat(index: faiss.Index) -> faiss.Index:
+    """Exact flat copy of an index whose vectors can be reconstructed losslessly."""
+    flat = faiss.IndexFlatL2(index.d)
+    if index.ntotal:
+        flat.add(index.reconstruct_n(0, index.ntotal))
+    return flat
+
+
+def to_mmappable(index: faiss.Index) -> faiss.Index:
+    """Index to save for memory-mapped loading.
+    
+    FAISS can map IVF lists straight from the index file but reads flat
+    storage into RAM, so a flat index is saved as an IVF with a single list,
+    which every query scans exhaustively: the results are still exact.
+    """
+    index = faiss.downcast_index(index)
+    if not isinstance(index, faiss.IndexFlat):
+        return index
+    
+    quantizer = faiss.IndexFlatL2(index.d)
+    quantizer.add(np.zeros((1, index.d), dtype=np.float32))
+    ivf = faiss.IndexIVFFlat(quantizer, index.d, 1, index.metric_type)
+    ivf.is_trained = True
+    if index.ntotal:
+        ivf.add(index.reconstruct_n(0, index.ntotal))
+    return ivf
+
+
+def code_bytes_per_vector(index: faiss.Index) -> int:
+    """Bytes each vector's code takes in the index (ids and graph links excluded)."""
+    ivf = _extract_ivf(index)
+    if ivf is not None:
+        return ivf.code_size
+    hnsw = _extract_hnsw(index)
+    if hnsw is not None:
+        index = faiss.downcast_index(hnsw.storage)
+    return getattr(index, "code_size", index.d * 4)
+
+
+def describe_index(index: faiss.Index) -> str:
+    ivf = _extract_ivf(index)
+    if ivf is not None:
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            kind = "IVF-PQ"
+        elif isinstance(ivf, faiss.IndexIVFScalarQuantizer):
+            kind = "IVF-SQ"
+        else:
+            kind = "IVF-Flat"
+        return f"{kind} index (nlist={ivf.nlist}, nprobe={ivf.nprobe})"
+    hnsw = _extract_hnsw(index)
+    if hnsw is not None:
+        return f"HNSW index (efSearch={hnsw.hnsw.efSearch})"
+    return f"{type(index).__name__} index"
+
+
+def _extract_ivf(index: faiss.Index):
+    try:
+        return faiss.downcast_index(faiss.extract_index_ivf(index))
+    except RuntimeError:
+        return None
+
+
+def _extract_hnsw(index: faiss.Index):
+    index = faiss.downcast_index(index)
+    return index if isinstance(index, faiss.IndexHNSW) else None
@@ -0,0 +1,151 @@
+"""In-process BM25 lexical index over chunk text, and rank fusion with dense results."""
+
+import json
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when tokenization or the file layout changes, so indexes are rebuilt
+BM25_VERSION = 1
+
+LEXICON_FILENAME = "bm25.json"
+BM25_POSTINGS_FILENAME = "bm25_postings.npy"
+BM25_FREQS_FILENAME = "bm25_freqs.npy"
+BM25_LENGTHS_FILENAME = "bm25_lengths.npy"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their this to was were "
+    "which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords; ``large_pores`` gives ``large``, ``pores``."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over chunks by index position, memory-mapped.
+
+    ``bm25_postings.npy`` holds each term's positions back to back,
+    ``bm25_freqs.npy`` the matching term frequencies, ``bm25_lengths.npy``
+    the token count of every chunk, and ``bm25.json`` the ``[start, end)``
+    slice of each term. A query reads only the posting lists of its terms.
+    """
+    
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        path = Path(path)
+        with open(path / LEXICON_FILENAME) as f:
+            info = json.load(f)
+        self.count = info["count"]
+        self.terms: Dict[str, List[int]] = info["terms"]
+        self.postings = np.load(path / BM25_POSTINGS_FILENAME, mmap_mode="r")
+        self.freqs = np.load(path / BM25_FREQS_FILENAME, mmap_mode="r")
+        lengths = np.load(path / BM25_LENGTHS_FILENAME)
+        self.k1 = k1
+        self.b = b
+        # Per-chunk length normalization, the same for every query
+        average = float(lengths.mean()) if len(lengths) else 1.0
+        self._norm = (k1 * (1 - b + b * lengths / max(average, 1e-9))).astype(np.float32)
+    
+    def matches(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """``(positions, scores)`` of the chunks matching any term of ``query``, by ascending position.
+        
+        Only the posting lists of the query's terms are read, so the cost
+        grows with their length, not with the corpus.
+        """
+        touched = []
+        contributions = []
+        for term in set(tokenize(query)):
+            start, end = self.terms.get(term, (0, 0))
+            if start == end:
+                continue
+            positions = np.asarray(self.postings[start:end])
+            freqs = np.asarray(self.freqs[start:end], dtype=np.float32)
+            df = end - start
+            idf = np.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            touched.append(positions)
+            contributions.append(idf * freqs * (self.k1 + 1) / (freqs + self._norm[positions]))
+        if not touched:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        
+        positions, slots = np.unique(np.concatenate(touched), return_inverse=True)
+        scores = np.zeros(len(positions), dtype=np.float32)
+        # Adds in term order, the same float32 sums as accumulating term by term
+        np.add.at(scores, slots, np.concatenate(contributions))
+        return positions, scores
+    
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top ``k`` ``(scores, positions)`` for ``query``, best first, among chunks where ``mask`` is True."""
+        positions, scores = self.matches(query)
+        keep = scores > 0
+        if mask is not None:
+            keep &= mask[positions]
+        positions, scores = positions[keep], scores[keep]
+        if len(positions) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            positions, scores = positions[top], scores[top]
+        # Ties go to the lower position
+        order = np.lexsort((positions, -scores))
+        return scores[order], positions[order]
+    
+    @staticmethod
+    def write(path: str, postings: Dict[str, List[Tuple[int, int]]], lengths: List[int], suffix: str = "") -> None:
+        path = Path(path)
+        terms = {}
+        positions = []
+        freqs = []
+        for term in sorted(postings):
+            terms[term] = [len(positions), len(positions) + len(postings[term])]
+            for position, freq in postings[term]:
+                positions.append(position)
+                freqs.append(freq)
+        
+        with open(path / (BM25_POSTINGS_FILENAME + suffix), "wb") as f:
+            np.save(f, np.asarray(positions, dtype=np.int64))
+        with open(path / (BM25_FREQS_FILENAME + suffix), "wb") as f:
+            np.save(f, np.asarray(freqs, dtype=np.uint16))
+        with open(path / (BM25_LENGTHS_FILENAME + suffix), "wb") as f:
+            np.save(f, np.asarray(lengths, dtype=np.float32))
+        with open(path / (LEXICON_FILENAME + suffix), "w") as f:
+            json.dump({"version": BM25_VERSION, "count": len(lengths), "terms": terms}, f)
+
+
+class BM25Builder:
+    """Collects term postings while chunks are written in index order."""
+    
+    def __init__(self):
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+    
+    def add(self, text: str) -> None:
+        tokens = tokenize(text)
+        position = len(self.lengths)
+        for term, freq in Counter(tokens).items():
+            self.postings[term].append((position, min(freq, np.iinfo(np.uint16).max)))
+        self.lengths.append(len(tokens))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int, rrf_k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked position lists: each item scores ``sum(1 / (rrf_k + rank))``.
+
+    Returns the top ``k`` ``(position, score)`` pairs, best first; -1
+    padding in the rankings is ignored.
+    """
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        rank = 0
+        for position in ranking:
+            if position < 0:
+                continue
+            rank += 1
+            fused[int(position)] += 1.0 / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
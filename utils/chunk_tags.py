@@ -0,0 +1,174 @@
+"""Concern and ingredient tags extracted from chunk text, and filters over them."""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bump when the vocabularies change, so indexes are re-tagged
+TAGS_VERSION = 2
+
+# Concern tag (the ``SkinConcern`` values) -> phrases that indicate it
+CONCERN_TERMS: Dict[str, List[str]] = {
+    "acne": ["acne", "pimple", "pimples", "breakout", "breakouts", "comedone", "comedones",
+             "blackhead", "blackheads", "whitehead", "whiteheads", "blemish", "blemishes"],
+    "pigmentation": ["pigmentation", "hyperpigmentation", "melasma", "discoloration", "discolouration"],
+    "wrinkles": ["wrinkle", "wrinkles", "fine lines", "photoaging", "photoageing", "anti-aging", "anti-ageing"],
+    "dullness": ["dullness", "dull skin", "radiance", "lackluster", "sallow"],
+    "dark_spots": ["dark spot", "dark spots", "age spot", "age spots", "sun spot", "sun spots",
+                   "sunspots", "lentigines", "post-inflammatory hyperpigmentation"],
+    "redness": ["redness", "rosacea", "erythema", "flushing", "inflammation", "irritation"],
+    "large_pores": ["pore", "pores", "enlarged pores", "large pores"],
+    "uneven_texture": ["texture", "uneven texture", "rough skin", "roughness", "bumpy"],
+}
+
+# Ingredient tag -> names it goes by
+INGREDIENT_TERMS: Dict[str, List[str]] = {
+    "retinoids": ["retinol", "retinoid", "retinoids", "tretinoin", "adapalene", "retinal",
+                  "retinaldehyde", "tazarotene", "vitamin a"],
+    "niacinamide": ["niacinamide", "nicotinamide", "vitamin b3"],
+    "salicylic_acid": ["salicylic acid", "bha", "beta hydroxy acid", "beta-hydroxy acid"],
+    "glycolic_acid": ["glycolic acid"],
+    "lactic_acid": ["lactic acid"],
+    "aha": ["aha", "ahas", "alpha hydroxy acid", "alpha hydroxy acids", "alpha-hydroxy acid"],
+    "benzoyl_peroxide": ["benzoyl peroxide"],
+    "azelaic_acid": ["azelaic acid"],
+    "hyaluronic_acid": ["hyaluronic acid", "sodium hyaluronate", "hyaluronan"],
+    "vitamin_c": ["vitamin c", "ascorbic acid", "ascorbyl"],
+    "vitamin_e": ["vitamin e", "tocopherol"],
+    "ceramides": ["ceramide", "ceramides"],
+    "peptides": ["peptide", "peptides"],
+    "hydroquinone": ["hydroquinone"],
+    "kojic_acid": ["kojic acid"],
+    "sulfur": ["sulfur", "sulphur"],
+    "zinc_oxide": ["zinc oxide"],
+    "titanium_dioxide": ["titanium dioxide"],
+    "fragrance": ["fragrance", "fragrances", "perfume", "parfum"],
+    "essential_oils": ["essential oil", "essential oils"],
+    "tea_tree_oil": ["tea tree oil", "tea tree"],
+    "alcohol": ["alcohol", "ethanol", "denatured alcohol", "alcohol denat"],
+    "sulfates": ["sulfate", "sulfates", "sodium lauryl sulfate", "sls"],
+    "parabens": ["paraben", "parabens"],
+    "lanolin": ["lanolin"],
+    "urea": ["urea"],
+    "squalane": ["squalane", "squalene"],
+    "shea_butter": ["shea butter"],
+    "coconut_oil": ["coconut oil"],
+    "aloe_vera": ["aloe vera", "aloe"],
+    "centella": ["centella asiatica", "centella", "cica"],
+    "green_tea": ["green tea", "egcg"],
+    "licorice": ["licorice", "liquorice", "glabridin"],
+    "arbutin": ["arbutin", "alpha arbutin"],
+}
+
+# Phrases that make a sentence a caution about the ingredients it names
+CAUTION_TERMS: List[str] = [
+    "avoid", "avoided", "avoiding", "allergy", "allergies", "allergic", "allergen", "contraindicated",
+    "contraindication", "contraindications", "irritant", "irritation", "irritating", "sensitization",
+    "sensitisation", "sensitizer", "sensitiser", "contact dermatitis", "hypersensitivity", "adverse",
+    "side effect", "side effects", "reaction", "reactions", "do not use", "should not", "not recommended",
+    "caution", "warning", "patch test",
+]
+
+
+def _compile(terms: Dict[str, List[str]]) -> Tuple[re.Pattern, Dict[str, str]]:
+    """One alternation over every phrase, longest first, and a phrase -> tag lookup."""
+    lookup = {phrase: tag for tag, phrases in terms.items() for phrase in phrases}
+    alternation = "|".join(re.escape(phrase) for phrase in sorted(lookup, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE), lookup
+
+
+_CONCERN_PATTERN, _CONCERN_LOOKUP = _compile(CONCERN_TERMS)
+_INGREDIENT_PATTERN, _INGREDIENT_LOOKUP = _compile(INGREDIENT_TERMS)
+_CAUTION_PATTERN, _ = _compile({"caution": CAUTION_TERMS})
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+|\n\s*\n")
+
+
+def _find(pattern: re.Pattern, lookup: Dict[str, str], text: str) -> List[str]:
+    return sorted({lookup[match.lower()] for match in pattern.findall(text)})
+
+
+def _cautioned(text: str) -> List[str]:
+    """Ingredient tags named in a sentence that warns about them (allergy, irritation, avoid...)."""
+    tags = set()
+    for sentence in _SENTENCE_BREAK.split(text):
+        if _CAUTION_PATTERN.search(sentence):
+            tags.update(_find(_INGREDIENT_PATTERN, _INGREDIENT_LOOKUP, sentence))
+    return sorted(tags)
+
+
+def tag_chunk(text: str) -> Dict[str, List[str]]:
+    """Concern and ingredient tags mentioned in a chunk, as metadata fields.
+    
+    ``cautions`` are the ingredients the chunk warns about rather than
+    recommends; retrieval keeps those chunks for users avoiding them.
+    """
+    return {
+        "concerns": _find(_CONCERN_PATTERN, _CONCERN_LOOKUP, text),
+        "ingredients": _find(_INGREDIENT_PATTERN, _INGREDIENT_LOOKUP, text),
+        "cautions": _cautioned(text),
+    }
+
+
+def ingredient_tags(names: Iterable[str]) -> List[str]:
+    """Ingredient tags for free-text ingredient names; names outside the vocabulary are dropped."""
+    tags = set()
+    for name in names:
+        tags.update(_find(_INGREDIENT_PATTERN, _INGREDIENT_LOOKUP, name))
+        # Also accept the tag names themselves, e.g. "salicylic_acid"
+        tag = name.strip().lower().replace(" ", "_")
+        if tag in INGREDIENT_TERMS:
+            tags.add(tag)
+    return sorted(tags)
+
+
+@dataclass(frozen=True)
+class TagFilter:
+    """Chunk filter on tags.
+
+    A chunk matches when it comes from one of ``sources`` (if given), has
+    any of ``concerns`` (if given), any of ``ingredients`` (if given), and
+    none of ``exclude_ingredients``.
+    """
+    sources: Tuple[str, ...] = ()
+    concerns: Tuple[str, ...] = ()
+    ingredients: Tuple[str, ...] = ()
+    exclude_ingredients: Tuple[str, ...] = ()
+    
+    @classmethod
+    def create(cls, sources: Iterable[str] = (), concerns: Iterable[str] = (), ingredients: Iterable[str] = (),
+               exclude_ingredients: Iterable[str] = ()) -> Optional["TagFilter"]:
+        """Build a canonical filter (sorted, deduplicated); None when it filters nothing."""
+        tag_filter = cls(
+            sources=tuple(sorted(set(sources))),
+            concerns=tuple(sorted(set(concerns))),
+            ingredients=tuple(sorted(set(ingredients))),
+            exclude_ingredients=tuple(sorted(set(exclude_ingredients)))
+        )
+        return tag_filter if tag_filter else None
+    
+    def __bool__(self) -> bool:
+        return bool(self.sources or self.concerns or self.ingredients or self.exclude_ingredients)
+    
+    def matches(self, metadata: Dict[str, Any]) -> bool:
+        if self.sources and metadata.get("source") not in self.sources:
+            return False
+        concerns = metadata.get("concerns", [])
+        ingredients = metadata.get("ingredients", [])
+        if self.concerns and not any(tag in concerns for tag in self.concerns):
+            return False
+        if self.ingredients and not any(tag in ingredients for tag in self.ingredients):
+            return False
+        return not any(tag in ingredients for tag in self.exclude_ingredients)
+    
+    def to_pinecone(self) -> Dict[str, Any]:
+        """Equivalent Pinecone metadata filter."""
+        conditions = []
+        if self.sources:
+            conditions.append({"source": {"$in": list(self.sources)}})
+        if self.concerns:
+            conditions.append({"concerns": {"$in": list(self.concerns)}})
+        if self.ingredients:
+            conditions.append({"ingredients": {"$in": list(self.ingredients)}})
+        if self.exclude_ingredients:
+            conditions.append({"ingredients": {"$nin": list(self.exclude_ingredients)}})
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
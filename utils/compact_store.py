@@ -0,0 +1,305 @@
+"""Pickle-free on-disk vector store that opens memory-mapped for fast cold start."""
+
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+
+from utils.ann_index import rerank_exact, search_filtered
+from utils.chunk_tags import TagFilter
+from utils.tag_index import TagIndex, TagPostingsBuilder, TAGS_FILENAME, POSTINGS_FILENAME
+from utils.bm25_index import (
+    BM25Index, BM25Builder, reciprocal_rank_fusion,
+    LEXICON_FILENAME, BM25_POSTINGS_FILENAME, BM25_FREQS_FILENAME, BM25_LENGTHS_FILENAME
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.faiss"
+CHUNKS_FILENAME = "chunks.bin"
+OFFSETS_FILENAME = "offsets.npy"
+VECTORS_FILENAME = "vectors.npy"
+STORE_INFO_FILENAME = "store.json"
+STORE_FORMAT_VERSION = 1
+# Metadata key of the index position on documents returned by searches
+POSITION_KEY = "store_position"
+
+
+def is_compact_store(path: str) -> bool:
+    return (Path(path) / STORE_INFO_FILENAME).exists()
+
+
+class ChunkStore:
+    """Chunk text and metadata stored by index position, read lazily.
+
+    ``chunks.bin`` holds one UTF-8 JSON record per chunk (``id``,
+    ``page_content``, ``metadata``) back to back, and ``offsets.npy`` the
+    ``n + 1`` byte offsets of the records. Both are memory-mapped, so
+    opening the store reads nothing and a lookup decodes only the records
+    asked for. Documents from ``get`` carry their position in
+    ``metadata[POSITION_KEY]``.
+    """
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.offsets = np.load(self.path / OFFSETS_FILENAME, mmap_mode="r")
+        self._file = open(self.path / CHUNKS_FILENAME, "rb")
+        # mmap can't map an empty file
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def _record(self, position: int) -> dict:
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return json.loads(self._data[start:end])
+    
+    def get(self, position: int) -> Document:
+        record = self._record(position)
+        return Document(page_content=record["page_content"], metadata={**record["metadata"], POSITION_KEY: int(position)})
+    
+    def get_with_id(self, position: int) -> Tuple[str, Document]:
+        record = self._record(position)
+        return record["id"], Document(page_content=record["page_content"], metadata=record["metadata"])
+    
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+        self.offsets = None
+    
+    @staticmethod
+    def write(path: str, records: Iterable[Tuple[str, Document]], suffix: str = "") -> None:
+        """Write ``(id, document)`` pairs in index order."""
+        path = Path(path)
+        offsets = [0]
+        with open(path / (CHUNKS_FILENAME + suffix), "wb") as f:
+            for doc_id, doc in records:
+                record = json.dumps(
+                    {"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata},
+                    ensure_ascii=False
+                ).encode("utf-8")
+                f.write(record)
+                offsets.append(offsets[-1] + len(record))
+        with open(path / (OFFSETS_FILENAME + suffix), "wb") as f:
+            np.save(f, np.array(offsets, dtype=np.int64))
+
+
+class CompactVectorStore:
+    """Read-only vector store over a memory-mapped FAISS index and a ``ChunkStore``.
+
+    Serves the same by-vector searches as LangChain's FAISS store (scores
+    are the raw L2 distances), but nothing is unpickled and nothing
+    proportional to the corpus is read at open: IVF lists are mapped from
+    the index file and chunk records are decoded only for the top-k hits.
+    
+    When the index is compressed, the full float32 vectors are kept in a
+    memory-mapped ``vectors.npy`` and the best ``k * rerank_factor``
+    candidates are re-ranked by exact distance, reading only those rows.
+    
+    Searches take an optional ``TagFilter``, evaluated on the ``TagIndex``
+    posting lists saved with the store. ``hybrid_search_with_score`` fuses
+    the dense results with the store's ``BM25Index``.
+    
+    A store being served is held with ``acquire`` / ``release`` around
+    each search; ``close`` waits for the last holder to release it.
+    """
+    
+    def __init__(self, index: faiss.Index, chunks: ChunkStore, vectors: Optional[np.ndarray] = None,
+                 rerank_factor: int = 4, tags: Optional[TagIndex] = None, lexical: Optional[BM25Index] = None):
+        self.index = index
+        self.chunks = chunks
+        self.vectors = vectors
+        self.rerank_factor = rerank_factor
+        self.tags = tags
+        self.lexical = lexical
+        self._users = 0
+        self._closing = False
+        self._closed = False
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = True, rerank_factor: int = 4) -> "CompactVectorStore":
+        with open(Path(path) / STORE_INFO_FILENAME) as f:
+            info = json.load(f)
+        if info.get("format") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector store format {info.get('format')} in {path}")
+        
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if use_mmap else 0
+        index = faiss.read_index(str(Path(path) / INDEX_FILENAME), io_flags)
+        if use_mmap and isinstance(faiss.downcast_index(index), faiss.IndexHNSW):
+            # Only IVF lists are mapped; every process holds its own copy of an HNSW graph
+            logger.info("HNSW index is read into memory and not shared between processes")
+        chunks = ChunkStore(path)
+        if index.ntotal != len(chunks):
+            raise ValueError(f"Index holds {index.ntotal} vectors but the chunk store {len(chunks)} chunks")
+        
+        vectors = None
+        if info.get("vectors"):
+            vectors = np.load(Path(path) / VECTORS_FILENAME, mmap_mode="r" if use_mmap else None)
+        tags = TagIndex(path) if (Path(path) / TAGS_FILENAME).exists() else None
+        lexical = BM25Index(path) if (Path(path) / LEXICON_FILENAME).exists() else None
+        return cls(index, chunks, vectors=vectors, rerank_factor=rerank_factor, tags=tags, lexical=lexical)
+    
+    def acquire(self) -> bool:
+        """Hold the store open for a search; False if it is already closed."""
+        with self._lock:
+            if self._closed:
+                return False
+            self._users += 1
+            return True
+    
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._closing and self._users == 0:
+                self._close_files()
+    
+    def close(self) -> None:
+        """Close the chunk file and drop the memory-mapped index, vectors and postings.
+        
+        Searches holding the store finish first: the files are closed when
+        the last of them releases it, or now if none does. The mappings are
+        released once nothing else references them.
+        """
+        with self._lock:
+            self._closing = True
+            if self._users == 0:
+                self._close_files()
+    
+    def _close_files(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.chunks.close()
+        self.index = self.vectors = self.tags = self.lexical = None
+    
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[TagFilter] = None) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)[None, :]
+        return self.similarity_search_with_score_by_vectors(query, k, filter=filter)[0]
+    
+    def similarity_search_with_score_by_vectors(self, embeddings: np.ndarray, k: int = 4,
+                                                filter: Optional[TagFilter] = None) -> List[List[Tuple[Document, float]]]:
+        """Search a matrix of query vectors in one FAISS call; one result list per row."""
+        ranked = self._dense_search(embeddings, k, self._filter_mask(filter))
+        return [
+            [
+                (self.chunks.get(int(position)), float(distance))
+                for distance, position in zip(row_distances, row_positions)
+                # FAISS pads with -1 when fewer than k vectors are found
+                if position != -1
+            ]
+            for row_distances, row_positions in ranked
+        ]
+    
+    def hybrid_search_with_score(self, embeddings: np.ndarray, queries: List[str], k: int = 4,
+                                 filter: Optional[TagFilter] = None, fetch_k: Optional[int] = None,
+                                 rrf_k: int = 60) -> List[List[Tuple[Document, float]]]:
+        """Reciprocal-rank fusion of dense and BM25 results, one list per query.
+        
+        The top ``fetch_k`` (default ``4 * k``) of each ranking are fused;
+        scores are fused RRF scores, higher is better. Falls back to dense
+        search when the store has no lexical index.
+        """
+        if self.lexical is None:
+            logger.warning("Vector store has no BM25 index; using dense search only")
+            return self.similarity_search_with_score_by_vectors(embeddings, k, filter=filter)
+        
+        fetch_k = max(fetch_k or 4 * k, k)
+        mask = self._filter_mask(filter)
+        dense = self._dense_search(embeddings, fetch_k, mask)
+        results = []
+        for query, (_, dense_positions) in zip(queries, dense):
+            _, lexical_positions = self.lexical.search(query, fetch_k, mask)
+            fused = reciprocal_rank_fusion([dense_positions, lexical_positions], k, rrf_k=rrf_k)
+            results.append([(self.chunks.get(position), score) for position, score in fused])
+        return results
+    
+    def _filter_mask(self, filter: Optional[TagFilter]) -> Optional[np.ndarray]:
+        if not filter:
+            return None
+        if self.tags is None:
+            logger.warning("Vector store has no tag index; ignoring the search filter")
+            return None
+        return self.tags.mask(filter)
+    
+    def _dense_search(self, embeddings: np.ndarray, k: int, mask: Optional[np.ndarray]):
+        """``(distances, positions)`` rows of the top ``k`` per query, re-ranked when compressed."""
+        queries = np.ascontiguousarray(embeddings, dtype=np.float32)
+        fetch = k * max(1, self.rerank_factor) if self.vectors is not None else k
+        
+        if mask is None:
+            distances, positions = self.index.search(queries, fetch)
+        else:
+            distances, positions = search_filtered(self.index, queries, fetch, mask)
+        
+        if self.vectors is not None:
+            return [rerank_exact(query, row, self.vectors, k) for query, row in zip(queries, positions)]
+        return list(zip(distances, positions))
+    
+    def iter_documents(self) -> Iterable[Tuple[str, Document]]:
+        """All ``(id, document)`` pairs in index order."""
+        for position in range(len(self.chunks)):
+            yield self.chunks.get_with_id(position)
+    
+    @staticmethod
+    def save(path: str, index: faiss.Index, records: Iterable[Tuple[str, Document]],
+             vectors: Optional[np.ndarray] = None) -> None:
+        """Write an index and its chunks in index order, replacing any previous store.
+
+        ``vectors`` are the full-precision vectors of a compressed index,
+        kept for re-ranking. Each file is written under a temporary name and
+        moved into place, ``store.json`` last.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        
+        faiss.write_index(index, str(path / (INDEX_FILENAME + suffix)))
+        
+        tags = TagPostingsBuilder()
+        lexical = BM25Builder()
+        
+        def indexed(records):
+            for doc_id, doc in records:
+                tags.add(doc.metadata)
+                lexical.add(doc.page_content)
+                yield doc_id, doc
+        
+        ChunkStore.write(str(path), indexed(records), suffix=suffix)
+        TagIndex.write(str(path), tags.postings, tags.count, suffix=suffix)
+        BM25Index.write(str(path), lexical.postings, lexical.lengths, suffix=suffix)
+        names = [INDEX_FILENAME, CHUNKS_FILENAME, OFFSETS_FILENAME, POSTINGS_FILENAME, TAGS_FILENAME,
+                 BM25_POSTINGS_FILENAME, BM25_FREQS_FILENAME, BM25_LENGTHS_FILENAME, LEXICON_FILENAME]
+        if vectors is not None:
+            with open(path / (VECTORS_FILENAME + suffix), "wb") as f:
+                np.save(f, np.asarray(vectors, dtype=np.float32))
+            names.append(VECTORS_FILENAME)
+        with open(path / (STORE_INFO_FILENAME + suffix), "w") as f:
+            json.dump({
+                "format": STORE_FORMAT_VERSION,
+                "count": index.ntotal,
+                "dimension": index.d,
+                "vectors": vectors is not None
+            }, f)
+        names.append(STORE_INFO_FILENAME)
+        
+        for name in names:
+            os.replace(path / (name + suffix), path / name)
+        
+        if vectors is None and (path / VECTORS_FILENAME).exists():
+            (path / VECTORS_FILENAME).unlink()
+        
+        # The pickled docstore of the old LangChain format is no longer used
+        legacy_docstore = path / "index.pkl"
+        if legacy_docstore.exists():
+            legacy_docstore.unlink()
@@ -0,0 +1,149 @@
+"""Near-duplicate chunk elimination with MinHash and locality-sensitive hashing."""
+
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+import logging
+
+import numpy as np
+from langchain.schema import Document
+
+from utils.index_manifest import chunk_document_id
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime 2^31 - 1: keeps a * x + b within uint64 for 32-bit hashes
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+@dataclass
+class DedupReport:
+    """How many chunks the dedup stage saw and dropped."""
+    chunks_seen: int = 0
+    chunks_dropped: int = 0
+    
+    @property
+    def chunks_kept(self) -> int:
+        return self.chunks_seen - self.chunks_dropped
+    
+    @property
+    def reduction(self) -> float:
+        return self.chunks_dropped / self.chunks_seen if self.chunks_seen else 0.0
+    
+    def describe(self, bytes_per_vector: int = 0) -> str:
+        message = (
+            f"Near-duplicate filter: kept {self.chunks_kept} of {self.chunks_seen} chunks, "
+            f"dropped {self.chunks_dropped} ({self.reduction * 100:.1f}% smaller index)"
+        )
+        if bytes_per_vector:
+            saved_mb = self.chunks_dropped * bytes_per_vector / (1024 * 1024)
+            message += f", ~{saved_mb:.1f} MB of vectors saved"
+        return message
+
+
+class NearDuplicateFilter:
+    """Streaming near-duplicate filter for chunk documents.
+
+    Each chunk is reduced to a MinHash signature over word shingles. LSH
+    banding finds earlier chunks that are likely similar, and a chunk whose
+    estimated Jaccard similarity with one of them reaches ``threshold`` is
+    dropped. The first chunk of each cluster is kept as its representative,
+    and ``duplicates`` maps each representative's ID to the IDs of the
+    chunks merged into it.
+    """
+    
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 5, seed: int = 42):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Dedup threshold must be in (0, 1], got {threshold}")
+        
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self.bands, self.rows = self._choose_bands(threshold, num_perm)
+        
+        self.reset()
+    
+    @staticmethod
+    def _choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+        """Pick the LSH banding whose similarity cut-off is closest to the threshold."""
+        best = (num_perm, 1)
+        best_error = float("inf")
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            # Similarity at which a pair becomes a candidate with probability ~1/2
+            cutoff = (1.0 / bands) ** (1.0 / rows)
+            error = abs(cutoff - threshold)
+            if error < best_error:
+                best, best_error = (bands, rows), error
+        return best
+    
+    def reset(self) -> None:
+        """Forget all previously seen chunks."""
+        self.report = DedupReport()
+        self.duplicates: Dict[str, List[str]] = {}
+        self._signatures: List[np.ndarray] = []
+        self._ids: List[str] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+    
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        size = self.shingle_size
+        if len(words) <= size:
+            shingles = [" ".join(words)]
+        else:
+            shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        return np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+    
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text."""
+        hashes = self._shingle_hashes(text)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+    
+    def _find_duplicate(self, signature: np.ndarray) -> int:
+        """Index of an earlier representative similar to ``signature``, or -1."""
+        checked = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for candidate in buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                similarity = np.count_nonzero(self._signatures[candidate] == signature) / self.num_perm
+                if similarity >= self.threshold:
+                    return candidate
+        return -1
+    
+    def _add_representative(self, doc_id: str, signature: np.ndarray) -> None:
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._ids.append(doc_id)
+        for band, buckets in enumerate(self._buckets):
+            buckets[signature[band * self.rows:(band + 1) * self.rows].tobytes()].append(index)
+    
+    def filter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Yield only the representative of each near-duplicate cluster."""
+        for doc in documents:
+            self.report.chunks_seen += 1
+            doc_id = chunk_document_id(doc)
+            signature = self.signature(doc.page_content)
+            
+            match = self._find_duplicate(signature)
+            if match >= 0:
+                self.report.chunks_dropped += 1
+                self.duplicates.setdefault(self._ids[match], []).append(doc_id)
+                continue
+            
+            self._add_representative(doc_id, signature)
+            yield doc
@@ -0,0 +1,112 @@
+"""Pluggable embedding backends for indexing and query embedding."""
+
+import hashlib
+import re
+from typing import Callable, Dict, List
+import logging
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "sentence-transformers"
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic, model-free embeddings for tests and offline benchmarks.
+
+    Each lower-cased word token is hashed into one of ``dimension`` buckets
+    with a hashed sign (the "hashing trick"), and the result is L2
+    normalized. Texts sharing words get similar vectors, which is enough to
+    exercise indexing and retrieval without downloading a model.
+    """
+    
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+    
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimension] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+def _sentence_transformers(model_name: str, batch_size: int = 32, num_workers: int = 1, **kwargs) -> Embeddings:
+    from utils.embedding_engine import EmbeddingEngine
+    
+    return EmbeddingEngine(model_name=model_name, device="cpu", batch_size=batch_size, num_workers=num_workers)
+
+
+def _sentence_transformers_int8(model_name: str, batch_size: int = 32, num_workers: int = 1, **kwargs) -> Embeddings:
+    """fp32 model with its Linear layers dynamically quantized to int8.
+
+    Runs in a single process: quantized modules don't survive being sent to
+    the sentence-transformers worker pool.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from utils.embedding_engine import EmbeddingEngine
+    
+    model = SentenceTransformer(model_name, device="cpu")
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if num_workers > 1:
+        logger.info("int8 embedding backend runs in a single process; ignoring embedding_workers")
+    return EmbeddingEngine(model_name=model_name, device="cpu", batch_size=batch_size, num_workers=1, model=model)
+
+
+def _huggingface(model_name: str, batch_size: int = 32, **kwargs) -> Embeddings:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'batch_size': batch_size}
+    )
+
+
+def _hashing(model_name: str, dimension: int = 384, **kwargs) -> Embeddings:
+    return HashingEmbeddings(dimension=dimension)
+
+
+EMBEDDING_BACKENDS: Dict[str, Callable[..., Embeddings]] = {
+    "sentence-transformers": _sentence_transformers,
+    "sentence-transformers-int8": _sentence_transformers_int8,
+    "huggingface": _huggingface,
+    "hash": _hashing,
+}
+
+# Backends whose ``embed_query`` is ``embed_documents`` on one text (no query
+# instruction or prefix), so several queries can be embedded as one batch of
+# documents. Batching only changes the padding, which moved vectors of an
+# all-MiniLM-L6-v2-shaped model on CPU by at most 6e-8 per component. The int8
+# backend is left out: dynamic quantization scales activations per batch, which
+# moved the same queries by up to 2e-3.
+BATCHED_QUERY_BACKENDS = {"sentence-transformers", "huggingface", "hash"}
+
+
+def create_embedding_backend(backend: str, model_name: str, **options) -> Embeddings:
+    """Create the embeddings for a named backend.
+
+    Backends:
+    - ``sentence-transformers``: fp32 model through the batched ``EmbeddingEngine`` (default)
+    - ``sentence-transformers-int8``: the same model dynamically quantized to int8 for faster CPU inference
+    - ``huggingface``: LangChain's ``HuggingFaceEmbeddings``
+    - ``hash``: deterministic hashing embeddings, no model needed (tests and offline benchmarks)
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}'. Available: {', '.join(sorted(EMBEDDING_BACKENDS))}"
+        )
+    
+    logger.info(f"Using {backend} embedding backend for {model_name}")
+    return EMBEDDING_BACKENDS[backend](model_name, **options)
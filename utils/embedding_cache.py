@@ -0,0 +1,179 @@
+"""Persistent cache of document embeddings keyed by model and chunk text."""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+KEYS_FILENAME = "keys.npy"
+VECTORS_FILENAME = "vectors.npy"
+
+
+def text_key(text: str) -> bytes:
+    """SHA-256 digest of a text with whitespace normalized."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache for a single embedding model.
+
+    Entries live in two ``.npy`` files per model: ``keys.npy`` holds the
+    sorted 32-byte text digests and ``vectors.npy`` the matching float32
+    vectors. Both are opened memory-mapped and looked up with a binary
+    search, so opening the cache costs nothing and only the rows that are
+    hit are read. New entries are buffered in memory until ``flush``.
+    """
+    
+    def __init__(self, cache_dir: str, model_name: str):
+        self.model_name = model_name
+        # One directory per model, so vectors from different models never mix
+        model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.cache_dir = Path(cache_dir) / model_slug
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[bytes, np.ndarray] = {}
+        self._keys: Optional[np.ndarray] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._open()
+    
+    def _open(self) -> None:
+        keys_path = self.cache_dir / KEYS_FILENAME
+        vectors_path = self.cache_dir / VECTORS_FILENAME
+        
+        if not keys_path.exists() or not vectors_path.exists():
+            self._keys, self._vectors = None, None
+            return
+        
+        try:
+            self._keys = np.load(keys_path, mmap_mode="r")
+            self._vectors = np.load(vectors_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache in {self.cache_dir}: {e}")
+            self._keys, self._vectors = None, None
+            return
+        
+        if len(self._keys) != len(self._vectors):
+            logger.warning(f"Ignoring inconsistent embedding cache in {self.cache_dir}")
+            self._keys, self._vectors = None, None
+    
+    def __len__(self) -> int:
+        stored = len(self._keys) if self._keys is not None else 0
+        return stored + len(self._pending)
+    
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Look up vectors for text keys; misses are returned as None."""
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        
+        if self._keys is not None and len(self._keys):
+            query = np.array(keys, dtype=self._keys.dtype)
+            positions = np.searchsorted(self._keys, query)
+            positions = np.minimum(positions, len(self._keys) - 1)
+            found = self._keys[positions] == query
+            for i in np.flatnonzero(found):
+                results[i] = np.asarray(self._vectors[positions[i]])
+        
+        for i, key in enumerate(keys):
+            if results[i] is None and key in self._pending:
+                results[i] = self._pending[key]
+        
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return results
+    
+    def put_many(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Buffer new entries; they are written to disk by ``flush``."""
+        for key, vector in zip(keys, vectors):
+            self._pending[key] = np.asarray(vector, dtype=np.float32)
+    
+    def flush(self) -> None:
+        """Merge buffered entries into the on-disk cache."""
+        if not self._pending:
+            return
+        
+        # Pick up entries another process may have written since we opened
+        self._open()
+        
+        new_keys = np.array(list(self._pending.keys()), dtype="S32")
+        new_vectors = np.stack(list(self._pending.values())).astype(np.float32)
+        
+        if self._keys is not None and len(self._keys):
+            if self._vectors.shape[1] != new_vectors.shape[1]:
+                logger.warning("Embedding dimension changed, discarding the old embedding cache")
+                keys, vectors = new_keys, new_vectors
+            else:
+                keys = np.concatenate([np.asarray(self._keys), new_keys])
+                vectors = np.concatenate([np.asarray(self._vectors), new_vectors])
+        else:
+            keys, vectors = new_keys, new_vectors
+        
+        keys, unique = np.unique(keys, return_index=True)
+        vectors = vectors[unique]
+        
+        self._write(keys, vectors)
+        logger.info(f"Embedding cache for {self.model_name} now holds {len(keys)} vectors")
+        
+        self._pending.clear()
+        self._open()
+    
+    def _write(self, keys: np.ndarray, vectors: np.ndarray) -> None:
+        tmp_suffix = f".{os.getpid()}.tmp"
+        keys_path = self.cache_dir / KEYS_FILENAME
+        vectors_path = self.cache_dir / VECTORS_FILENAME
+        keys_tmp = self.cache_dir / (KEYS_FILENAME + tmp_suffix)
+        vectors_tmp = self.cache_dir / (VECTORS_FILENAME + tmp_suffix)
+        
+        # Release the memory maps before replacing the files they point at
+        self._keys, self._vectors = None, None
+        
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, vectors)
+        with open(keys_tmp, "wb") as f:
+            np.save(f, keys)
+        os.replace(vectors_tmp, vectors_path)
+        os.replace(keys_tmp, keys_path)
+    
+    def describe(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        return f"Embedding cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate)"
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings model so document embeddings go through an ``EmbeddingCache``.
+
+    Only chunks whose normalized text has not been embedded before by the
+    same model are sent to the model. Query embeddings are not cached here.
+    """
+    
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = np.asarray(
+                self.embeddings.embed_documents([texts[i] for i in missing]),
+                dtype=np.float32
+            )
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        
+        return [vector.tolist() for vector in vectors]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,217 @@
+"""Full and incremental FAISS index builds driven by the content-hash manifest."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Iterator, Optional, Any
+import logging
+
+from langchain.schema import Document
+
+from utils.document_processor import DocumentProcessor
+from utils.vector_store import VectorStoreManager
+from utils.index_manifest import IndexManifest, chunk_document_id, chunk_source
+from utils.dedup import NearDuplicateFilter
+from utils.chunk_tags import TAGS_VERSION
+from utils.bm25_index import BM25_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexBuildResult:
+    """Summary of what an index build did."""
+    full_rebuild: bool
+    files_added: int = 0
+    files_changed: int = 0
+    files_removed: int = 0
+    files_unchanged: int = 0
+    chunks_added: int = 0
+    chunks_deleted: int = 0
+    chunks_deduplicated: int = 0
+    
+    def describe(self) -> str:
+        kind = "Full rebuild" if self.full_rebuild else "Incremental update"
+        return (
+            f"{kind}: {self.files_added} added, {self.files_changed} changed, "
+            f"{self.files_removed} removed, {self.files_unchanged} unchanged files; "
+            f"{self.chunks_added} chunks embedded, {self.chunks_deleted} chunks deleted, "
+            f"{self.chunks_deduplicated} near-duplicate chunks skipped"
+        )
+
+
+class IndexBuilder:
+    """Builds or incrementally updates a FAISS index from the PDFs in a directory.
+
+    A manifest saved next to the index records the hash and chunk IDs of
+    every indexed file, so an update only embeds new or changed PDFs and
+    deletes the vectors of removed ones.
+    
+    With ``dedup_threshold`` set, near-duplicate chunks (estimated Jaccard
+    similarity of word shingles at or above the threshold) are dropped
+    before embedding, keeping one representative per cluster.
+    """
+    
+    def __init__(self, document_processor: DocumentProcessor, vector_store_manager: VectorStoreManager,
+                 dedup_threshold: Optional[float] = None):
+        self.document_processor = document_processor
+        self.vector_store_manager = vector_store_manager
+        self.dedup_threshold = dedup_threshold
+        self.dedup_filter = NearDuplicateFilter(threshold=dedup_threshold) if dedup_threshold else None
+    
+    def _settings_fingerprint(self) -> Dict[str, Any]:
+        """Parameters that affect every chunk; changing any forces a full rebuild."""
+        return {
+            "chunk_size": self.document_processor.chunk_size,
+            "chunk_overlap": self.document_processor.chunk_overlap,
+            "embedding_model": self.vector_store_manager.embedding_model_id,
+            "dedup_threshold": self.dedup_threshold,
+            "index": self.vector_store_manager.index_config.build_params(),
+            "chunk_tags": TAGS_VERSION,
+            "lexical": BM25_VERSION
+        }
+    
+    def build(self, data_path: str, index_path: str, full_rebuild: bool = False) -> IndexBuildResult:
+        """Bring the index at ``index_path`` up to date with ``data_path``."""
+        pdf_files = self.document_processor.list_pdf_files(data_path)
+        logger.info(f"Found {len(pdf_files)} PDF files to index")
+        
+        fingerprint = self._settings_fingerprint()
+        manifest = None if full_rebuild else IndexManifest.load(index_path)
+        
+        if manifest is not None and not manifest.is_compatible(fingerprint):
+            logger.info("Index settings changed since the last build, doing a full rebuild")
+            manifest = None
+        
+        if manifest is not None:
+            try:
+                self.vector_store_manager.load_vector_store(index_path, writable=True)
+            except Exception as e:
+                logger.warning(f"Failed to load existing index for update: {e}. Doing a full rebuild...")
+                manifest = None
+        
+        if manifest is None:
+            return self._full_build(pdf_files, index_path, fingerprint)
+        
+        return self._incremental_build(pdf_files, index_path, manifest)
+    
+    def _full_build(self, pdf_files: List[Path], index_path: str, fingerprint: Dict[str, Any]) -> IndexBuildResult:
+        manifest = IndexManifest(settings=fingerprint)
+        hashes = manifest.file_hashes(pdf_files)
+        
+        chunk_ids = self._empty_chunk_ids(pdf_files)
+        documents = self._track_chunk_ids(self._iter_documents(pdf_files), chunk_ids)
+        
+        self.vector_store_manager.create_vector_store(documents)
+        self.vector_store_manager.save_vector_store(index_path)
+        
+        self._record_files(manifest, pdf_files, hashes, chunk_ids)
+        if self.dedup_filter is not None:
+            manifest.duplicates = dict(self.dedup_filter.duplicates)
+        manifest.save(index_path)
+        
+        result = IndexBuildResult(
+            full_rebuild=True,
+            files_added=len(pdf_files),
+            chunks_added=sum(len(ids) for ids in chunk_ids.values()),
+            chunks_deduplicated=self._log_dedup_report()
+        )
+        logger.info(result.describe())
+        return result
+    
+    def _incremental_build(self, pdf_files: List[Path], index_path: str, manifest: IndexManifest) -> IndexBuildResult:
+        hashes = manifest.file_hashes(pdf_files)
+        diff = manifest.diff(hashes)
+        
+        result = IndexBuildResult(
+            full_rebuild=False,
+            files_added=len(diff.added),
+            files_changed=len(diff.changed),
+            files_removed=len(diff.removed),
+            files_unchanged=len(diff.unchanged)
+        )
+        
+        if not diff.has_changes:
+            logger.info("Index is up to date, nothing to re-embed")
+            return result
+        
+        # Files whose chunks were merged into a chunk that is going away must
+        # be re-processed, otherwise that content would vanish from the index
+        for name in manifest.files_sharing_duplicates(diff.changed + diff.removed):
+            if name in diff.unchanged:
+                diff.unchanged.remove(name)
+                diff.changed.append(name)
+        
+        delete_ids = manifest.chunk_ids(diff.changed + diff.removed)
+        to_process_names = set(diff.added + diff.changed)
+        to_process = [f for f in pdf_files if f.name in to_process_names]
+        chunk_ids = self._empty_chunk_ids(to_process)
+        documents = self._track_chunk_ids(self._iter_documents(to_process), chunk_ids)
+        
+        chunks_added = self.vector_store_manager.update_vector_store(documents, delete_ids=delete_ids)
+        if not chunks_added and not diff.unchanged:
+            raise ValueError("No documents found to build vector store")
+        self.vector_store_manager.save_vector_store(index_path)
+        
+        for name in diff.changed + diff.removed:
+            manifest.remove_file(name)
+        manifest.forget_duplicates(diff.changed + diff.removed)
+        self._record_files(manifest, to_process, hashes, chunk_ids)
+        if self.dedup_filter is not None:
+            manifest.duplicates.update(self.dedup_filter.duplicates)
+        manifest.save(index_path)
+        
+        result.files_changed = len(diff.changed)
+        result.files_unchanged = len(diff.unchanged)
+        result.chunks_added = chunks_added
+        result.chunks_deduplicated = self._log_dedup_report()
+        result.chunks_deleted = len(delete_ids)
+        logger.info(result.describe())
+        return result
+    
+    def _iter_documents(self, pdf_files: List[Path]) -> Iterator[Document]:
+        """Stream chunk documents, dropping near-duplicates when enabled.
+        
+        Only new chunks are compared with each other; the signatures of
+        chunks already in the index are not kept between builds.
+        """
+        documents = self.document_processor.iter_documents(pdf_files)
+        if self.dedup_filter is None:
+            return documents
+        
+        self.dedup_filter.reset()
+        return self.dedup_filter.filter(documents)
+    
+    def _log_dedup_report(self) -> int:
+        """Log the dedup report for the last build and return the chunks dropped."""
+        if self.dedup_filter is None:
+            return 0
+        
+        index = getattr(self.vector_store_manager.vector_store, "index", None)
+        bytes_per_vector = index.d * 4 if index is not None else 0
+        logger.info(self.dedup_filter.report.describe(bytes_per_vector))
+        return self.dedup_filter.report.chunks_dropped
+    
+    @staticmethod
+    def _empty_chunk_ids(pdf_files: List[Path]) -> Dict[str, List[str]]:
+        return {pdf_file.name: [] for pdf_file in pdf_files}
+    
+    @staticmethod
+    def _track_chunk_ids(documents: Iterator[Document], chunk_ids: Dict[str, List[str]]) -> Iterator[Document]:
+        """Pass documents through while recording the chunk IDs of each file."""
+        for doc in documents:
+            chunk_ids[doc.metadata["source"]].append(chunk_document_id(doc))
+            yield doc
+    
+    def _record_files(self, manifest: IndexManifest, pdf_files: List[Path],
+                      hashes: Dict[str, str], chunk_ids: Dict[str, List[str]]) -> None:
+        # Files whose every chunk was merged into a representative are recorded
+        # with no chunk IDs; ``duplicates`` ties them to their representatives
+        deduplicated = set()
+        if self.dedup_filter is not None:
+            for duplicate_ids in self.dedup_filter.duplicates.values():
+                deduplicated.update(chunk_source(d) for d in duplicate_ids)
+        
+        for pdf_file in pdf_files:
+            # Files that produced no chunks are left out so they are retried next time
+            if chunk_ids[pdf_file.name] or pdf_file.name in deduplicated:
+                manifest.record_file(pdf_file, hashes[pdf_file.name], chunk_ids[pdf_file.name])
@@ -0,0 +1,186 @@
+"""Content-hash manifest used for incremental re-indexing."""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+import logging
+
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_document_id(doc: Document) -> str:
+    """Stable vector store ID for a chunk, derived from its metadata."""
+    return f"{doc.metadata['source']}#{doc.metadata['chunk_id']}"
+
+
+def chunk_source(chunk_id: str) -> str:
+    """Source file name of a chunk ID created by ``chunk_document_id``."""
+    return chunk_id.rsplit("#", 1)[0]
+
+
+@dataclass
+class ManifestDiff:
+    """Difference between the indexed files and the files on disk."""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class IndexManifest:
+    """Records the content hash and chunk IDs of every indexed file.
+
+    The manifest is stored next to the FAISS index. ``settings`` holds the
+    parameters that affect every chunk (chunk size, overlap, embedding model);
+    if any of them change the whole index has to be rebuilt. ``duplicates``
+    maps the ID of each indexed chunk to the IDs of near-duplicate chunks
+    that were merged into it and left out of the index.
+    """
+    
+    def __init__(self, settings: Dict[str, Any], files: Optional[Dict[str, Dict[str, Any]]] = None,
+                 duplicates: Optional[Dict[str, List[str]]] = None):
+        self.settings = settings
+        self.files = files or {}
+        self.duplicates = duplicates or {}
+    
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["IndexManifest"]:
+        """Load the manifest from an index directory, if there is one."""
+        manifest_path = Path(index_dir) / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return None
+        
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable index manifest {manifest_path}: {e}")
+            return None
+        
+        if data.get("version") != MANIFEST_VERSION:
+            logger.warning(f"Ignoring index manifest with unsupported version {data.get('version')}")
+            return None
+        
+        return cls(
+            settings=data.get("settings", {}),
+            files=data.get("files", {}),
+            duplicates=data.get("duplicates", {})
+        )
+    
+    def save(self, index_dir: str) -> None:
+        """Write the manifest atomically into an index directory."""
+        save_dir = Path(index_dir)
+        save_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = save_dir / MANIFEST_FILENAME
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "settings": self.settings,
+                    "files": self.files,
+                    "duplicates": self.duplicates
+                },
+                f,
+                indent=2,
+                sort_keys=True
+            )
+        os.replace(tmp_path, manifest_path)
+    
+    def is_compatible(self, settings: Dict[str, Any]) -> bool:
+        """Whether an index built with this manifest can be updated in place."""
+        return self.settings == settings
+    
+    def file_hashes(self, pdf_files: List[Path]) -> Dict[str, str]:
+        """Hash the given files, reusing recorded hashes when size and mtime match."""
+        hashes = {}
+        for pdf_file in pdf_files:
+            stat = pdf_file.stat()
+            entry = self.files.get(pdf_file.name)
+            if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                hashes[pdf_file.name] = entry["sha256"]
+            else:
+                hashes[pdf_file.name] = hash_file(str(pdf_file))
+        return hashes
+    
+    def diff(self, hashes: Dict[str, str]) -> ManifestDiff:
+        """Compare recorded file hashes with the current ones."""
+        result = ManifestDiff()
+        
+        for name, sha256 in hashes.items():
+            entry = self.files.get(name)
+            if entry is None:
+                result.added.append(name)
+            elif entry["sha256"] != sha256:
+                result.changed.append(name)
+            else:
+                result.unchanged.append(name)
+        
+        result.removed = [name for name in self.files if name not in hashes]
+        return result
+    
+    def chunk_ids(self, names: List[str]) -> List[str]:
+        """All recorded chunk IDs for the given files."""
+        ids = []
+        for name in names:
+            ids.extend(self.files.get(name, {}).get("chunk_ids", []))
+        return ids
+    
+    def record_file(self, pdf_file: Path, sha256: str, chunk_ids: List[str]) -> None:
+        """Record (or replace) the entry for an indexed file."""
+        stat = pdf_file.stat()
+        self.files[pdf_file.name] = {
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_ids": chunk_ids
+        }
+    
+    def remove_file(self, name: str) -> None:
+        self.files.pop(name, None)
+    
+    def files_sharing_duplicates(self, names: List[str]) -> List[str]:
+        """Other files with chunks merged into a chunk of one of ``names``.
+        
+        Those chunks are not in the index themselves, so when their
+        representative goes away the files have to be re-processed.
+        """
+        sharing = set()
+        for chunk_id in self.chunk_ids(names):
+            for duplicate_id in self.duplicates.get(chunk_id, []):
+                sharing.add(chunk_source(duplicate_id))
+        return sorted(sharing - set(names))
+    
+    def forget_duplicates(self, names: List[str]) -> None:
+        """Drop duplicate records involving any chunk of the given files."""
+        dropped = set(names)
+        duplicates = {}
+        for representative_id, duplicate_ids in self.duplicates.items():
+            if chunk_source(representative_id) in dropped:
+                continue
+            remaining = [d for d in duplicate_ids if chunk_source(d) not in dropped]
+            if remaining:
+                duplicates[representative_id] = remaining
+        self.duplicates = duplicates
@@ -0,0 +1,187 @@
+"""Versioned index directories with an atomically switched current version."""
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from utils.compact_store import is_compact_store
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIRNAME = "versions"
+POINTER_FILENAME = "current.json"
+LOCK_FILENAME = "build.lock"
+
+
+class IndexVersions:
+    """Complete index builds kept side by side under one root.
+
+    Each build goes to ``<root>/versions/<name>/`` and only becomes live
+    when ``activate`` rewrites ``<root>/current.json`` (written to a
+    temporary file and renamed, so readers see the old or the new pointer,
+    never half of one). The pointer also names the previous version, which
+    ``rollback`` switches back to. Versions other than the newest ``keep``
+    and the current/previous pair are deleted on activation.
+
+    A root holding a store directly (the layout before versioning) is
+    served as-is until the first versioned build, which starts from a copy
+    of it.
+
+    Several processes can share one root: builds are serialized with
+    ``build_lock`` and readers notice a switched pointer through
+    ``pointer_stamp``.
+    """
+    
+    def __init__(self, root: str, keep: int = 3):
+        self.root = Path(root)
+        self.versions_dir = self.root / VERSIONS_DIRNAME
+        self.keep = max(keep, 2)
+        self._lock = threading.Lock()
+    
+    def _read_pointer(self) -> Dict[str, Optional[str]]:
+        pointer_path = self.root / POINTER_FILENAME
+        if not pointer_path.exists():
+            return {"current": None, "previous": None}
+        with open(pointer_path) as f:
+            return json.load(f)
+    
+    def _write_pointer(self, current: str, previous: Optional[str]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / f"{POINTER_FILENAME}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"current": current, "previous": previous, "activated_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.root / POINTER_FILENAME)
+    
+    def pointer_stamp(self) -> Optional[int]:
+        """Modification time of the pointer in ns; changes whenever a version is activated."""
+        try:
+            return os.stat(self.root / POINTER_FILENAME).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    @contextmanager
+    def build_lock(self):
+        """Hold an exclusive lock across processes (e.g. uvicorn workers) while building."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_FILENAME, "w") as lock_file:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    @property
+    def current(self) -> Optional[str]:
+        return self._read_pointer()["current"]
+    
+    @property
+    def previous(self) -> Optional[str]:
+        return self._read_pointer()["previous"]
+    
+    def path(self, name: str) -> Path:
+        return self.versions_dir / name
+    
+    def current_path(self) -> Optional[Path]:
+        """Directory of the live store, or None if nothing has been built."""
+        current = self.current
+        if current is not None:
+            return self.path(current)
+        if is_compact_store(str(self.root)) or (self.root / "index.faiss").exists():
+            return self.root
+        return None
+    
+    def create(self) -> Tuple[str, Path]:
+        """Make a new, inactive version directory seeded with a copy of the live store.
+
+        Starting from the live store lets the build update it incrementally;
+        the live files themselves are never written.
+        """
+        with self._lock:
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            name = stamp
+            suffix = 1
+            while self.path(name).exists():
+                suffix += 1
+                name = f"{stamp}-{suffix}"
+            
+            source = self.current_path()
+            self.path(name).mkdir()
+            if source is not None:
+                # A store is a flat directory of files; a legacy root also holds the pointer, lock and versions
+                for entry in source.iterdir():
+                    if entry.is_file() and entry.name not in (POINTER_FILENAME, LOCK_FILENAME) \
+                            and not entry.name.endswith(".tmp"):
+                        shutil.copy2(entry, self.path(name) / entry.name)
+        logger.info(f"Created index version {name}" + (f" from {source}" if source is not None else ""))
+        return name, self.path(name)
+    
+    def activate(self, name: str) -> None:
+        """Make ``name`` the live version; the current one becomes the rollback target."""
+        with self._lock:
+            if not self.path(name).is_dir():
+                raise ValueError(f"Unknown index version '{name}'")
+            current = self.current
+            self._write_pointer(name, current if current != name else self.previous)
+            self._prune()
+        logger.info(f"Activated index version {name}")
+    
+    def rollback(self) -> str:
+        """Switch back to the previous version, returning its name."""
+        with self._lock:
+            pointer = self._read_pointer()
+            previous = pointer["previous"]
+            if previous is None or not self.path(previous).is_dir():
+                raise ValueError("No previous index version to roll back to")
+            self._write_pointer(previous, pointer["current"])
+        logger.info(f"Rolled back to index version {previous}")
+        return previous
+    
+    def discard(self, name: str) -> None:
+        """Delete a version that was never activated (e.g. a failed build)."""
+        pointer = self._read_pointer()
+        if name in (pointer["current"], pointer["previous"]):
+            raise ValueError(f"Index version '{name}' is in use")
+        shutil.rmtree(self.path(name), ignore_errors=True)
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Version names, oldest first, with whether each is current or previous."""
+        pointer = self._read_pointer()
+        if not self.versions_dir.exists():
+            return []
+        return [
+            {
+                "name": path.name,
+                "current": path.name == pointer["current"],
+                "previous": path.name == pointer["previous"],
+                "created_at": path.stat().st_mtime
+            }
+            for path in sorted(self.versions_dir.iterdir())
+            if path.is_dir()
+        ]
+    
+    def _prune(self) -> None:
+        pointer = self._read_pointer()
+        names = sorted(path.name for path in self.versions_dir.iterdir() if path.is_dir())
+        protected = {pointer["current"], pointer["previous"]}
+        for name in names[:-self.keep]:
+            if name not in protected:
+                # Open stores keep their memory-mapped files until they are closed
+                shutil.rmtree(self.path(name), ignore_errors=True)
+                logger.info(f"Removed old index version {name}")
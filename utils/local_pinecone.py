@@ -0,0 +1,200 @@
+"""In-process stand-in for a Pinecone index, for offline tests and benchmarks."""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("cosine", "dotproduct", "euclidean")
+
+
+def match_filter(metadata: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone metadata filter.
+
+    Supports ``$and``, ``$or``, ``$eq``, ``$ne``, ``$in``, ``$nin``,
+    ``$gt``, ``$gte``, ``$lt``, ``$lte`` and ``$exists``, plus bare
+    values as ``$eq``. As in Pinecone, a list-valued field matches
+    ``$eq``/``$in`` when any element does, and ``$ne``/``$nin`` only when
+    none does.
+    """
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(match_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(match_filter(metadata, sub) for sub in condition):
+                return False
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            if not all(_match_field(metadata.get(key), op, operand) for op, operand in condition.items()):
+                return False
+    return True
+
+
+def _match_field(value: Any, op: str, operand: Any) -> bool:
+    if op == "$exists":
+        return (value is not None) == bool(operand)
+    if value is None:
+        # Missing fields never match a positive condition and always match a negative one
+        return op in ("$ne", "$nin")
+    values = value if isinstance(value, list) else [value]
+    if op == "$eq":
+        return operand in values
+    if op == "$ne":
+        return operand not in values
+    if op == "$in":
+        return any(v in operand for v in values)
+    if op == "$nin":
+        return not any(v in operand for v in values)
+    comparisons = {"$gt": float.__gt__, "$gte": float.__ge__, "$lt": float.__lt__, "$lte": float.__le__}
+    if op in comparisons:
+        return any(isinstance(v, (int, float)) and comparisons[op](float(v), float(operand)) for v in values)
+    raise ValueError(f"Unsupported filter operator '{op}'")
+
+
+class LocalPineconeIndex:
+    """The subset of ``pinecone.Index`` this project uses, held in memory.
+
+    ``upsert``, ``query``, ``fetch``, ``delete`` and ``describe_index_stats``
+    take the same arguments and return the same shapes (plain dicts) as
+    the client, so ``PineconeVectorStore`` and ``PineconeUpserter`` run
+    against it unchanged. ``latency_ms`` adds a simulated round trip to
+    every call and ``failure_rate`` makes that fraction of upserts raise,
+    to exercise concurrency and retries offline.
+    """
+    
+    def __init__(self, dimension: Optional[int] = None, metric: str = "cosine",
+                 latency_ms: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Available: {', '.join(METRICS)}")
+        self.dimension = dimension
+        self.metric = metric
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.upsert_calls = 0
+        self.failed_calls = 0
+        self._namespaces: Dict[str, Dict[str, tuple]] = defaultdict(dict)
+        self._matrices: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        # PineconeVectorStore reads the client's host and API key off the index it is given
+        self.config = SimpleNamespace(host="local", api_key="")
+    
+    def _round_trip(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def upsert(self, vectors: List[Any], namespace: Optional[str] = None, **kwargs) -> Dict[str, int]:
+        self._round_trip()
+        with self._lock:
+            self.upsert_calls += 1
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.failed_calls += 1
+                raise ConnectionError("Simulated Pinecone upsert failure")
+            records = self._namespaces[namespace or ""]
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    vector_id, values, metadata = vector["id"], vector["values"], vector.get("metadata", {})
+                else:
+                    vector_id, values, metadata = (tuple(vector) + ({},))[:3]
+                values = np.asarray(values, dtype=np.float32)
+                if self.dimension is None:
+                    self.dimension = len(values)
+                elif len(values) != self.dimension:
+                    raise ValueError(f"Vector dimension {len(values)} does not match the index dimension {self.dimension}")
+                records[vector_id] = (values, dict(metadata))
+            self._matrices.pop(namespace or "", None)
+        return {"upserted_count": len(vectors)}
+    
+    def _matrix(self, namespace: str) -> tuple:
+        """Stacked vectors of a namespace with their ids and metadata, rebuilt after writes."""
+        with self._lock:
+            cached = self._matrices.get(namespace)
+            if cached is None:
+                records = self._namespaces.get(namespace, {})
+                ids = list(records)
+                matrix = np.stack([records[i][0] for i in ids]) if ids else np.zeros((0, self.dimension or 0), np.float32)
+                if self.metric == "cosine" and len(matrix):
+                    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                cached = (ids, matrix, [records[i][1] for i in ids])
+                self._matrices[namespace] = cached
+            return cached
+    
+    def query(self, vector: List[float], top_k: int = 10, namespace: Optional[str] = None,
+              filter: Optional[Dict[str, Any]] = None, include_metadata: bool = False,
+              include_values: bool = False, **kwargs) -> Dict[str, Any]:
+        self._round_trip()
+        ids, matrix, metadatas = self._matrix(namespace or "")
+        if not ids:
+            return {"matches": [], "namespace": namespace or ""}
+        
+        query = np.asarray(vector, dtype=np.float32)
+        if self.metric == "euclidean":
+            # Pinecone reports squared distance; lower is better
+            scores = ((matrix - query) ** 2).sum(axis=1)
+            order = np.argsort(scores, kind="stable")
+        else:
+            if self.metric == "cosine":
+                query = query / max(float(np.linalg.norm(query)), 1e-12)
+            scores = matrix @ query
+            order = np.argsort(-scores, kind="stable")
+        
+        matches = []
+        for position in order:
+            if filter and not match_filter(metadatas[position], filter):
+                continue
+            match = {"id": ids[position], "score": float(scores[position])}
+            if include_metadata:
+                match["metadata"] = dict(metadatas[position])
+            if include_values:
+                match["values"] = matrix[position].tolist()
+            matches.append(match)
+            if len(matches) >= top_k:
+                break
+        return {"matches": matches, "namespace": namespace or ""}
+    
+    def fetch(self, ids: List[str], namespace: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._round_trip()
+        with self._lock:
+            records = self._namespaces.get(namespace or "", {})
+            return {
+                "vectors": {
+                    vector_id: {"id": vector_id, "values": records[vector_id][0].tolist(), "metadata": dict(records[vector_id][1])}
+                    for vector_id in ids if vector_id in records
+                },
+                "namespace": namespace or ""
+            }
+    
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: Optional[str] = None,
+               filter: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        self._round_trip()
+        with self._lock:
+            records = self._namespaces[namespace or ""]
+            if delete_all:
+                records.clear()
+            elif filter:
+                for vector_id in [i for i, (_, metadata) in records.items() if match_filter(metadata, filter)]:
+                    del records[vector_id]
+            for vector_id in ids or []:
+                records.pop(vector_id, None)
+            self._matrices.pop(namespace or "", None)
+        return {}
+    
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(records)} for name, records in self._namespaces.items() if records}
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values())
+        }
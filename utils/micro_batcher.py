@@ -0,0 +1,111 @@
+"""Micro-batching of concurrent requests into one batched call."""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collects items submitted from many threads and processes them in batches.
+
+    A worker thread takes the first waiting item, then keeps collecting
+    until ``max_wait_ms`` has passed since it arrived or ``max_batch_size``
+    items are gathered, and calls ``process_batch`` once for all of them.
+    ``process_batch`` must return one result per item, in order; each
+    caller gets its own result (or the batch's exception) back.
+
+    Under light load a request waits at most ``max_wait_ms``; under heavy
+    load batches fill up before the window closes.
+    """
+    
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 2.0, name: str = "micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._name = name
+    
+    def submit(self, item: Any) -> Future:
+        """Queue an item; the future resolves to its result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+    
+    def __call__(self, item: Any) -> Any:
+        """Process an item as part of the next batch and wait for its result."""
+        return self.submit(item).result()
+    
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+    
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    # Past the deadline, still take whatever is already queued
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._process(batch)
+    
+    def _process(self, batch: List[tuple]) -> None:
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        
+        try:
+            results = self.process_batch(items)
+        except Exception as e:
+            logger.error(f"Batch of {len(items)} failed: {e}")
+            for future in futures:
+                future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.items += len(items)
+        for future, result in zip(futures, results):
+            future.set_result(result)
+    
+    def close(self) -> None:
+        """Process what is queued, then stop the worker thread."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+    
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,220 @@
+"""Batched, concurrent and resumable upserts into a Pinecone index."""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import logging
+
+from langchain.schema import Document
+
+from utils.index_manifest import chunk_document_id
+
+logger = logging.getLogger(__name__)
+
+# Metadata key LangChain's PineconeVectorStore reads the chunk text from
+TEXT_KEY = "text"
+# Bump when the progress file layout changes, so older files are ignored
+PROGRESS_FORMAT_VERSION = 2
+# Where the digest of the loaded chunks is kept, apart from the namespace that is searched
+INDEX_META_NAMESPACE = "index-meta"
+INDEX_VERSION_ID = "index-version"
+
+
+def chunk_digest(doc: Document) -> str:
+    """Digest of what is upserted for a chunk: its text and metadata."""
+    payload = json.dumps([doc.page_content, doc.metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class UpsertProgress:
+    """Chunks already upserted, appended to a file so an interrupted load can resume.
+
+    The first line records the target (index, namespace, embedding model);
+    progress for a different target, or an unreadable header, is ignored
+    and overwritten. Each completed request appends one JSON line mapping
+    chunk ID to ``chunk_digest``, so a crash loses at most the requests in
+    flight, and a chunk whose text changed since is upserted again.
+    """
+    
+    def __init__(self, path: str, fingerprint: Dict[str, Any]):
+        self.path = Path(path)
+        self.header = {"format": PROGRESS_FORMAT_VERSION, "target": fingerprint}
+        self.done: Dict[str, str] = {}
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def open(self) -> Dict[str, str]:
+        """Load earlier progress for the same target and start appending to it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            with open(self.path) as f:
+                lines = f.read().splitlines()
+            if lines and self._read_header(lines[0]) == self.header:
+                for line in lines[1:]:
+                    try:
+                        self.done.update(json.loads(line))
+                    except ValueError:
+                        # Torn line of a crashed run; those chunks are upserted again
+                        continue
+            else:
+                logger.info(f"Ignoring upsert progress in {self.path} recorded for a different index")
+        if self.done:
+            self._file = open(self.path, "a")
+        else:
+            self._file = open(self.path, "w")
+            self._file.write(json.dumps(self.header) + "\n")
+            self._file.flush()
+        return self.done
+    
+    @staticmethod
+    def _read_header(line: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(line)
+        except ValueError:
+            # Header torn by a crash before anything was recorded
+            return None
+    
+    def mark(self, digests: Dict[str, str]) -> None:
+        with self._lock:
+            self.done.update(digests)
+            self._file.write(json.dumps(digests) + "\n")
+            self._file.flush()
+    
+    def close(self, completed: bool) -> None:
+        """Close the file; a completed load has nothing to resume, so its progress is removed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if completed:
+            self.path.unlink(missing_ok=True)
+
+
+class PineconeUpserter:
+    """Embeds documents and upserts them in fixed-size requests, several at a time.
+
+    Embedding runs on the calling thread while up to ``max_concurrency``
+    upsert requests of ``batch_size`` vectors are in flight, so network
+    round trips overlap with each other and with the model. A failed
+    request is retried ``max_retries`` times with exponential backoff and
+    jitter before the load is aborted. With ``progress_path`` set, chunks
+    already upserted by an earlier, interrupted load, with the same text
+    and metadata, are skipped without being embedded again.
+    
+    After a completed load ``content_digest`` identifies every chunk it
+    was given (upserted or skipped), in order, by ID and ``chunk_digest``.
+    """
+    
+    def __init__(self, index: Any, namespace: Optional[str] = None, batch_size: int = 100,
+                 max_concurrency: int = 4, max_retries: int = 5, backoff_seconds: float = 0.5,
+                 max_backoff_seconds: float = 30.0, progress_path: Optional[str] = None):
+        self.index = index
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.progress_path = progress_path
+        self.retries = 0
+        self._retries_lock = threading.Lock()
+        self.content_digest: Optional[str] = None
+    
+    def upsert_documents(self, batches: Iterable[List[Document]], embeddings: Any,
+                         fingerprint: Optional[Dict[str, Any]] = None) -> int:
+        """Embed and upsert every batch of documents; returns the number of vectors upserted.
+
+        ``batches`` are embedding batches (e.g. ``VectorStoreManager._iter_batches``);
+        ``fingerprint`` identifies the target for resumable progress.
+        """
+        progress = None
+        done: Dict[str, str] = {}
+        if self.progress_path:
+            progress = UpsertProgress(self.progress_path, fingerprint or {"namespace": self.namespace})
+            done = progress.open()
+            if done:
+                logger.info(f"Resuming upsert: {len(done)} chunks were already upserted")
+        
+        total = 0
+        skipped = 0
+        completed = False
+        content = hashlib.sha256()
+        start = time.perf_counter()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="pinecone-upsert") as executor:
+            try:
+                for batch in batches:
+                    todo = []
+                    digests = {}
+                    for doc in batch:
+                        doc_id = chunk_document_id(doc)
+                        digests[doc_id] = chunk_digest(doc)
+                        content.update(f"{doc_id}\0{digests[doc_id]}\n".encode("utf-8"))
+                        # Already upserted, unless its text or metadata changed since
+                        if done.get(doc_id) != digests[doc_id]:
+                            todo.append(doc)
+                    skipped += len(batch) - len(todo)
+                    if not todo:
+                        continue
+                    vectors = embeddings.embed_documents([doc.page_content for doc in todo])
+                    for request in self._requests(todo, vectors):
+                        # Bound the requests held in memory; surfaces failures early
+                        while len(pending) >= 2 * self.max_concurrency:
+                            total += pending.popleft().result()
+                        pending.append(executor.submit(self._upsert_request, request, progress, digests))
+                while pending:
+                    total += pending.popleft().result()
+                completed = True
+                self.content_digest = content.hexdigest()
+            finally:
+                for future in pending:
+                    future.cancel()
+                # Let requests already running finish, so their progress is recorded before the file closes
+                executor.shutdown(wait=True)
+                if progress is not None:
+                    progress.close(completed)
+        
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Upserted {total} vectors in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} vectors/s, "
+            f"{self.retries} retries, {skipped} already present)"
+        )
+        return total
+    
+    def _requests(self, documents: List[Document], vectors: List[List[float]]) -> Iterator[List[Dict[str, Any]]]:
+        request = []
+        for doc, values in zip(documents, vectors):
+            request.append({
+                "id": chunk_document_id(doc),
+                "values": [float(v) for v in values],
+                "metadata": {**doc.metadata, TEXT_KEY: doc.page_content}
+            })
+            if len(request) >= self.batch_size:
+                yield request
+                request = []
+        if request:
+            yield request
+    
+    def _upsert_request(self, vectors: List[Dict[str, Any]], progress: Optional[UpsertProgress],
+                        digests: Dict[str, str]) -> int:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.index.upsert(vectors=vectors, namespace=self.namespace)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._retries_lock:
+                    self.retries += 1
+                delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning(f"Upsert of {len(vectors)} vectors failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        if progress is not None:
+            progress.mark({vector["id"]: digests[vector["id"]] for vector in vectors})
+        return len(vectors)
@@ -0,0 +1,80 @@
+"""In-memory LRU cache of query embeddings for the retrieval path."""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """Bounded, thread-safe LRU cache mapping query strings to their vectors.
+
+    Queries are built from a small space of questionnaire answers, so the
+    same strings repeat and a few hundred entries cover most traffic. The
+    model runs outside the lock: two threads missing on the same query may
+    both embed it, but neither blocks lookups of other queries meanwhile.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, query: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(query)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(query)
+            self.hits += 1
+            return vector
+    
+    def put(self, query: str, vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        # Shared between threads, so callers must not modify it
+        vector.flags.writeable = False
+        with self._lock:
+            self._entries[query] = vector
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return vector
+    
+    def get_or_embed(self, query: str, embed: Callable[[str], List[float]]) -> np.ndarray:
+        """Return the cached vector for ``query``, embedding and caching it on a miss."""
+        vector = self.get(query)
+        if vector is None:
+            vector = self.put(query, embed(query))
+        return vector
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+    
+    def describe(self) -> str:
+        stats = self.stats()
+        return (
+            f"Query embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate'] * 100:.1f}% hit rate, {stats['size']}/{stats['max_size']} entries)"
+        )
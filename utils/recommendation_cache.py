@@ -0,0 +1,234 @@
+"""Cache of generated recommendations keyed by a canonical questionnaire."""
+
+import copy
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase with whitespace collapsed, so trivially different answers match."""
+    return " ".join(text.lower().split())
+
+
+def canonical_questionnaire(questionnaire: Any, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Questionnaire answers in a canonical form, restricted to ``fields`` when given.
+
+    Enums become their values, free text is normalized, lists (such as
+    concerns) are deduplicated and sorted, and empty answers become None,
+    so equivalent profiles produce the same dict.
+    """
+    data = questionnaire.model_dump(mode="json")
+    canonical = {}
+    for field in sorted(fields if fields is not None else data):
+        value = data.get(field)
+        if isinstance(value, str):
+            value = normalize_text(value) or None
+        elif isinstance(value, list):
+            items = {normalize_text(v) if isinstance(v, str) else v for v in value}
+            value = sorted(items - {"", None}, key=str) or None
+        canonical[field] = value
+    return canonical
+
+
+def questionnaire_key(questionnaire: Any, fields: Optional[Iterable[str]] = None, namespace: str = "") -> str:
+    """Digest of the canonical questionnaire; ``namespace`` separates generation settings."""
+    payload = json.dumps(
+        {"questionnaire": canonical_questionnaire(questionnaire, fields), "namespace": namespace},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Bounded, thread-safe LRU of ``(created_at, value)`` entries, per process."""
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, version: str, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None:
+                self._entries.move_to_end((version, key))
+            return entry
+    
+    def put(self, version: str, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[(version, key)] = entry
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def delete(self, version: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((version, key), None)
+    
+    def retain(self, version: str) -> int:
+        """Drop the entries of every other index version; returns how many."""
+        with self._lock:
+            stale = [entry_key for entry_key in self._entries if entry_key[0] != version]
+            for entry_key in stale:
+                del self._entries[entry_key]
+        return len(stale)
+
+
+class DiskCacheBackend:
+    """JSON files under ``cache_dir/<index version>/``, shared by every worker process.
+
+    Files are written atomically, so concurrent workers never read a
+    partial entry. Each index version has its own directory, and
+    ``retain`` removes the others wholesale.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache_dir.glob("*/*/*.json"))
+    
+    def _entry_path(self, version: str, key: str) -> Path:
+        version_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", version)
+        return self.cache_dir / version_slug / key[:2] / f"{key}.json"
+    
+    def get(self, version: str, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        entry_path = self._entry_path(version, key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry["created_at"], entry["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring corrupt recommendation cache entry {entry_path}: {e}")
+            return None
+    
+    def put(self, version: str, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        entry_path = self._entry_path(version, key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_path.parent / f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": entry[0], "value": entry[1]}, f)
+        os.replace(tmp_path, entry_path)
+    
+    def delete(self, version: str, key: str) -> None:
+        self._entry_path(version, key).unlink(missing_ok=True)
+    
+    def retain(self, version: str) -> int:
+        keep = self._entry_path(version, "00").parent.parent
+        removed = 0
+        for path in self.cache_dir.iterdir():
+            if path.is_dir() and path != keep:
+                removed += sum(1 for _ in path.glob("*/*.json"))
+                shutil.rmtree(path, ignore_errors=True)
+        return removed
+
+
+def _memory(max_size: int = 1024, **kwargs) -> MemoryCacheBackend:
+    return MemoryCacheBackend(max_size=max_size)
+
+
+def _disk(cache_dir: str = "cache/recommendations", **kwargs) -> DiskCacheBackend:
+    return DiskCacheBackend(cache_dir)
+
+
+CACHE_BACKENDS: Dict[str, Callable[..., Any]] = {
+    "memory": _memory,
+    "disk": _disk,
+}
+
+
+class RecommendationCache:
+    """Generated recommendations per canonical questionnaire and index version.
+
+    Entries are stored under the version of the index that retrieved
+    their context, and looked up under the version serving now, so a
+    rebuild or rollback never returns recommendations drawn from other
+    documents; ``retain`` then reclaims the stale entries. Entries older
+    than ``ttl_seconds`` count as misses. Hit rates are per process.
+    """
+    
+    def __init__(self, backend: Any, ttl_seconds: Optional[float] = None):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+    
+    def get(self, version: str, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.backend.get(version, key)
+        if entry is not None and self.ttl_seconds and time.time() - entry[0] > self.ttl_seconds:
+            self.backend.delete(version, key)
+            with self._lock:
+                self.expired += 1
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Callers get their own copy; the cached value is shared
+        return copy.deepcopy(entry[1])
+    
+    def put(self, version: str, key: str, value: Dict[str, Any]) -> None:
+        self.backend.put(version, key, (time.time(), copy.deepcopy(value)))
+    
+    def retain(self, version: str) -> None:
+        """Discard entries of index versions other than ``version``."""
+        removed = self.backend.retain(version)
+        if removed:
+            logger.info(f"Dropped {removed} cached recommendations for other index versions")
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "size": len(self.backend),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+    
+    def describe(self) -> str:
+        stats = self.stats()
+        return (
+            f"Recommendation cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate'] * 100:.1f}% hit rate, {stats['expired']} expired, {stats['size']} entries)"
+        )
+
+
+def create_recommendation_cache(backend: str, ttl_seconds: Optional[float] = None, **options) -> Optional[RecommendationCache]:
+    """Create a recommendation cache on a named backend, or None for ``none``.
+
+    Backends:
+    - ``memory``: per-process LRU of ``max_size`` entries (default)
+    - ``disk``: JSON files under ``cache_dir``, shared by all workers and kept across restarts
+    """
+    if backend == "none":
+        return None
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(
+            f"Unknown recommendation cache backend '{backend}'. Available: none, {', '.join(sorted(CACHE_BACKENDS))}"
+        )
+    
+    logger.info(f"Using {backend} recommendation cache" + (f" (TTL {ttl_seconds:g}s)" if ttl_seconds else ""))
+    return RecommendationCache(CACHE_BACKENDS[backend](**options), ttl_seconds=ttl_seconds)
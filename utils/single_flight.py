@@ -0,0 +1,108 @@
+"""Coalescing of concurrent identical calls into one execution."""
+
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _FlightStats:
+    """Counters shared by the thread and asyncio variants."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, Any] = {}
+    
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0
+        }
+    
+    def describe(self) -> str:
+        stats = self.stats()
+        return (
+            f"Request coalescing: {stats['calls']} calls, {stats['executions']} executed, "
+            f"{stats['coalesced']} coalesced ({stats['coalesced_rate'] * 100:.1f}%)"
+        )
+
+
+class SingleFlight(_FlightStats):
+    """Runs at most one call per key at a time across threads.
+
+    The first thread to ``run`` a key executes ``fn``; threads arriving
+    with the same key while it runs wait for it and get a deep copy of its
+    result (or its exception) instead of executing ``fn`` themselves. Once
+    the call finishes the key is free again: this coalesces concurrent
+    calls only, it does not cache.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+    
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return copy.deepcopy(future.result())
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+
+class AsyncSingleFlight(_FlightStats):
+    """``SingleFlight`` for coroutines on one event loop.
+
+    The shared call runs as its own task and every caller awaits it
+    through ``asyncio.shield``, so a caller that is cancelled (e.g. its
+    client disconnected) neither cancels the call nor fails the callers
+    still waiting for it.
+    """
+    
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.executions += 1
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+    
+    def _finished(self, key: Hashable, task: "asyncio.Future") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception, so it isn't reported as unhandled when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,107 @@
+"""Incremental parsing of a JSON object as an LLM streams it."""
+
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+@dataclass(frozen=True)
+class JSONItem:
+    """A value completed in the stream: element ``index`` of list ``field``, or ``field`` itself when index is None."""
+    field: str
+    index: Optional[int]
+    value: Any
+
+
+class IncrementalJSONParser:
+    """Emits the values of a top-level JSON object as soon as each is complete.
+
+    Feed text chunks as they arrive; ``feed`` returns the top-level
+    scalar fields and the elements of top-level list fields (such as
+    each step of ``morning_routine``) completed by that chunk. Text
+    before the opening brace (prose, a code fence) is skipped, as is
+    everything after the object closes. Values nested deeper than a
+    list element are not emitted; parse the full text for those.
+    """
+    
+    def __init__(self):
+        self.done = False
+        self._stack: List[str] = []
+        self._field: Optional[str] = None
+        self._expect_key = False
+        self._index = 0
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []
+        self._scalar: List[str] = []
+        self._items: List[JSONItem] = []
+    
+    def feed(self, text: str) -> List[JSONItem]:
+        for char in text:
+            if self.done:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._complete("".join(self._string), is_string=True)
+                    continue
+                self._string.append(char)
+            elif not self._stack:
+                if char == "{":
+                    self._stack.append("{")
+                    self._expect_key = True
+            elif char == '"':
+                self._in_string = True
+                self._string = []
+            elif char in "{[":
+                self._flush_scalar()
+                self._stack.append(char)
+                if char == "[" and len(self._stack) == 2:
+                    self._index = 0
+            elif char in "}]":
+                self._flush_scalar()
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+            elif char == ":":
+                self._flush_scalar()
+                if len(self._stack) == 1:
+                    self._expect_key = False
+            elif char == ",":
+                self._flush_scalar()
+                if len(self._stack) == 1:
+                    self._expect_key = True
+                elif len(self._stack) == 2 and self._stack[-1] == "[":
+                    self._index += 1
+            elif char in _WHITESPACE:
+                self._flush_scalar()
+            else:
+                self._scalar.append(char)
+        
+        items, self._items = self._items, []
+        return items
+    
+    def _flush_scalar(self) -> None:
+        if self._scalar:
+            self._complete("".join(self._scalar), is_string=False)
+            self._scalar = []
+    
+    def _complete(self, raw: str, is_string: bool) -> None:
+        try:
+            value = json.loads(f'"{raw}"' if is_string else raw)
+        except json.JSONDecodeError:
+            value = raw
+        depth = len(self._stack)
+        if depth == 1:
+            if self._expect_key and is_string:
+                self._field = value
+            elif not self._expect_key:
+                self._items.append(JSONItem(self._field, None, value))
+        elif depth == 2 and self._stack[-1] == "[":
+            self._items.append(JSONItem(self._field, self._index, value))
@@ -0,0 +1,96 @@
+"""Inverted index from chunk tags to index positions, for filtered search."""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+import logging
+
+import numpy as np
+
+from utils.chunk_tags import TagFilter
+
+logger = logging.getLogger(__name__)
+
+TAGS_FILENAME = "tags.json"
+POSTINGS_FILENAME = "tag_postings.npy"
+
+# Metadata fields holding tags, and the prefix of their keys in the index
+TAG_FIELDS = {"concerns": "concern", "ingredients": "ingredient"}
+
+
+class TagIndex:
+    """Posting lists of index positions per tag, memory-mapped.
+
+    ``tag_postings.npy`` holds every posting list back to back (sorted
+    int64 positions) and ``tags.json`` the ``[start, end)`` slice of each
+    tag, keyed ``source:<file>``, ``concern:<tag>`` or ``ingredient:<tag>``. A filter becomes
+    a boolean mask over positions built from the few lists it names; no
+    chunk records are read.
+    """
+    
+    def __init__(self, path: str):
+        path = Path(path)
+        with open(path / TAGS_FILENAME) as f:
+            info = json.load(f)
+        self.count = info["count"]
+        self.slices: Dict[str, List[int]] = info["tags"]
+        self.postings = np.load(path / POSTINGS_FILENAME, mmap_mode="r")
+    
+    def positions(self, key: str) -> np.ndarray:
+        start, end = self.slices.get(key, (0, 0))
+        return np.asarray(self.postings[start:end])
+    
+    def mask(self, tag_filter: TagFilter) -> np.ndarray:
+        """Boolean mask over index positions of the chunks matching ``tag_filter``."""
+        return mask_from_postings(self.positions, self.count, tag_filter)
+    
+    @staticmethod
+    def write(path: str, postings: Dict[str, List[int]], count: int, suffix: str = "") -> None:
+        path = Path(path)
+        slices = {}
+        arrays = []
+        offset = 0
+        for key in sorted(postings):
+            positions = np.asarray(postings[key], dtype=np.int64)
+            slices[key] = [offset, offset + len(positions)]
+            arrays.append(positions)
+            offset += len(positions)
+        
+        with open(path / (POSTINGS_FILENAME + suffix), "wb") as f:
+            np.save(f, np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64))
+        with open(path / (TAGS_FILENAME + suffix), "w") as f:
+            json.dump({"count": count, "tags": slices}, f)
+
+
+class TagPostingsBuilder:
+    """Collects posting lists while chunks are written in index order."""
+    
+    def __init__(self):
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.count = 0
+    
+    def add(self, metadata: dict) -> None:
+        if "source" in metadata:
+            self.postings[f"source:{metadata['source']}"].append(self.count)
+        for field, prefix in TAG_FIELDS.items():
+            for tag in metadata.get(field, ()):
+                self.postings[f"{prefix}:{tag}"].append(self.count)
+        self.count += 1
+
+
+def mask_from_postings(positions, count: int, tag_filter: TagFilter) -> np.ndarray:
+    """Evaluate a ``TagFilter`` over posting lists looked up with ``positions(key)``."""
+    mask = np.ones(count, dtype=bool)
+    for field, tags in (("source", tag_filter.sources), ("concern", tag_filter.concerns),
+                        ("ingredient", tag_filter.ingredients)):
+        if tags:
+            # Any of the tags
+            selected = np.zeros(count, dtype=bool)
+            for tag in tags:
+                selected[positions(f"{field}:{tag}")] = True
+            mask &= selected
+    for tag in tag_filter.exclude_ingredients:
+        mask[positions(f"ingredient:{tag}")] = False
+    return mask
+
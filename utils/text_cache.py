@@ -0,0 +1,76 @@
+"""On-disk cache for text extracted from PDF pages."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+import pypdf
+
+from utils.index_manifest import hash_file
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractedTextCache:
+    """Persistent per-page cache of pypdf text extraction results.
+
+    Entries are keyed by the file's content hash and the pypdf version, so
+    a changed PDF or a pypdf upgrade never returns stale text. The raw page
+    text is cached *before* cleaning and chunking, which lets chunking and
+    cleaning experiments reuse the cache without parsing any PDF.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+    
+    def key_for(self, pdf_path: str) -> str:
+        """Cache key for the current contents of a PDF."""
+        file_hash = hash_file(pdf_path)
+        return hashlib.sha256(f"{file_hash}:pypdf-{pypdf.__version__}".encode("utf-8")).hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached page texts for a key, or None on a miss."""
+        entry_path = self._entry_path(key)
+        
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                pages = json.load(f)["pages"]
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring corrupt text cache entry {entry_path}: {e}")
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return pages
+    
+    def put(self, key: str, pages: List[str]) -> None:
+        """Store the page texts for a key."""
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name so concurrent worker processes never clash
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pages": pages}, f)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Failed to write text cache entry {entry_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def describe(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        return f"Extracted text cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate)"
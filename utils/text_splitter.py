@@ -0,0 +1,112 @@
+"""Fast recursive character text splitter."""
+
+from typing import List, Optional
+
+
+class FastRecursiveTextSplitter:
+    """Drop-in replacement for LangChain's ``RecursiveCharacterTextSplitter``.
+
+    Produces exactly the same chunks as ``RecursiveCharacterTextSplitter``
+    with its defaults (``keep_separator=True``, ``strip_whitespace=True``,
+    literal separators, ``length_function=len``) for the same separators,
+    chunk size and overlap, but avoids the per-step costs of the original:
+
+    - separators are found and split on with ``str`` methods instead of regexes
+    - the chunk being merged is a window of indices into the splits, so
+      dropping the overlap doesn't copy the list each time
+    - chunk text is joined once per emitted chunk
+    """
+    
+    def __init__(self, chunk_size: int = 800, chunk_overlap: int = 100,
+                 separators: Optional[List[str]] = None):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or ["\n\n", "\n", " ", ""]
+    
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks."""
+        chunks: List[str] = []
+        self._split_text(text, self.separators, chunks)
+        return chunks
+    
+    def _split_text(self, text: str, separators: List[str], chunks: List[str]) -> None:
+        # Use the first separator present in the text; "" always matches
+        separator = separators[-1]
+        remaining: List[str] = []
+        for i, sep in enumerate(separators):
+            if sep == "":
+                separator = sep
+                break
+            if sep in text:
+                separator = sep
+                remaining = separators[i + 1:]
+                break
+        
+        chunk_size = self.chunk_size
+        good_splits: List[str] = []
+        
+        for split in self._split_keeping_separator(text, separator):
+            if len(split) < chunk_size:
+                good_splits.append(split)
+                continue
+            
+            if good_splits:
+                self._merge_splits(good_splits, chunks)
+                good_splits = []
+            
+            if remaining:
+                self._split_text(split, remaining, chunks)
+            else:
+                chunks.append(split)
+        
+        if good_splits:
+            self._merge_splits(good_splits, chunks)
+    
+    @staticmethod
+    def _split_keeping_separator(text: str, separator: str) -> List[str]:
+        """Split on a separator, attaching it to the start of the following piece."""
+        if not separator:
+            return list(text)
+        
+        pieces = text.split(separator)
+        splits = [pieces[0]] if pieces[0] else []
+        splits.extend(separator + piece for piece in pieces[1:])
+        return splits
+    
+    def _merge_splits(self, splits: List[str], chunks: List[str]) -> None:
+        """Merge splits into chunks of at most ``chunk_size`` characters with overlap.
+
+        The separator is already attached to each split, so the merged
+        pieces are concatenated directly.
+        """
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        lengths = [len(split) for split in splits]
+        
+        start = 0
+        total = 0
+        
+        for end, length in enumerate(lengths):
+            if total + length > chunk_size:
+                if end > start:
+                    self._emit("".join(splits[start:end]), chunks)
+                    
+                    # Drop splits from the front until we are within the
+                    # overlap and the next split fits
+                    while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                        total -= lengths[start]
+                        start += 1
+            
+            total += length
+        
+        self._emit("".join(splits[start:]), chunks)
+    
+    @staticmethod
+    def _emit(chunk: str, chunks: List[str]) -> None:
+        chunk = chunk.strip()
+        if chunk:
+            chunks.append(chunk)
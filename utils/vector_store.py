@@ -1,20 +1,40 @@
 """Vector store utilities for embedding storage and retrieval."""
 
 import os
-import pickle
-from typing import List, Optional, Union
+import copy
+import json
+import hashlib
+import asyncio
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple, Union, Iterable, Iterator
 from pathlib import Path
 import logging
 
 from langchain.schema import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_pinecone import PineconeVectorStore
 from sentence_transformers import SentenceTransformer
 import pinecone
+import faiss
+import numpy as np
+
+from utils.index_manifest import chunk_document_id
+from utils.embedding_cache import EmbeddingCache, CachedEmbeddings
+from utils.embedding_backends import create_embedding_backend, BATCHED_QUERY_BACKENDS, DEFAULT_BACKEND
+from utils.query_cache import QueryEmbeddingCache
+from utils.ann_index import (
+    IndexConfig, build_index, apply_search_params, supports_remove, renumber_after_remove, to_flat, to_mmappable
+)
+from utils.compact_store import CompactVectorStore, is_compact_store
+from utils.chunk_tags import TagFilter
+from utils.pinecone_upsert import PineconeUpserter, TEXT_KEY, INDEX_META_NAMESPACE, INDEX_VERSION_ID
 
 logger = logging.getLogger(__name__)
 
+RETRIEVAL_MODES = ("dense", "hybrid")
+
 
 class VectorStoreManager:
     """Manages vector store operations for document embeddings."""
@@ -24,48 +44,271 @@ class VectorStoreManager:
                  vector_db_type: str = "faiss",
                  pinecone_api_key: Optional[str] = None,
                  pinecone_environment: Optional[str] = None,
-                 pinecone_index_name: Optional[str] = None):
+                 pinecone_index_name: Optional[str] = None,
+                 embedding_batch_size: int = 256,
+                 embedding_cache_path: Optional[str] = None,
+                 encode_batch_size: int = 32,
+                 embedding_workers: int = 1,
+                 embedding_backend: str = DEFAULT_BACKEND,
+                 query_cache_size: int = 1024,
+                 index_config: Optional[IndexConfig] = None,
+                 retrieval_mode: str = "dense",
+                 hybrid_fetch_k: Optional[int] = None,
+                 rrf_k: int = 60,
+                 pinecone_index: Optional[Any] = None,
+                 upsert_batch_size: int = 100,
+                 upsert_concurrency: int = 4,
+                 upsert_progress_path: Optional[str] = None,
+                 query_concurrency: int = 8):
         self.embedding_model = embedding_model
+        self.embedding_backend = embedding_backend
         self.vector_db_type = vector_db_type
         self.pinecone_api_key = pinecone_api_key
         self.pinecone_environment = pinecone_environment
         self.pinecone_index_name = pinecone_index_name
+        # An index object to use instead of connecting, e.g. a LocalPineconeIndex for offline runs
+        self.pinecone_index = pinecone_index
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_concurrency = upsert_concurrency
+        # Where interrupted Pinecone loads record their progress, to resume from
+        self.upsert_progress_path = upsert_progress_path
+        # Pinecone has no multi-vector query; batches are sent as this many concurrent requests
+        self.query_concurrency = query_concurrency
+        self._query_executor = None
+        # Number of chunks embedded and added to the index at a time
+        self.embedding_batch_size = embedding_batch_size
+        # FAISS index type; flat (exact) unless configured otherwise
+        self.index_config = index_config or IndexConfig()
+        # "hybrid" fuses dense results with the saved BM25 index by reciprocal rank
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}'. Available: {', '.join(RETRIEVAL_MODES)}")
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_fetch_k = hybrid_fetch_k
+        self.rrf_k = rrf_k
         
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            model_kwargs={'device': 'cpu'}
+        self.base_embeddings = create_embedding_backend(
+            embedding_backend,
+            embedding_model,
+            batch_size=encode_batch_size,
+            num_workers=embedding_workers
         )
+        self.embeddings = self.base_embeddings
+        
+        # Reuse document embeddings across builds when the chunk text is unchanged
+        self.embedding_cache = None
+        if embedding_cache_path:
+            self.embedding_cache = EmbeddingCache(embedding_cache_path, self.embedding_model_id)
+            self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_cache)
+        
+        # Questionnaire queries repeat, so keep their vectors; 0 disables the cache
+        self.query_cache = QueryEmbeddingCache(query_cache_size) if query_cache_size > 0 else None
+        
         self.vector_store = None
     
-    def create_vector_store(self, documents: List[Document]) -> Union[FAISS, PineconeVectorStore]:
-        """Create a new vector store from documents."""
-        if not documents:
-            raise ValueError("No documents provided for vector store creation")
+    def fork(self) -> "VectorStoreManager":
+        """A manager sharing this one's embedding models and caches, with no vector store.
         
-        logger.info(f"Creating {self.vector_db_type} vector store with {len(documents)} documents")
+        Used to build a new index in the background while this manager
+        keeps serving its current store.
+        """
+        forked = copy.copy(self)
+        forked.vector_store = None
+        return forked
+    
+    @property
+    def embedding_model_id(self) -> str:
+        """Identifies the vectors this manager produces: model plus backend if non-default."""
+        if self.embedding_backend == DEFAULT_BACKEND:
+            return self.embedding_model
+        return f"{self.embedding_model}@{self.embedding_backend}"
+    
+    def _iter_batches(self, documents: Iterable[Document]) -> Iterator[List[Document]]:
+        """Group a stream of documents into embedding batches."""
+        batch = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= self.embedding_batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
+    
+    def create_vector_store(self, documents: Iterable[Document]) -> Union[FAISS, PineconeVectorStore]:
+        """Create a new vector store from documents.
         
+        ``documents`` may be a list or a generator. Chunks are embedded and
+        added to the index in batches of ``embedding_batch_size`` as they
+        arrive, so memory used for embedding doesn't grow with the corpus.
+        """
         if self.vector_db_type == "pinecone":
-            # Initialize Pinecone
-            if not self.pinecone_api_key or not self.pinecone_index_name:
-                raise ValueError("Pinecone API key and index name are required for Pinecone vector store")
+            total, content_digest = self._upsert_to_pinecone(documents)
+            if total == 0 and not self.upsert_progress_path:
+                raise ValueError("No documents provided for vector store creation")
+            self._write_pinecone_version(content_digest)
+            self.vector_store = self._connect_pinecone()
+            logger.info(f"Vector store created successfully with {total} documents")
+            return self.vector_store
+        
+        logger.info(f"Creating {self.vector_db_type} vector store in batches of {self.embedding_batch_size}")
+        
+        vector_store = None
+        total = 0
+        
+        for batch in self._iter_batches(documents):
+            ids = [chunk_document_id(doc) for doc in batch]
             
-            # Create Pinecone vector store
-            self.vector_store = PineconeVectorStore.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                index_name=self.pinecone_index_name,
-                pinecone_api_key=self.pinecone_api_key
-            )
-        else:
-            # Create FAISS vector store (default)
-            self.vector_store = FAISS.from_documents(
-                documents=documents,
-                embedding=self.embeddings
-            )
+            if vector_store is not None:
+                vector_store.add_documents(batch, ids=ids)
+            else:
+                # Create FAISS vector store (default)
+                vector_store = FAISS.from_documents(
+                    documents=batch,
+                    embedding=self.embeddings,
+                    ids=ids
+                )
+            
+            total += len(batch)
+            logger.info(f"Indexed {total} documents")
+        
+        self._flush_embedding_cache()
+        
+        if vector_store is None:
+            raise ValueError("No documents provided for vector store creation")
+        
+        self._apply_index_type(vector_store)
         
-        logger.info("Vector store created successfully")
+        self.vector_store = vector_store
+        logger.info(f"Vector store created successfully with {total} documents")
         return self.vector_store
     
+    def _pinecone_index_client(self) -> Any:
+        """The configured Pinecone index, or the injected stand-in."""
+        if self.pinecone_index is not None:
+            return self.pinecone_index
+        if not self.pinecone_api_key or not self.pinecone_index_name:
+            raise ValueError("Pinecone API key and index name are required for Pinecone vector store")
+        self.pinecone_index = pinecone.Pinecone(api_key=self.pinecone_api_key).Index(self.pinecone_index_name)
+        return self.pinecone_index
+    
+    def pinecone_vector_count(self) -> int:
+        """Number of chunk vectors in the Pinecone index.
+        
+        Only the searched (default) namespace is counted, so an index that
+        holds nothing but its version record counts as empty.
+        """
+        stats = self._pinecone_index_client().describe_index_stats()
+        return stats["namespaces"].get("", {}).get("vector_count", 0)
+    
+    def pinecone_index_version(self) -> Optional[str]:
+        """Digest of the chunks last loaded into the Pinecone index; None if no load recorded one."""
+        response = self._pinecone_index_client().fetch(ids=[INDEX_VERSION_ID], namespace=INDEX_META_NAMESPACE)
+        record = response["vectors"].get(INDEX_VERSION_ID)
+        return record["metadata"].get("version") if record else None
+    
+    def _write_pinecone_version(self, version: str) -> None:
+        """Record ``version`` in a sidecar vector, outside the namespace that is searched."""
+        index = self._pinecone_index_client()
+        dimension = index.describe_index_stats()["dimension"]
+        if not dimension:
+            return
+        # Pinecone rejects all-zero vectors
+        values = [1.0] + [0.0] * (dimension - 1)
+        index.upsert(
+            vectors=[{"id": INDEX_VERSION_ID, "values": values, "metadata": {"version": version}}],
+            namespace=INDEX_META_NAMESPACE
+        )
+    
+    def _connect_pinecone(self) -> PineconeVectorStore:
+        return PineconeVectorStore(index=self._pinecone_index_client(), embedding=self.embeddings, text_key=TEXT_KEY)
+    
+    def _upsert_to_pinecone(self, documents: Iterable[Document]) -> Tuple[int, str]:
+        """Embed and upsert documents in concurrent, retried requests; resumable if configured.
+        
+        Returns the number of vectors upserted and the digest of every chunk given.
+        """
+        upserter = PineconeUpserter(
+            self._pinecone_index_client(),
+            batch_size=self.upsert_batch_size,
+            max_concurrency=self.upsert_concurrency,
+            progress_path=self.upsert_progress_path
+        )
+        fingerprint = {"index": self.pinecone_index_name, "embedding_model": self.embedding_model_id}
+        total = upserter.upsert_documents(self._iter_batches(documents), self.embeddings, fingerprint=fingerprint)
+        self._flush_embedding_cache()
+        return total, upserter.content_digest
+    
+    def update_vector_store(self, documents: Iterable[Document], delete_ids: Optional[List[str]] = None) -> int:
+        """Incrementally update the vector store.
+        
+        Vectors for ``delete_ids`` are removed first, then ``documents`` are
+        embedded in batches and added under their stable chunk IDs. Returns
+        the number of documents added.
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        if isinstance(self.vector_store, CompactVectorStore):
+            raise ValueError("Vector store was loaded read-only; load it with writable=True to update it")
+        
+        rebuild_index = False
+        if delete_ids:
+            if self.vector_db_type != "pinecone" and not supports_remove(self.vector_store.index):
+                # HNSW graphs can't drop vectors: update an exact copy, rebuild the graph after
+                self.vector_store.index = to_flat(self.vector_store.index)
+                rebuild_index = True
+            self.vector_store.delete(ids=delete_ids)
+            if self.vector_db_type != "pinecone":
+                renumber_after_remove(self.vector_store.index)
+            logger.info(f"Deleted {len(delete_ids)} vectors from the vector store")
+        
+        total = 0
+        if self.vector_db_type == "pinecone":
+            total, content_digest = self._upsert_to_pinecone(documents)
+            if total or delete_ids:
+                # The new version follows from the previous one and what changed
+                self._write_pinecone_version(hashlib.sha256(json.dumps(
+                    [self.pinecone_index_version(), content_digest, sorted(delete_ids or [])]
+                ).encode("utf-8")).hexdigest())
+        else:
+            for batch in self._iter_batches(documents):
+                self.vector_store.add_documents(
+                    batch,
+                    ids=[chunk_document_id(doc) for doc in batch]
+                )
+                total += len(batch)
+        
+        self._flush_embedding_cache()
+        
+        if rebuild_index:
+            self._apply_index_type(self.vector_store)
+        
+        if total:
+            logger.info(f"Added {total} vectors to the vector store")
+        return total
+    
+    def _apply_index_type(self, vector_store: FAISS) -> None:
+        """Replace the flat index LangChain builds with the configured index type.
+        
+        The vectors are read back from the flat index and re-added in the same
+        order, so the position-to-docstore mapping stays valid. Compressed
+        indexes keep the exact flat index as the working copy and are built
+        when saving, where the full vectors are still at hand for re-ranking.
+        """
+        if self.index_config.index_type == "flat" or self.index_config.compressed:
+            return
+        
+        index = vector_store.index
+        vectors = index.reconstruct_n(0, index.ntotal)
+        vector_store.index = build_index(vectors, self.index_config)
+    
+    def _flush_embedding_cache(self) -> None:
+        """Persist newly computed embeddings and log cache statistics."""
+        if self.embedding_cache is None:
+            return
+        
+        logger.info(self.embedding_cache.describe())
+        self.embedding_cache.flush()
+    
     def save_vector_store(self, save_path: str) -> None:
         """Save the vector store to disk (only for FAISS)."""
         if self.vector_store is None:
@@ -75,58 +318,301 @@ class VectorStoreManager:
             logger.info("Pinecone vector store is automatically persisted in the cloud")
             return
         
-        save_dir = Path(save_path)
-        save_dir.mkdir(parents=True, exist_ok=True)
+        if isinstance(self.vector_store, CompactVectorStore):
+            raise ValueError("Vector store was loaded read-only and is already saved")
         
-        # Save FAISS index
-        self.vector_store.save_local(str(save_dir))
+        # Chunks are written in index order, so a hit's position is its record number
+        store = self.vector_store
+        doc_ids = (store.index_to_docstore_id[i] for i in range(store.index.ntotal))
+        records = ((doc_id, store.docstore.search(doc_id)) for doc_id in doc_ids)
+        
+        index, vectors = store.index, None
+        if self.index_config.compressed:
+            vectors = index.reconstruct_n(0, index.ntotal)
+            index = build_index(vectors, self.index_config)
+        
+        CompactVectorStore.save(save_path, to_mmappable(index), records, vectors=vectors)
         logger.info(f"Vector store saved to {save_path}")
     
-    def load_vector_store(self, load_path: str) -> Union[FAISS, PineconeVectorStore]:
-        """Load a vector store from disk or connect to Pinecone."""
+    def load_vector_store(self, load_path: str, writable: bool = False) -> Union[FAISS, CompactVectorStore, PineconeVectorStore]:
+        """Load a vector store from disk or connect to Pinecone.
+        
+        A FAISS store is opened read-only by default: the index is
+        memory-mapped and chunks are read from disk only for search hits.
+        ``writable=True`` loads it into a LangChain FAISS store that
+        ``update_vector_store`` can modify.
+        """
         if self.vector_db_type == "pinecone":
             # Connect to existing Pinecone index
-            if not self.pinecone_api_key or not self.pinecone_index_name:
-                raise ValueError("Pinecone API key and index name are required")
-            
-            self.vector_store = PineconeVectorStore(
-                index_name=self.pinecone_index_name,
-                embedding=self.embeddings,
-                pinecone_api_key=self.pinecone_api_key
-            )
-            logger.info(f"Connected to Pinecone index: {self.pinecone_index_name}")
+            self.vector_store = self._connect_pinecone()
+            logger.info(f"Connected to Pinecone index: {self.pinecone_index_name or 'local stand-in'}")
         else:
             # Load FAISS index
             load_dir = Path(load_path)
             
-            if not load_dir.exists():
+            if not is_compact_store(str(load_dir)):
+                # Includes stores in LangChain's pickled format, which are no longer read
                 raise FileNotFoundError(f"Vector store not found at {load_path}")
             
-            self.vector_store = FAISS.load_local(
-                str(load_dir),
-                embeddings=self.embeddings,
-                allow_dangerous_deserialization=True
-            )
+            if writable:
+                self.vector_store = self._load_writable(str(load_dir))
+            else:
+                self.vector_store = CompactVectorStore.load(
+                    str(load_dir),
+                    rerank_factor=self.index_config.rerank_factor
+                )
+            apply_search_params(self.vector_store.index, self.index_config)
             logger.info(f"Vector store loaded from {load_path}")
         
         return self.vector_store
     
-    def similarity_search(self, query: str, k: int = 5) -> List[Document]:
-        """Perform similarity search on the vector store."""
+    def _load_writable(self, load_path: str) -> FAISS:
+        """Load a saved store fully into memory as a LangChain FAISS store.
+        
+        A compressed index is replaced by an exact flat index over the saved
+        full-precision vectors, so updates don't compound quantization error.
+        """
+        compact = CompactVectorStore.load(load_path, use_mmap=False)
+        index = compact.index
+        if compact.vectors is not None:
+            index = faiss.IndexFlatL2(compact.vectors.shape[1])
+            index.add(np.ascontiguousarray(compact.vectors, dtype=np.float32))
+        try:
+            doc_ids, documents = [], {}
+            for doc_id, doc in compact.iter_documents():
+                doc_ids.append(doc_id)
+                documents[doc_id] = doc
+        finally:
+            compact.chunks.close()
+        
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(documents),
+            index_to_docstore_id=dict(enumerate(doc_ids))
+        )
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the cached vector for repeated queries."""
+        if self.query_cache is None:
+            return self.embeddings.embed_query(query)
+        return self.query_cache.get_or_embed(query, self.embeddings.embed_query)
+    
+    @contextmanager
+    def _serving_store(self) -> Iterator[Any]:
+        """The current vector store, held open for the duration of a search.
+        
+        A ``CompactVectorStore`` replaced and closed meanwhile stays open
+        until every search holding it has finished.
+        """
+        while True:
+            store = self.vector_store
+            if store is None:
+                raise ValueError("Vector store not initialized")
+            if not isinstance(store, CompactVectorStore) or store.acquire():
+                break
+            if self.vector_store is store:
+                raise ValueError("Vector store is closed")
+            # Replaced and closed between reading and acquiring it; use its replacement
+        try:
+            yield store
+        finally:
+            if isinstance(store, CompactVectorStore):
+                store.release()
+    
+    def _search_by_vector(self, store: Any, embedding: List[float], k: int, filter: Optional[TagFilter] = None,
+                          query: Optional[str] = None) -> List[tuple]:
+        """Search the index directly with a query vector, returning (document, score) pairs."""
+        if query is not None and self._hybrid_enabled(store):
+            return self._hybrid_search(store, np.asarray(embedding, dtype=np.float32)[None, :], [query], k, filter)[0]
+        if self.vector_db_type == "pinecone":
+            # The Pinecone client serializes plain lists, not numpy arrays
+            return store.similarity_search_by_vector_with_score(
+                list(map(float, embedding)), k=k, filter=filter.to_pinecone() if filter else None
+            )
+        if not filter:
+            return store.similarity_search_with_score_by_vector(embedding, k=k)
+        if isinstance(store, CompactVectorStore):
+            return store.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)
+        # Writable working copy: LangChain post-filters a larger candidate set on metadata
+        return store.similarity_search_with_score_by_vector(
+            embedding, k=k, filter=filter.matches, fetch_k=max(20 * k, 200)
+        )
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed search queries into a matrix, one row per query.
+        
+        Queries not in the query cache are embedded together in a single
+        model call where the backend embeds queries as documents
+        (``BATCHED_QUERY_BACKENDS``), and one ``embed_query`` at a time
+        otherwise.
+        """
+        unique = list(dict.fromkeys(queries))
+        vectors = {}
+        missing = unique
+        if self.query_cache is not None:
+            missing = []
+            for query in unique:
+                vector = self.query_cache.get(query)
+                if vector is None:
+                    missing.append(query)
+                else:
+                    vectors[query] = vector
+        
+        if missing:
+            if self.embedding_backend in BATCHED_QUERY_BACKENDS:
+                computed = self.base_embeddings.embed_documents(missing)
+            else:
+                computed = [self.base_embeddings.embed_query(query) for query in missing]
+            for query, vector in zip(missing, computed):
+                if self.query_cache is not None:
+                    vectors[query] = self.query_cache.put(query, vector)
+                else:
+                    vectors[query] = np.asarray(vector, dtype=np.float32)
+        
+        return np.stack([vectors[query] for query in queries]).astype(np.float32)
+    
+    def _hybrid_enabled(self, store: Any) -> bool:
+        """Hybrid search needs the BM25 index of a saved (compact) store."""
+        return (self.retrieval_mode == "hybrid" and isinstance(store, CompactVectorStore)
+                and store.lexical is not None)
+    
+    def _hybrid_search(self, store: CompactVectorStore, embeddings: np.ndarray, queries: List[str], k: int,
+                       filter: Optional[TagFilter] = None) -> List[List[tuple]]:
+        return store.hybrid_search_with_score(
+            embeddings, queries, k=k, filter=filter, fetch_k=self.hybrid_fetch_k, rrf_k=self.rrf_k
+        )
+    
+    def _search_batch_by_vectors(self, store: Any, embeddings: np.ndarray, k: int, filter: Optional[TagFilter] = None,
+                                 queries: Optional[List[str]] = None) -> List[List[tuple]]:
+        """Search a matrix of query vectors, returning (document, score) pairs per row.
+        
+        With the query texts given and hybrid retrieval enabled, dense
+        results are fused with BM25 results.
+        """
+        if queries is not None and self._hybrid_enabled(store):
+            return self._hybrid_search(store, embeddings, queries, k, filter)
+        if self.vector_db_type == "pinecone":
+            # No multi-vector query in Pinecone; one request per query, sent concurrently
+            if self._query_executor is None:
+                self._query_executor = ThreadPoolExecutor(max_workers=self.query_concurrency,
+                                                          thread_name_prefix="pinecone-query")
+            return list(self._query_executor.map(
+                lambda embedding: self._search_by_vector(store, embedding, k, filter), embeddings
+            ))
+        if filter and not isinstance(store, CompactVectorStore):
+            # LangChain's FAISS store filters one query at a time
+            return [self._search_by_vector(store, embedding, k, filter) for embedding in embeddings]
+        
+        if isinstance(store, CompactVectorStore):
+            return store.similarity_search_with_score_by_vectors(embeddings, k=k, filter=filter)
+        
+        # LangChain's FAISS store searches one vector at a time; query its index directly
+        distances, positions = store.index.search(np.ascontiguousarray(embeddings, dtype=np.float32), k)
+        return [
+            [
+                (store.docstore.search(store.index_to_docstore_id[int(position)]), float(distance))
+                for distance, position in zip(row_distances, row_positions)
+                if position != -1
+            ]
+            for row_distances, row_positions in zip(distances, positions)
+        ]
+    
+    def similarity_search_batch(self, queries: List[str], k: int = 5,
+                                filters: Optional[List[Optional[TagFilter]]] = None) -> List[List[tuple]]:
+        """Search many queries at once: one embedding forward pass and one FAISS search.
+        
+        Returns a list of ``(document, score)`` lists, one per query, in the
+        order of ``queries``; scores are the same as ``similarity_search_with_score``.
+        ``filters`` optionally gives a tag filter per query; queries sharing
+        a filter are searched together. In hybrid mode the scores are fused
+        RRF scores, where higher is better.
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        if not queries:
+            return []
+        
+        embeddings = self.embed_queries(queries)
+        with self._serving_store() as store:
+            if filters is None:
+                results = self._search_batch_by_vectors(store, embeddings, k, queries=queries)
+            else:
+                groups = {}
+                for i, tag_filter in enumerate(filters):
+                    groups.setdefault(tag_filter, []).append(i)
+                results = [None] * len(queries)
+                for tag_filter, rows in groups.items():
+                    batch = self._search_batch_by_vectors(
+                        store, embeddings[rows], k, tag_filter, [queries[i] for i in rows]
+                    )
+                    for i, result in zip(rows, batch):
+                        results[i] = result
+        logger.info(f"Searched {len(queries)} queries in one batch")
+        
+        return results
+    
+    def similarity_search(self, query: str, k: int = 5, filter: Optional[TagFilter] = None) -> List[Document]:
+        """Perform similarity search on the vector store, optionally restricted to chunks matching ``filter``."""
         if self.vector_store is None:
             raise ValueError("Vector store not initialized")
         
-        results = self.vector_store.similarity_search(query, k=k)
+        embedding = self.embed_query(query)
+        with self._serving_store() as store:
+            results = [doc for doc, _ in self._search_by_vector(store, embedding, k, filter, query)]
         logger.info(f"Found {len(results)} similar documents for query")
         
         return results
     
-    def similarity_search_with_score(self, query: str, k: int = 5) -> List[tuple]:
-        """Perform similarity search with relevance scores."""
+    def similarity_search_with_score(self, query: str, k: int = 5, filter: Optional[TagFilter] = None) -> List[tuple]:
+        """Perform similarity search with relevance scores, optionally restricted to chunks matching ``filter``.
+        
+        Scores are L2 distances (lower is better), or fused RRF scores
+        (higher is better) in hybrid mode.
+        """
         if self.vector_store is None:
             raise ValueError("Vector store not initialized")
         
-        results = self.vector_store.similarity_search_with_score(query, k=k)
+        embedding = self.embed_query(query)
+        with self._serving_store() as store:
+            results = self._search_by_vector(store, embedding, k, filter, query)
         logger.info(f"Found {len(results)} similar documents with scores")
         
-        return results
\ No newline at end of file
+        return results
+    
+    async def asimilarity_search_with_score(self, query: str, k: int = 5,
+                                            filter: Optional[TagFilter] = None) -> List[tuple]:
+        """Async ``similarity_search_with_score``: embedding and the index call run off the event loop."""
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        
+        embedding = await asyncio.to_thread(self.embed_query, query)
+        with self._serving_store() as store:
+            return await asyncio.to_thread(self._search_by_vector, store, embedding, k, filter, query)
+    
+    async def asimilarity_search_batch(self, queries: List[str], k: int = 5,
+                                       filters: Optional[List[Optional[TagFilter]]] = None) -> List[List[tuple]]:
+        """Async ``similarity_search_batch``.
+        
+        For Pinecone the queries are embedded together and then sent as up
+        to ``query_concurrency`` concurrent requests, so a batch costs about
+        one round trip per ``query_concurrency`` queries instead of one each.
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        if not queries:
+            return []
+        if self.vector_db_type != "pinecone":
+            return await asyncio.to_thread(self.similarity_search_batch, queries, k, filters)
+        
+        embeddings = await asyncio.to_thread(self.embed_queries, queries)
+        limit = asyncio.Semaphore(self.query_concurrency)
+        
+        async def search(store, embedding, tag_filter):
+            async with limit:
+                return await asyncio.to_thread(self._search_by_vector, store, embedding, k, tag_filter)
+        
+        with self._serving_store() as store:
+            return list(await asyncio.gather(*(
+                search(store, embedding, filters[i] if filters else None) for i, embedding in enumerate(embeddings)
+            )))